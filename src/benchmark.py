@@ -0,0 +1,275 @@
+'''
+    Benchmarks de renderização.
+
+    Cada caso renderiza uma cena (fixture) com um backend numa resolução, e mede o tempo por
+    quadro, os raios por segundo e o pico de memória (RSS). Cada caso roda num processo próprio:
+    os dois backends usam os mesmos nomes de módulo (primitives, shapes, camera) e o pico de RSS
+    é medido por processo.
+
+    Backends:
+        - python: Camera.draw do backend em Python puro (src/python)
+        - numpy: Camera.draw_vectorized do backend em Python puro
+        - cython: Camera.draw do backend compilado (python cython_classes/setup.py build_ext --inplace,
+                  a partir de src/)
+
+    Fixtures:
+        - as cenas de python/scenes.py (as mesmas do main.py)
+        - icosaedro: inputs/icosahedron.obj
+        - esferas_N: N esferas aleatórias (semente fixa)
+        - triangulos_M: M triângulos aleatórios (semente fixa)
+
+    Uso, a partir de src/:
+        python benchmark.py --resolutions 128 512 --output resultados.json
+        python benchmark.py --baseline resultados.json --tolerance 0.1
+
+    Com --baseline, os tempos são comparados com um resultado salvo anteriormente, e o programa
+    termina com código 1 se algum caso ficar mais lento que a tolerância permite.
+'''
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.machinery import EXTENSION_SUFFIXES
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.join(SRC_DIR, 'python')
+INPUTS_DIR = os.path.join(SRC_DIR, '..', 'inputs')
+
+BACKENDS = ('python', 'numpy', 'cython')
+
+# Câmera padrão das cenas de python/scenes.py
+DEFAULT_CAMERA = ((0, 0, 0), (0, 0, -1))
+ICOSAHEDRON_CAMERA = ((6, 1.5, 5), (6, 1.5, 0))
+SEED = 1234
+
+
+class Unsupported(Exception):
+    '''
+        O backend não suporta a fixture (por exemplo, malhas no backend Cython).
+    '''
+
+
+def cython_available():
+    return any(os.path.exists(os.path.join(SRC_DIR, f'camera{suffix}')) for suffix in EXTENSION_SUFFIXES)
+
+
+def load_backend(backend):
+    '''
+        Importa os módulos do backend e retorna (shapes, camera).
+    '''
+    if backend == 'cython':
+        if not cython_available():
+            raise Unsupported('backend Cython não compilado')
+        # Os módulos compilados ficam em src/ e precisam ter prioridade sobre os de src/python
+        sys.path[:0] = [SRC_DIR, PYTHON_DIR]
+    else:
+        sys.path[:0] = [PYTHON_DIR, SRC_DIR]
+
+    import shapes
+    import camera
+    return shapes, camera
+
+
+def random_spheres(shapes, count):
+    import numpy as np
+    rng = np.random.default_rng(SEED)
+    centers = np.column_stack((rng.uniform(-2, 2, count), rng.uniform(-2, 2, count), rng.uniform(-9, -3, count)))
+    radii = rng.uniform(0.05, 0.3, count)
+    colors = rng.uniform(0, 1, (count, 3))
+    return [shapes.Sphere(shapes.Point3(*c), r, shapes.Color(*rgb))
+            for c, r, rgb in zip(centers.tolist(), radii.tolist(), colors.tolist())]
+
+
+def random_triangles(shapes, count):
+    import numpy as np
+    from mesh import Mesh
+    rng = np.random.default_rng(SEED)
+    centers = np.column_stack((rng.uniform(-2, 2, count), rng.uniform(-2, 2, count), rng.uniform(-9, -3, count)))
+    triangles = centers[:, None, :] + rng.normal(0, 0.15, (count, 3, 3))
+    return [Mesh(triangles.reshape(-1, 3), np.arange(3 * count).reshape(-1, 3), shapes.Color(0.8, 0.4, 0.6))]
+
+
+def icosahedron(shapes):
+    from obj_reader import ObjReader
+    from mesh import Mesh
+    reader = ObjReader(os.path.join(INPUTS_DIR, 'icosahedron.obj'), compact=True)
+    return [Mesh.from_obj(reader)]
+
+
+def make_fixture(name, shapes, backend):
+    '''
+        Cria a fixture de nome name com o módulo de formas do backend.
+        Retorna (objetos, (posição da câmera, alvo)).
+    '''
+    from scenes import SCENES
+
+    if name in SCENES:
+        return SCENES[name](shapes), DEFAULT_CAMERA
+
+    if backend == 'cython' and (name == 'icosaedro' or name.startswith('triangulos_')):
+        raise Unsupported('malhas não são suportadas pelo backend Cython')
+
+    if name == 'icosaedro':
+        return icosahedron(shapes), ICOSAHEDRON_CAMERA
+    if name.startswith('esferas_'):
+        return random_spheres(shapes, int(name.split('_')[1])), DEFAULT_CAMERA
+    if name.startswith('triangulos_'):
+        return random_triangles(shapes, int(name.split('_')[1])), DEFAULT_CAMERA
+
+    raise ValueError(f"Fixture desconhecida: {name}")
+
+
+def make_camera(camera, shapes, backend, position, target, resolution):
+    '''
+        Cria a câmera do backend com a tela a distância 1 da posição, olhando para o alvo.
+    '''
+    position = shapes.Point3(*position)
+    target = shapes.Point3(*target)
+
+    if backend == 'cython':
+        # No backend Cython a tela fica no alvo, então o alvo é posto a distância 1
+        direction = position.to(target).normalized()
+        return camera.Camera(resolution, resolution, position, position.translate(direction))
+
+    return camera.Camera(position, target, shapes.Vector3(0, 1, 0), 1.0, resolution, resolution)
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No macOS ru_maxrss vem em bytes; no Linux, em kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_case(backend, fixture, resolution, repeat):
+    '''
+        Roda um caso (no processo trabalhador) e retorna o dicionário com o resultado.
+    '''
+    result = {'fixture': fixture, 'backend': backend, 'resolution': resolution}
+    try:
+        shapes, camera = load_backend(backend)
+        objects, (position, target) = make_fixture(fixture, shapes, backend)
+        cam = make_camera(camera, shapes, backend, position, target, resolution)
+    except Unsupported as error:
+        result['skipped'] = str(error)
+        return result
+
+    draw = cam.draw_vectorized if backend == 'numpy' else cam.draw
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        draw(objects)
+        times.append(time.perf_counter() - start)
+
+    seconds = min(times)
+    result.update({
+        'objects': len(objects),
+        'seconds': seconds,
+        'rays_per_sec': resolution * resolution / seconds,
+        'peak_rss_kb': peak_rss_kb(),
+    })
+    return result
+
+
+def run(backends, fixtures, resolutions, repeat):
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for fixture in fixtures:
+        for backend in backends:
+            for resolution in resolutions:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_case, backend, fixture, resolution, repeat).result()
+                print_result(result)
+                results.append(result)
+    return results
+
+
+def print_result(result):
+    case = f"{result['fixture']:<22} {result['backend']:<7} {result['resolution']:>5}px"
+    if 'skipped' in result:
+        print(f"{case}  (ignorado: {result['skipped']})")
+        return
+    rss = '-' if result['peak_rss_kb'] is None else f"{result['peak_rss_kb'] / 1024:.1f} MB"
+    print(f"{case}  {result['seconds'] * 1000:10.2f} ms/quadro  {result['rays_per_sec']:14,.0f} raios/s  RSS {rss}")
+
+
+def compare(results, baseline, tolerance):
+    '''
+        Compara os resultados com a baseline. Retorna a lista de regressões.
+    '''
+    key = lambda r: (r['fixture'], r['backend'], r['resolution'])
+    previous = {key(r): r for r in baseline['results'] if 'seconds' in r}
+
+    regressions = []
+    for result in results:
+        before = previous.get(key(result))
+        if before is None or 'seconds' not in result:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        if ratio > 1 + tolerance:
+            regressions.append((result, before, ratio))
+    return regressions
+
+
+def main():
+    from scenes import SCENES
+
+    parser = argparse.ArgumentParser(description="Benchmarks de renderização")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--scenes', nargs='+', help="fixtures a rodar (padrão: todas)")
+    parser.add_argument('--resolutions', nargs='+', type=int, default=[128, 512])
+    parser.add_argument('--spheres', nargs='*', type=int, default=[100, 1000], help="quantidades das cenas esferas_N")
+    parser.add_argument('--triangles', nargs='*', type=int, default=[10000], help="quantidades das cenas triangulos_M")
+    parser.add_argument('--repeat', type=int, default=3, help="repetições por caso; vale o menor tempo")
+    parser.add_argument('--output', help="arquivo JSON para salvar os resultados")
+    parser.add_argument('--baseline', help="arquivo JSON de resultados anteriores para comparação")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="piora relativa tolerada (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    fixtures = args.scenes or (list(SCENES) + ['icosaedro'] +
+                               [f'esferas_{n}' for n in args.spheres] +
+                               [f'triangulos_{m}' for m in args.triangles])
+
+    results = run(args.backends, fixtures, args.resolutions, args.repeat)
+
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for result, before, ratio in regressions:
+            print(f"REGRESSÃO: {result['fixture']} / {result['backend']} / {result['resolution']}px: "
+                  f"{before['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            print(f"{len(regressions)} regressão(ões) acima da tolerância de {args.tolerance:.0%}")
+            sys.exit(1)
+        print("Nenhuma regressão em relação à baseline.")
+
+
+if __name__ == '__main__':
+    sys.path[:0] = [PYTHON_DIR]
+    main()
@@ -1,4 +1,5 @@
 from cython_classes.primitives import Vector3
+import numpy as np
 
 
 class Material:
@@ -12,6 +13,49 @@ class Material:
         self.d = 0
 
 
+class MaterialTable:
+    '''
+    Tabela de materiais compartilhada pelas faces, que guardam apenas o índice do material.
+
+    Além dos objetos Material, as propriedades ficam em arrays empacotados, para que o sombreamento
+    obtenha as propriedades de um lote de interseções com uma única indexação (ex.: table.kd[ids]):
+        - ka, kd, ks, ke: arrays (M, 3)
+        - ns, ni, d: arrays (M,)
+    Os arrays são uma cópia das propriedades dos objetos Material: depois de alterar um material,
+    refresh() os atualiza.
+    '''
+    def __init__(self, materials):
+        self.names = list(materials)
+        self.materials = [materials[name] for name in self.names]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.refresh()
+
+    def refresh(self):
+        '''
+        Refaz os arrays empacotados a partir dos objetos Material.
+        '''
+        self.ka = self._pack_color('ka')
+        self.kd = self._pack_color('kd')
+        self.ks = self._pack_color('ks')
+        self.ke = self._pack_color('ke')
+        self.ns = self._pack_scalar('ns')
+        self.ni = self._pack_scalar('ni')
+        self.d = self._pack_scalar('d')
+
+    def __len__(self):
+        return len(self.materials)
+
+    def _pack_color(self, attribute):
+        colors = [getattr(material, attribute) for material in self.materials]
+        return np.array([(c.x, c.y, c.z) for c in colors], dtype=float).reshape(-1, 3)
+
+    def _pack_scalar(self, attribute):
+        return np.array([getattr(material, attribute) for material in self.materials], dtype=float)
+
+    def get_id(self, material_name):
+        return self.index[material_name]
+
+
 class Colormap:
     '''
     Classe de leitura de arquivos .mtl, que guarda cores e propriedades de materiais.
@@ -27,9 +71,28 @@ class Colormap:
 
         A classe precisa ser instânciada passando o caminho do arquivo .mtl correspondente
     '''
-    def __init__(self, input_file):
+    def __init__(self, input_file=None):
         self.materials = {}
-        self.read_file(input_file)
+        if input_file is not None:
+            self.read_file(input_file)
+
+    @classmethod
+    def from_dict(cls, materials):
+        '''
+        Cria o Colormap a partir de um dicionário {nome: {ka, kd, ks, ke, ns, ni, d}}, sem ler o arquivo .mtl.
+        '''
+        colormap = cls()
+        for name, values in materials.items():
+            material = Material()
+            material.ka = Vector3(*values['ka'])
+            material.kd = Vector3(*values['kd'])
+            material.ks = Vector3(*values['ks'])
+            material.ke = Vector3(*values['ke'])
+            material.ns = values['ns']
+            material.ni = values['ni']
+            material.d = values['d']
+            colormap.materials[name] = material
+        return colormap
 
     def read_file(self, input_file):
         with open(input_file, 'r') as file:
@@ -56,4 +119,12 @@ class Colormap:
         return self.materials[material_name].kd
 
     def get_material(self, material_name):
-        return self.materials[material_name]
\ No newline at end of file
+        return self.materials[material_name]
+
+    def get_material_table(self):
+        '''
+        Retorna a tabela de materiais, criada uma única vez.
+        '''
+        if getattr(self, 'material_table', None) is None or len(self.material_table) != len(self.materials):
+            self.material_table = MaterialTable(self.materials)
+        return self.material_table
\ No newline at end of file
@@ -6,7 +6,9 @@ from cython import (
     void,
     int as cint)
 
+import numpy as np
 from primitives import *
+from shapes import trace
 
 @cclass
 class Camera:
@@ -25,9 +27,14 @@ class Camera:
         - width (cython.int): largura da tela em pixels
     """
     
-    d: double
-    height: cint
-    width: cint
+    position = declare(object, visibility="readonly")
+    target = declare(object, visibility="readonly")
+    u = declare(object, visibility="readonly")
+    v = declare(object, visibility="readonly")
+    w = declare(object, visibility="readonly")
+    d = declare(double, visibility="readonly")
+    height = declare(cint, visibility="readonly")
+    width = declare(cint, visibility="readonly")
 
     def __init__(self, height: cint, width: cint, position: Point3, target: Point3 = None):
         self.position = position
@@ -36,7 +43,7 @@ class Camera:
         self.v: Vector3 = position.to(self.target)
         self.d = self.v.norm()
         self.v = self.v.normalized()
-        self.w = -(self.v).cross(Vector3.j)
+        self.w = -(self.v).cross(UP)
         self.u = self.v.cross(self.w)
         self.height = height
         self.width = width
@@ -52,4 +59,27 @@ class Camera:
         Executa uma tranformação de translação sobre a camera
         """
         self.position = self.position.translate(v)
-        self.target = self.target.translate(v) 
\ No newline at end of file
+        self.target = self.target.translate(v)
+
+    def draw(self, objects):
+        """
+        Renderiza os objetos (Plane e Sphere) com o kernel compilado, que percorre os pixels
+        sem o GIL e em paralelo. A tela fica no alvo (distância d), com 1 unidade de largura
+        e de altura, como na implementação em Python puro.
+
+        Valor de Retorno: array (height, width, 3) com as cores dos pixels
+        """
+        # Base ortonormal da tela; as colunas crescem no sentido de -w, como na implementação em Python
+        right: Vector3 = (-self.w).normalized()
+        up: Vector3 = self.u.normalized()
+        center: Point3 = self.position.translate(self.v.scale(self.d))
+
+        scene = np.array([obj.packed() for obj in objects], dtype=np.float64).reshape(-1, 10)
+        image = np.zeros((self.height, self.width, 3), dtype=np.float64)
+
+        trace(image, scene,
+              np.array([self.position.x, self.position.y, self.position.z]),
+              np.array([center.x, center.y, center.z]),
+              np.array([right.x, right.y, right.z]) / self.width,
+              np.array([up.x, up.y, up.z]) / self.height)
+        return image
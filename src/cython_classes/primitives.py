@@ -2,7 +2,7 @@ from __future__ import annotations
 # import cython
 from cython import (
     cclass,
-    cfunc,
+    ccall,
     double,
     declare
 )
@@ -17,16 +17,16 @@ class Point3:
         y (cython.double): Coordenada Y do ponto.
         z (cython.double): Coordenada Z do ponto.
     """
-    x: double
-    y: double
-    z: double
+    x = declare(double, visibility="readonly")
+    y = declare(double, visibility="readonly")
+    z = declare(double, visibility="readonly")
 
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
         self.z = z
 
-    @cfunc
+    @ccall
     def dist(self, p: Point3) -> double:
         """
         Retorna a distancia até o ponto p
@@ -44,7 +44,7 @@ class Point3:
     def __str__(self):
         return f"({self.x}, {self.y}, {self.z})"
     
-    @cfunc
+    @ccall
     def to(self, p: Point3) -> Vector3:
         """
         Retorna o vetor até o ponto p.
@@ -55,7 +55,7 @@ class Point3:
         
         return Vector3(p.x - self.x, p.y - self.y, p.z - self.z)
     
-    @cfunc
+    @ccall
     def translate(self, v: Vector3) -> Point3:
         """
         Retorna o ponto mais o vetor v
@@ -63,7 +63,7 @@ class Point3:
         Argumentos:
             - v (Vector3) Vetor de translação
         """
-        assert isinstance(v, Vector3), "v precisa ser Vector3, mas é "+type(v)
+        assert isinstance(v, Vector3), f"v precisa ser Vector3, mas é {type(v)}"
         return Point3(self.x + v.x, self.y + v.y, self.z + v.z)
     
 @cclass
@@ -79,9 +79,6 @@ class Vector3():
     x = declare(double, visibility="readonly")
     y = declare(double, visibility="readonly")
     z = declare(double, visibility="readonly")
-    i = declare(object, visibility="readonly")
-    j = declare(object, visibility="readonly")
-    k = declare(object, visibility="readonly")
 
     def __init__(self, x, y, z):
         self.x = x
@@ -106,8 +103,8 @@ class Vector3():
     def __div__(self, k: double) -> Vector3:
         return Vector3(self.x/k, self.y/k, self.z/k)
     
-    @cfunc
-    def scale(self, k: double) -> double:
+    @ccall
+    def scale(self, k: double) -> Vector3:
         """
         Retorna o produto do vetor pelo escalar k.
 
@@ -116,7 +113,7 @@ class Vector3():
         """
         return Vector3(k*self.x, k*self.y, k*self.z)
 
-    @cfunc
+    @ccall
     def cross(self, other: Vector3) -> Vector3:
         """
         Retorna o produto velorial deste vetor por outro
@@ -130,26 +127,24 @@ class Vector3():
             (self.x * other.y) - (self.y * other.x)
         )
 
-    @cfunc
+    @ccall
     def norm(self) -> double:
         """
         Retorna a norma do vetor
         """
         return (self * self)**(1/2)
     
-    @cfunc
-    def normalized(self) -> double:
+    @ccall
+    def normalized(self) -> Vector3:
         """
         Retorna o vetor normalizado
         """
         return self.scale(1/self.norm())
 
-Vector3.i = Vector3(1, 0, 0)
-Vector3.j = Vector3(0, 1, 0)
-Vector3.k = Vector3(0, 0, 1)
-
-# UP: cython.const[Vector3] = Vector3(0, 1, 0)
-# FW: cython.const[Vector3] = Vector3(0, 0, 1)
-# RG: cython.const[Vector3] = Vector3(-1, 0, 0)
-# DW: cython.const[Vector3] = Vector3(0, -1, 0)
-# BK: cython.const[Vector3] = Vector3(0, 0, -1)
+# Tipos de extensão não aceitam novos atributos de classe depois de criados,
+# então os vetores de referência ficam no módulo
+UP = Vector3(0, 1, 0)
+FW = Vector3(0, 0, 1)
+RG = Vector3(-1, 0, 0)
+DW = Vector3(0, -1, 0)
+BK = Vector3(0, 0, -1)
@@ -1,6 +1,17 @@
-from setuptools import setup
+import sys
+from setuptools import setup, Extension
 from Cython.Build import cythonize
 
+# O laço de pixels do kernel de renderização usa prange, que depende de OpenMP
+openmp_compile = ["/openmp"] if sys.platform == "win32" else ["-fopenmp"]
+openmp_link = [] if sys.platform == "win32" else ["-fopenmp"]
+
+extensions = [
+    Extension("primitives", ["cython_classes/primitives.py"]),
+    Extension("camera", ["cython_classes/camera.py"]),
+    Extension("shapes", ["cython_classes/shapes.py"], extra_compile_args=openmp_compile, extra_link_args=openmp_link),
+]
+
 setup(
-    ext_modules = cythonize(["cython_classes/primitives.py", "cython_classes/camera.py", "cython_classes/shapes.py"], annotate = True)
+    ext_modules = cythonize(extensions, annotate = True)
 )
\ No newline at end of file
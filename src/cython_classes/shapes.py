@@ -1,10 +1,29 @@
+import cython
 from cython import (
     cclass,
     cfunc,
-    double
+    ccall,
+    double,
+    declare,
+    nogil,
+    exceptval,
+    boundscheck,
+    wraparound,
+    Py_ssize_t
 )
+from cython.parallel import prange
+from cython.cimports.libc.math import sqrt, fabs
 from primitives import *
 
+INF = declare(double, float('inf'))
+
+# Tipos de superfície no array empacotado da cena
+SPHERE = declare(double, 0)
+PLANE = declare(double, 1)
+
+# Colunas do array empacotado da cena: tipo, 6 parâmetros geométricos e a cor
+SCENE_COLUMNS = 10
+
 @cclass
 class Intersectable:
     """
@@ -16,23 +35,77 @@ class Intersectable:
 @cclass
 class Color:
     """
-    Cor RGB, com canais com valores normalizados entre 0 e 1 
+    Cor RGB, com canais com valores normalizados entre 0 e 1
 
     Atributos
         - r (cython.double): canal vermelho
         - g (cython.double): canal verde
         - b (cython.double): canal azul
     """
+    r = declare(double, visibility="readonly")
+    g = declare(double, visibility="readonly")
+    b = declare(double, visibility="readonly")
+
     def __init__(self, r: double, g: double, b: double):
-        self.r: double = r
-        self.g: double = g
-        self.b: double = b
+        self.r = r
+        self.g = g
+        self.b = b
+
+# Tipos de extensão não aceitam novos atributos de classe depois de criados,
+# então as cores pré-definidas ficam no módulo
+BLACK  = Color(0, 0, 0)
+WHITE  = Color(1, 1, 1)
+RED    = Color(1, 0, 0)
+GREEN  = Color(0, 1, 0)
+BLUE   = Color(0, 0, 1)
+YELLOW = Color(1, 1, 0)
+
+@cfunc
+@nogil
+@exceptval(check=False)
+def plane_hit(px: double, py: double, pz: double, nx: double, ny: double, nz: double,
+              ox: double, oy: double, oz: double, dx: double, dy: double, dz: double) -> double:
+    """
+    Interseção raio-plano em doubles C. Retorna a distância ou INF.
+    """
+    denominator: double = nx * dx + ny * dy + nz * dz
+
+    # Reta paralela ao plano
+    if fabs(denominator) < 1e-6:
+        return INF
 
-Color.WHITE  = Color(1, 1, 1)
-Color.RED    = Color(1, 0, 0)
-Color.GREEN  = Color(0, 1, 0)
-Color.BLUE   = Color(0, 0, 1)
-Color.YELLOW = Color(1, 1, 0)
+    t: double = ((px - ox) * nx + (py - oy) * ny + (pz - oz) * nz) / denominator
+    return t if t >= 0 else INF
+
+@cfunc
+@nogil
+@exceptval(check=False)
+def sphere_hit(cx: double, cy: double, cz: double, radius: double,
+               ox: double, oy: double, oz: double, dx: double, dy: double, dz: double) -> double:
+    """
+    Interseção raio-esfera em doubles C. Retorna a menor distância positiva ou INF. Um raio que
+    parte de dentro da esfera atinge a saída.
+    """
+    ex: double = cx - ox
+    ey: double = cy - oy
+    ez: double = cz - oz
+
+    # Projeção do vetor distância sobre o raio
+    proj_length: double = ex * dx + ey * dy + ez * dz
+    square_distance: double = ex * ex + ey * ey + ez * ez
+    square_radius: double = radius * radius
+
+    # Sentido oposto só tem interseção se a origem estiver dentro da esfera
+    if proj_length < 0 and square_distance >= square_radius:
+        return INF
+
+    square_d: double = square_distance - proj_length * proj_length
+    if square_d > square_radius:
+        return INF
+
+    thc: double = sqrt(square_radius - square_d)
+    inter_1: double = proj_length - thc
+    return inter_1 if inter_1 > 0 else proj_length + thc
 
 @cclass
 class Plane (Intersectable):
@@ -44,14 +117,34 @@ class Plane (Intersectable):
         - normal (Point3): vetor normal ao plano
         - position (Point3): ponto arbitrario que pertence ao plano
     """
-    color: Color
-    position: Point3
-    normal: Vector3
+    color = declare(Color, visibility="readonly")
+    position = declare(object, visibility="readonly")
+    normal = declare(object, visibility="readonly")
 
-    def __init__(self, position: Point3, normal: Vector3, color: Color = Color.WHITE):
+    def __init__(self, position: Point3, normal: Vector3, color: Color = WHITE):
         self.color = color
         self.position = position
-        self.normal = normal
+        self.normal = normal.normalized()
+
+    @ccall
+    def intersects(self, origin: Point3, direction: Vector3):
+        """
+        Calcula a interseção do raio com o plano.
+
+        Valor de Retorno: a distância positiva ou None se não houver interseção
+        """
+        t: double = plane_hit(self.position.x, self.position.y, self.position.z,
+                              self.normal.x, self.normal.y, self.normal.z,
+                              origin.x, origin.y, origin.z, direction.x, direction.y, direction.z)
+        return None if t == INF else t
+
+    @ccall
+    def packed(self):
+        """
+        Retorna a linha do plano no array empacotado da cena
+        """
+        return (PLANE, self.position.x, self.position.y, self.position.z,
+                self.normal.x, self.normal.y, self.normal.z, self.color.r, self.color.g, self.color.b)
 
 @cclass
 class Sphere (Intersectable):
@@ -63,11 +156,96 @@ class Sphere (Intersectable):
         - position (Point3): centro da esfera
         - radius (cython.double): raio da esfera
     """
-    color: Color
-    position: Point3
-    radius: double
-
-    def __init__(self, position: Point3, radius: double, color: Color = Color.WHITE):
-        self.color: Color = color
-        self.position: Point3 = position
-        self.radius: double = radius
\ No newline at end of file
+    color = declare(Color, visibility="readonly")
+    position = declare(object, visibility="readonly")
+    radius = declare(double, visibility="readonly")
+
+    def __init__(self, position: Point3, radius: double, color: Color = WHITE):
+        self.color = color
+        self.position = position
+        self.radius = radius
+
+    @ccall
+    def intersects(self, origin: Point3, direction: Vector3):
+        """
+        Calcula a interseção do raio com a esfera. Um raio que parte de dentro da esfera
+        atinge a saída.
+
+        Valor de Retorno: a menor distância positiva ou None se não houver interseção
+        """
+        t: double = sphere_hit(self.position.x, self.position.y, self.position.z, self.radius,
+                               origin.x, origin.y, origin.z, direction.x, direction.y, direction.z)
+        return None if t == INF else t
+
+    @ccall
+    def packed(self):
+        """
+        Retorna a linha da esfera no array empacotado da cena
+        """
+        return (SPHERE, self.position.x, self.position.y, self.position.z,
+                self.radius, 0.0, 0.0, self.color.r, self.color.g, self.color.b)
+
+@boundscheck(False)
+@wraparound(False)
+def trace(image: double[:, :, ::1], scene: double[:, ::1], origin: double[::1],
+          screen_center: double[::1], delta_h: double[::1], delta_v: double[::1]):
+    """
+    Renderiza a cena no framebuffer, com as linhas da imagem distribuídas entre threads (OpenMP).
+
+    Argumentos:
+        - image (double[:, :, ::1]): framebuffer (altura, largura, 3)
+        - scene (double[:, ::1]): uma linha por objeto, na ordem da lista (ver packed)
+        - origin (double[::1]): posição da câmera
+        - screen_center (double[::1]): centro da tela
+        - delta_h, delta_v (double[::1]): deslocamento de um pixel na horizontal e na vertical
+    """
+    height: Py_ssize_t = image.shape[0]
+    width: Py_ssize_t = image.shape[1]
+    count: Py_ssize_t = scene.shape[0]
+    center_i: double = (height - 1) / 2.0
+    center_j: double = (width - 1) / 2.0
+
+    i: Py_ssize_t
+    j: Py_ssize_t
+    k: Py_ssize_t
+    dx: double
+    dy: double
+    dz: double
+    mag: double
+    t: double
+    min_dist: double
+    nearest: Py_ssize_t
+
+    with cython.nogil:
+        for i in prange(height, schedule='dynamic'):
+            for j in range(width):
+                # Direção do raio pelo centro do pixel (i, j), normalizada
+                dx = screen_center[0] + delta_h[0] * (j - center_j) + delta_v[0] * (center_i - i) - origin[0]
+                dy = screen_center[1] + delta_h[1] * (j - center_j) + delta_v[1] * (center_i - i) - origin[1]
+                dz = screen_center[2] + delta_h[2] * (j - center_j) + delta_v[2] * (center_i - i) - origin[2]
+                mag = sqrt(dx * dx + dy * dy + dz * dz)
+                dx = dx / mag
+                dy = dy / mag
+                dz = dz / mag
+
+                min_dist = INF
+                nearest = -1
+                for k in range(count):
+                    if scene[k, 0] == SPHERE:
+                        t = sphere_hit(scene[k, 1], scene[k, 2], scene[k, 3], scene[k, 4],
+                                       origin[0], origin[1], origin[2], dx, dy, dz)
+                    else:
+                        t = plane_hit(scene[k, 1], scene[k, 2], scene[k, 3], scene[k, 4], scene[k, 5], scene[k, 6],
+                                      origin[0], origin[1], origin[2], dx, dy, dz)
+                    if t < min_dist:
+                        min_dist = t
+                        nearest = k
+
+                if nearest >= 0:
+                    image[i, j, 0] = scene[nearest, 7]
+                    image[i, j, 1] = scene[nearest, 8]
+                    image[i, j, 2] = scene[nearest, 9]
+                else:
+                    image[i, j, 0] = 0
+                    image[i, j, 1] = 0
+                    image[i, j, 2] = 0
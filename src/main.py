@@ -4,7 +4,7 @@ from cython_classes.primitives import *
 # Divirtam-se :)
 
 def main():
-    obj = ObjReader('../inputs/icosahedron.obj')
+    obj = ObjReader('../inputs/icosahedron.obj', cache=True)
     obj.print_faces()
     a = Point3(2, 1, 0)
     b = Point3(-1, 0, 1)
@@ -0,0 +1,145 @@
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+
+'''
+    Cache binário dos arquivos .obj/.mtl já lidos.
+
+    O cache fica ao lado do arquivo .obj (mesmo nome, com a extensão .rtcache) e tem o formato:
+        - MAGIC (4 bytes)
+        - tamanho do cabeçalho (uint64, little-endian)
+        - cabeçalho JSON: chave de validade, materiais e a posição de cada array
+        - arrays brutos, cada um alinhado em ALIGNMENT bytes
+
+    A chave de validade guarda caminho, tamanho e mtime do .obj e do .mtl, além de FORMAT_VERSION; se
+    qualquer um mudar, o cache é descartado e o .obj é lido novamente. Na leitura o arquivo é mapeado
+    com mmap, então os arrays não são copiados e vários processos compartilham as mesmas páginas.
+'''
+
+MAGIC = b'RTOC'
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+SUFFIX = '.rtcache'
+
+# Arrays do ObjReader guardados no cache
+ARRAYS = ('vertex_array', 'normal_array', 'face_vertex_indices', 'face_normal_indices', 'face_material_ids')
+
+
+def cache_path(file_path):
+    '''
+        Caminho do cache correspondente ao arquivo .obj.
+    '''
+    return file_path + SUFFIX
+
+
+def file_key(file_path):
+    '''
+        Chave de validade de um arquivo: caminho absoluto, tamanho e mtime.
+    '''
+    stat = os.stat(file_path)
+    return {'path': os.path.abspath(file_path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def material_to_dict(material):
+    return {
+        'ka': [material.ka.x, material.ka.y, material.ka.z],
+        'kd': [material.kd.x, material.kd.y, material.kd.z],
+        'ks': [material.ks.x, material.ks.y, material.ks.z],
+        'ke': [material.ke.x, material.ke.y, material.ke.z],
+        'ns': material.ns,
+        'ni': material.ni,
+        'd': material.d,
+    }
+
+
+def save(reader):
+    '''
+        Grava o cache do ObjReader já carregado. A escrita é feita num arquivo temporário e depois
+        renomeada, para que leitores concorrentes nunca vejam um cache pela metade.
+        Retorna False se não foi possível gravar (por exemplo, diretório sem permissão de escrita).
+    '''
+    header = {
+        'version': FORMAT_VERSION,
+        'dtype': reader.dtype.str,
+        'obj': file_key(reader.file_path),
+        'mtl': file_key(reader.mtl_path) if reader.mtl_path else None,
+        'materials': {name: material_to_dict(material) for name, material in reader.colormap.materials.items()}
+                     if reader.colormap else None,
+        'cur_material': reader.cur_material_name,
+        'arrays': {},
+    }
+
+    arrays = [np.ascontiguousarray(getattr(reader, name)) for name in ARRAYS]
+
+    # Primeiro calcula as posições com um cabeçalho provisório, depois fixa o tamanho real
+    header_size = 0
+    while True:
+        offset = len(MAGIC) + 8 + header_size
+        for name, data in zip(ARRAYS, arrays):
+            offset += -offset % ALIGNMENT
+            header['arrays'][name] = {'dtype': data.dtype.str, 'shape': data.shape, 'offset': offset}
+            offset += data.nbytes
+        encoded = json.dumps(header).encode('utf-8')
+        if len(encoded) <= header_size:
+            break
+        header_size = len(encoded) + 64
+
+    path = cache_path(reader.file_path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(struct.pack('<Q', header_size))
+            file.write(encoded.ljust(header_size, b' '))
+            for name, data in zip(ARRAYS, arrays):
+                file.seek(header['arrays'][name]['offset'])
+                file.write(data.tobytes())
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
+
+
+def load(file_path, dtype):
+    '''
+        Carrega o cache do arquivo .obj, se existir e ainda for válido.
+        Retorna (cabeçalho, dicionário de arrays mapeados em memória) ou None.
+    '''
+    path = cache_path(file_path)
+    try:
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                return None
+            header_size, = struct.unpack('<Q', file.read(8))
+            header = json.loads(file.read(header_size))
+            if not is_valid(header, file_path, dtype):
+                return None
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    arrays = {}
+    for name in ARRAYS:
+        info = header['arrays'][name]
+        dt = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        arrays[name] = np.frombuffer(buffer, dtype=dt, count=int(np.prod(shape)), offset=info['offset']).reshape(shape)
+    return header, arrays
+
+
+def is_valid(header, file_path, dtype):
+    '''
+        Verifica se o cabeçalho corresponde à versão do formato e aos arquivos atuais.
+    '''
+    if header.get('version') != FORMAT_VERSION or header.get('dtype') != np.dtype(dtype).str:
+        return False
+    if header['obj'] != file_key(file_path):
+        return False
+    mtl = header.get('mtl')
+    return mtl is None or (os.path.exists(mtl['path']) and mtl == file_key(mtl['path']))
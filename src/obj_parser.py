@@ -0,0 +1,159 @@
+import mmap
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+
+'''
+    Leitura em paralelo de arquivos .obj grandes.
+
+    O arquivo é mapeado em memória e dividido em pedaços de cerca de CHUNK_SIZE bytes, com as
+    fronteiras ajustadas para o fim de uma linha. Cada pedaço é lido por um processo trabalhador,
+    que devolve as linhas v, vn e f já convertidas em arrays, além dos eventos mtllib/usemtl com a
+    posição (em faces) em que ocorrem. Os arrays dos pedaços são concatenados na ordem do arquivo
+    e os eventos de material são resolvidos no fim, na mesma ordem da leitura linha a linha.
+
+    As linhas são convertidas em lote (todas as coordenadas de um pedaço de uma vez), e cada
+    token de face é dividido uma única vez.
+'''
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def chunk_bounds(file_path, chunk_size=CHUNK_SIZE):
+    '''
+        Divide o arquivo em intervalos [início, fim) de bytes que terminam em fim de linha.
+    '''
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+
+    bounds = []
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start = 0
+        while start < size:
+            end = data.find(b'\n', min(start + chunk_size, size) - 1)
+            end = size if end < 0 else end + 1
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def from_text(text, dtype):
+    '''
+        Converte um texto de números separados por espaços num array, ou None se houver algo que
+        não seja número.
+    '''
+    try:
+        return np.fromstring(text, dtype=dtype, sep=' ')
+    except ValueError:
+        return None
+
+
+def parse_floats(lines, skip):
+    '''
+        Converte as 3 primeiras coordenadas de cada linha (sem os skip primeiros bytes) num array (N, 3).
+    '''
+    if not lines:
+        return np.zeros((0, 3))
+
+    text = b' '.join(line[skip:] for line in lines)
+    values = from_text(text, np.float64)
+    if values is not None and len(values) == 3 * len(lines):
+        return values.reshape(-1, 3)
+
+    # Linhas com mais de 3 valores (por exemplo, o w opcional de v): lidas uma a uma
+    return np.array([line[skip:].split()[:3] for line in lines], dtype=np.float64)
+
+
+def parse_faces(lines):
+    '''
+        Converte as linhas de face num par de arrays int32 (F, 3): índices dos vértices e das
+        normais (-1 se ausente), ambos a partir de 0.
+    '''
+    # Verificação rápida de que as faces têm 3 tokens (separados por um espaço); se houver espaços
+    # extras, a contagem é feita pela divisão da linha
+    if not all(line.count(b' ') == 3 for line in lines):
+        if any(len(line.split()) != 4 for line in lines):
+            raise ValueError("Apenas faces triangulares são suportadas.")
+
+    count = 3 * len(lines)
+    text = b' '.join(line[2:] for line in lines)
+
+    # Formatos uniformes mais comuns (só v, ou v/vt/vn e v//vn em todas as faces): convertidos em lote
+    if b'/' not in text:
+        vertices = from_text(text, np.int64)
+        if vertices is not None and len(vertices) == count:
+            return (vertices - 1).astype(np.int32).reshape(-1, 3), np.full((len(lines), 3), -1, dtype=np.int32)
+    elif text.count(b'/') == 2 * count:
+        values = from_text(text.replace(b'//', b'/0/').replace(b'/', b' '), np.int64)
+        if values is not None and len(values) == 3 * count:
+            values = (values - 1).astype(np.int32).reshape(-1, 3)
+            return values[:, 0].reshape(-1, 3).copy(), values[:, 2].reshape(-1, 3).copy()
+
+    # Caso geral: cada token (v, v/vt, v//vn ou v/vt/vn) é dividido uma única vez
+    fields = [token.split(b'/') for token in text.split()]
+    vertices = np.array([int(field[0]) for field in fields], dtype=np.int32) - 1
+    normals = np.array([int(field[2]) - 1 if len(field) > 2 and field[2] else -1 for field in fields], dtype=np.int32)
+    return vertices.reshape(-1, 3), normals.reshape(-1, 3)
+
+
+def parse_chunk(file_path, start, end):
+    '''
+        Lê as linhas do intervalo [start, end) do arquivo.
+        Retorna (vértices, normais, índices dos vértices, índices das normais, eventos), onde os
+        eventos são tuplas (face, 'mtllib' ou 'usemtl', nome), com face contada a partir do
+        início do pedaço.
+    '''
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        lines = data[start:end].splitlines()
+
+    vertex_lines, normal_lines, face_lines, events = [], [], [], []
+    for line in lines:
+        kind = line[:2]
+        if kind == b'v ':
+            vertex_lines.append(line)
+        elif kind == b'vn' and line[2:3] == b' ':
+            normal_lines.append(line)
+        elif kind == b'f ':
+            face_lines.append(line)
+        elif line.startswith(b'mtllib ') or line.startswith(b'usemtl '):
+            events.append((len(face_lines), line[:6].decode(), line.split()[1].decode()))
+
+    face_vertices, face_normals = parse_faces(face_lines)
+    return parse_floats(vertex_lines, 2), parse_floats(normal_lines, 3), face_vertices, face_normals, events
+
+
+def _parse_chunk(bounds):
+    return parse_chunk(*bounds)
+
+
+def parse(file_path, workers=None, chunk_size=CHUNK_SIZE):
+    '''
+        Lê o arquivo .obj em pedaços, em paralelo.
+        workers: número de processos (padrão: número de núcleos); com 1 processo, ou com um só
+                 pedaço, a leitura é feita no próprio processo
+        Retorna (vértices (V, 3), normais (N, 3), índices dos vértices (F, 3), índices das
+        normais (F, 3), eventos), com os eventos de material na ordem do arquivo e a posição
+        contada em faces desde o início do arquivo.
+    '''
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("O número de processos deve ser positivo.")
+
+    tasks = [(file_path, start, end) for start, end in chunk_bounds(file_path, chunk_size)]
+    if workers == 1 or len(tasks) <= 1:
+        chunks = [_parse_chunk(task) for task in tasks]
+    else:
+        with Pool(min(workers, len(tasks))) as pool:
+            chunks = pool.map(_parse_chunk, tasks)
+
+    events, face_offset = [], 0
+    for _, _, face_vertices, _, chunk_events in chunks:
+        events.extend((face_offset + face, kind, name) for face, kind, name in chunk_events)
+        face_offset += len(face_vertices)
+
+    concat = lambda k, shape, dtype: np.concatenate([c[k] for c in chunks]) if chunks else np.zeros(shape, dtype)
+    return (concat(0, (0, 3), np.float64), concat(1, (0, 3), np.float64),
+            concat(2, (0, 3), np.int32), concat(3, (0, 3), np.int32), events)
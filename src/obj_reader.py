@@ -1,18 +1,106 @@
 from python.primitives import Point3, Vector3
-from color_map import Colormap
+from color_map import Colormap, Material
+import obj_cache
+import obj_parser
+from array import array
+from collections.abc import Sequence
+import numpy as np
 import os
 
 class Face:
-    def __init__(self):
+    '''
+        Face triangular. As propriedades do material (ka, kd, ks, ke, ns, ni, d) não são copiadas para cada
+        face: a face guarda apenas o índice do material na tabela compartilhada (MaterialTable).
+    '''
+    __slots__ = ('vertice_indices', 'normal_indices', 'material_id', 'material_table')
+
+    DEFAULT_MATERIAL = Material()
+
+    def __init__(self, material_table=None, material_id=-1):
         self.vertice_indices = [0, 0, 0]
         self.normal_indices = [0, 0, 0]
-        self.ka = Vector3(0, 0, 0)
-        self.kd = Vector3(0, 0, 0)
-        self.ks = Vector3(0, 0, 0)
-        self.ke = Vector3(0, 0, 0)
-        self.ns = 0
-        self.ni = 0
-        self.d = 0
+        self.material_table = material_table
+        self.material_id = material_id
+
+    @property
+    def material(self):
+        if self.material_table is None or self.material_id < 0:
+            return Face.DEFAULT_MATERIAL
+        return self.material_table.materials[self.material_id]
+
+    @property
+    def ka(self):
+        return self.material.ka
+
+    @property
+    def kd(self):
+        return self.material.kd
+
+    @property
+    def ks(self):
+        return self.material.ks
+
+    @property
+    def ke(self):
+        return self.material.ke
+
+    @property
+    def ns(self):
+        return self.material.ns
+
+    @property
+    def ni(self):
+        return self.material.ni
+
+    @property
+    def d(self):
+        return self.material.d
+
+class VertexView(Sequence):
+    '''
+        Visão preguiçosa de um array (N, 3) de coordenadas: cada item vira um Point3 apenas quando acessado.
+    '''
+    def __init__(self, coordinates):
+        self._coordinates = coordinates
+
+    def __len__(self):
+        return len(self._coordinates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Point3(*self._coordinates[index].tolist())
+
+class FaceView(Sequence):
+    '''
+        Visão preguiçosa das faces: cada item vira um Face apenas quando acessado.
+    '''
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __len__(self):
+        return len(self._reader.face_vertex_indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._reader.make_face(index)
+
+class FacePoint3sView(Sequence):
+    '''
+        Visão preguiçosa dos pontos de cada face: cada item vira uma lista de Point3 apenas quando acessado.
+    '''
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __len__(self):
+        return len(self._reader.face_vertex_indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        vertices = self._reader.vertex_array
+        return [Point3(*vertices[i].tolist()) for i in self._reader.face_vertex_indices[index]]
 
 class ObjReader:
     '''
@@ -35,56 +123,172 @@ class ObjReader:
             -  As texturas também são ignoradas.
 
         Caso sintam necessidade, podem editar a classe para obter mais informações.
+
+        Os dados lidos ficam em arrays contíguos (estrutura de arrays):
+            - vertex_array: coordenadas dos pontos, (V, 3)
+            - normal_array: coordenadas das normais, (N, 3)
+            - face_vertex_indices: índices dos pontos de cada face, int32 (F, 3)
+            - face_normal_indices: índices das normais de cada face, int32 (F, 3), -1 se ausente
+            - face_material_ids: índice do material de cada face em material_table, int32 (F,), -1 se ausente
+
+        As propriedades dos materiais ficam numa tabela compartilhada (get_material_table), com arrays
+        empacotados que podem ser indexados diretamente por face_material_ids.
+
+        No modo compacto (compact=True), vertices, faces e faces_point3s são visões preguiçosas sobre esses
+        arrays, criando os objetos Point3 e Face só quando acessados; assim a memória fica proporcional aos
+        dados brutos. O parâmetro dtype escolhe a precisão das coordenadas (np.float64 ou np.float32).
+
+        Com cache=True, os arrays lidos são gravados num cache binário ao lado do arquivo (ver obj_cache);
+        nas próximas leituras o cache é mapeado em memória em vez de o texto ser lido novamente.
+
+        Com workers, o texto é lido em pedaços por vários processos (ver obj_parser), o que acelera a
+        leitura de arquivos muito grandes; workers=0 usa todos os núcleos.
     '''
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, compact=False, dtype=np.float64, cache=False, workers=None):
         self.file_path = file_path
+        self.compact = compact
+        self.dtype = np.dtype(dtype)
         self.vertices = []
         self.normals = []
         self.faces = []
         self.faces_point3s = []
         self.cur_material = None
         self.colormap = None
-        self.read_file(file_path)
+        self.mtl_path = None
+        self.cur_material_name = None
+        self.material_table = None
+
+        if not (cache and self.load_cache()):
+            if workers is None:
+                self.read_file(file_path)
+            else:
+                self.read_file_parallel(file_path, workers)
+            if cache:
+                obj_cache.save(self)
+
+        self.build_views()
+
+    def load_cache(self):
+        '''
+            Carrega os dados do cache binário, se ele existir e ainda for válido.
+            Retorna True em caso de sucesso.
+        '''
+        cached = obj_cache.load(self.file_path, self.dtype)
+        if cached is None:
+            return False
+
+        header, arrays = cached
+        for name, data in arrays.items():
+            setattr(self, name, data)
+
+        if header['materials'] is not None:
+            self.colormap = Colormap.from_dict(header['materials'])
+            self.material_table = self.colormap.get_material_table()
+            self.mtl_path = header['mtl']['path'] if header['mtl'] else None
+        self.cur_material_name = header['cur_material']
+        if self.cur_material_name is not None:
+            self.cur_material = self.colormap.get_material(self.cur_material_name)
+        return True
 
     def read_file(self, file_path):
         base_dir = os.path.dirname(file_path)
+        vertices = array('d')
+        normals = array('d')
+        face_vertices = array('i')
+        face_normals = array('i')
+        face_materials = array('i')
+        material_id = -1
+
         with open(file_path, 'r') as file:
             for line in file:
 
                 if line.startswith('mtllib '):
                     file_name = line.split()[1]
-                    mtl_path = os.path.join(base_dir, file_name)
-                    self.colormap = Colormap(mtl_path)
+                    self.mtl_path = os.path.join(base_dir, file_name)
+                    self.colormap = Colormap(self.mtl_path)
+                    self.material_table = self.colormap.get_material_table()
 
                 elif line.startswith('usemtl '):
                     material_name = line.split()[1]
                     self.cur_material = self.colormap.get_material(material_name)
+                    self.cur_material_name = material_name
+                    material_id = self.material_table.get_id(material_name)
 
                 elif line.startswith('v '):
-                    self.vertices.append(Point3(*map(float, line[2:].split())))
+                    vertices.extend(map(float, line[2:].split()[:3]))
 
                 elif line.startswith('vn '):
-                    pass
+                    normals.extend(map(float, line[3:].split()[:3]))
 
                 elif line.startswith('f '):
-                    face = Face()
-                    face.vertice_indices = list(map(lambda x: int(x.split('/')[0]) - 1, line[2:].split()))
-                    face.normal_indices = list(map(lambda x: int(x.split('/')[2]) - 1, line[2:].split()))
-                    face.ka = self.cur_material.ka
-                    face.kd = self.cur_material.kd
-                    face.ks = self.cur_material.ks
-                    face.ke = self.cur_material.ke
-                    face.ns = self.cur_material.ns
-                    face.ni = self.cur_material.ni
-                    face.d = self.cur_material.d
-                    self.faces.append(face)
-
-            for face in self.faces:
-                face_point3s = []
-                for vertice_index in face.vertice_indices:
-                    face_point3s.append(self.vertices[vertice_index])
-                self.faces_point3s.append(face_point3s)
+                    tokens = [token.split('/') for token in line[2:].split()]
+                    if len(tokens) != 3:
+                        raise ValueError("Apenas faces triangulares são suportadas.")
+                    face_vertices.extend(int(token[0]) - 1 for token in tokens)
+                    face_normals.extend(int(token[2]) - 1 if len(token) > 2 and token[2] else -1 for token in tokens)
+                    face_materials.append(material_id)
+
+        self.vertex_array = np.frombuffer(vertices, dtype=np.float64).reshape(-1, 3).astype(self.dtype)
+        self.normal_array = np.frombuffer(normals, dtype=np.float64).reshape(-1, 3).astype(self.dtype)
+        self.face_vertex_indices = np.frombuffer(face_vertices, dtype=np.int32).reshape(-1, 3).copy()
+        self.face_normal_indices = np.frombuffer(face_normals, dtype=np.int32).reshape(-1, 3).copy()
+        self.face_material_ids = np.frombuffer(face_materials, dtype=np.int32).copy()
+
+    def read_file_parallel(self, file_path, workers=0):
+        '''
+            Lê o arquivo com obj_parser, em paralelo, e resolve os materiais com o Colormap na ordem
+            do arquivo. O resultado é o mesmo de read_file.
+        '''
+        base_dir = os.path.dirname(file_path)
+        vertices, normals, face_vertices, face_normals, events = obj_parser.parse(file_path, workers or None)
+
+        # Face a partir da qual cada usemtl vale e o índice do material correspondente
+        positions, material_ids = [], []
+        for face, kind, name in events:
+            if kind == 'mtllib':
+                self.mtl_path = os.path.join(base_dir, name)
+                self.colormap = Colormap(self.mtl_path)
+                self.material_table = self.colormap.get_material_table()
+            else:
+                self.cur_material = self.colormap.get_material(name)
+                self.cur_material_name = name
+                positions.append(face)
+                material_ids.append(self.material_table.get_id(name))
+
+        material_ids = np.array([-1] + material_ids, dtype=np.int32)
+        active = np.searchsorted(np.array(positions, dtype=np.int64), np.arange(len(face_vertices)), side='right')
+
+        self.vertex_array = vertices.astype(self.dtype)
+        self.normal_array = normals.astype(self.dtype)
+        self.face_vertex_indices = face_vertices
+        self.face_normal_indices = face_normals
+        self.face_material_ids = material_ids[active]
+
+    def build_views(self):
+        '''
+            Cria as listas (ou, no modo compacto, as visões preguiçosas) de vértices, normais e faces
+            a partir dos arrays.
+        '''
+        self.vertices = VertexView(self.vertex_array)
+        self.normals = VertexView(self.normal_array)
+        self.faces = FaceView(self)
+        self.faces_point3s = FacePoint3sView(self)
+
+        if not self.compact:
+            self.vertices = list(self.vertices)
+            self.normals = list(self.normals)
+            self.faces = list(self.faces)
+            self.faces_point3s = [[self.vertices[i] for i in face.vertice_indices] for face in self.faces]
+
+    def make_face(self, index):
+        '''
+            Cria o objeto Face da face de índice index a partir dos arrays.
+        '''
+        face = Face(self.material_table, int(self.face_material_ids[index]))
+        face.vertice_indices = self.face_vertex_indices[index].tolist()
+        face.normal_indices = self.face_normal_indices[index].tolist()
+        return face
 
     def get_faces_point3s(self):
         ''' 
@@ -104,6 +308,12 @@ class ObjReader:
         '''
         return self.faces
 
+    def get_material_table(self):
+        '''
+            Retorna a tabela de materiais compartilhada pelas faces (ou None se o objeto não tem .mtl).
+        '''
+        return self.material_table
+
     def get_kd(self):
         '''
             Retorna a cor difusa do objeto.
@@ -154,6 +364,18 @@ class ObjReader:
         '''
         return self.vertices
 
+    def get_vertex_array(self):
+        '''
+            Retorna o array (V, 3) com as coordenadas dos vértices.
+        '''
+        return self.vertex_array
+
+    def get_face_indices(self):
+        '''
+            Retorna o array (F, 3) com os índices dos vértices de cada face.
+        '''
+        return self.face_vertex_indices
+
     def print_faces_point3s(self):
         for(enum, face) in enumerate(self.faces_point3s):
             print(f"Face {enum}:")
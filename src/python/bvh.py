@@ -0,0 +1,297 @@
+import numpy as np
+
+
+# Parâmetros da construção por SAH com bins
+SAH_BINS = 12
+MAX_LEAF_SIZE = 4
+TRAVERSAL_COST = 1.0
+INTERSECTION_COST = 1.0
+
+# Evita divisões por zero no teste de slab; 1 / TINY ainda é finito
+TINY = 1e-30
+
+
+def box_area(lo, hi):
+    """
+    Área da superfície de caixas alinhadas aos eixos.
+    lo, hi: arrays (..., 3) com os cantos mínimo e máximo
+    """
+    extent = np.maximum(hi - lo, 0.0)
+    return 2 * (extent[..., 0] * extent[..., 1] + extent[..., 1] * extent[..., 2] + extent[..., 2] * extent[..., 0])
+
+
+def inverse_directions(directions):
+    """
+    Inverso componente a componente das direções, sem divisões por zero.
+    """
+    return 1 / np.where(directions == 0, TINY, directions)
+
+
+class BVH:
+    """
+    Hierarquia de volumes envolventes (BVH) sobre primitivas com caixas
+    alinhadas aos eixos, construída por SAH com bins.
+
+    Os nós ficam em arrays planos; uma folha referencia o intervalo
+    [start, start + count) de `order`, que guarda os índices das primitivas.
+
+    Atributos:
+        - lo, hi (array (N, 3)): caixa envolvente de cada nó
+        - left, right (array (N,)): filhos de cada nó (-1 nas folhas)
+        - axis (array (N,)): eixo da divisão do nó, usado na ordem de travessia
+        - start, count (array (N,)): intervalo das primitivas de cada folha
+        - order (array (P,)): índices das primitivas, agrupados por folha
+    """
+    def __init__(self, prim_lo, prim_hi, bins=SAH_BINS, max_leaf_size=MAX_LEAF_SIZE):
+        prim_lo = np.asarray(prim_lo, dtype=float)
+        prim_hi = np.asarray(prim_hi, dtype=float)
+        if len(prim_lo) == 0:
+            raise ValueError("A BVH precisa de pelo menos uma primitiva.")
+
+        centroids = (prim_lo + prim_hi) / 2
+
+        lo, hi, left, right, axis, start, count = [], [], [], [], [], [], []
+        order = []
+
+        # Pilha de (índice do nó, índices das primitivas)
+        root = self._new_node(lo, hi, left, right, axis, start, count)
+        stack = [(root, np.arange(len(prim_lo)))]
+
+        while stack:
+            node, prims = stack.pop()
+            node_lo = prim_lo[prims].min(axis=0)
+            node_hi = prim_hi[prims].max(axis=0)
+            lo[node], hi[node] = node_lo, node_hi
+
+            split = self._find_split(prims, centroids, prim_lo, prim_hi, node_lo, node_hi, bins, max_leaf_size)
+
+            if split is None:
+                start[node] = len(order)
+                count[node] = len(prims)
+                order.extend(prims.tolist())
+                continue
+
+            split_axis, left_prims, right_prims = split
+            axis[node] = split_axis
+            left[node] = self._new_node(lo, hi, left, right, axis, start, count)
+            right[node] = self._new_node(lo, hi, left, right, axis, start, count)
+            stack.append((right[node], right_prims))
+            stack.append((left[node], left_prims))
+
+        self.lo = np.array(lo)
+        self.hi = np.array(hi)
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        self.axis = np.array(axis, dtype=np.int64)
+        self.start = np.array(start, dtype=np.int64)
+        self.count = np.array(count, dtype=np.int64)
+        self.order = np.array(order, dtype=np.int64)
+
+        # Cópias em listas Python para a travessia escalar, que é mais rápida sem numpy
+        self._nodes = list(zip(self.lo.tolist(), self.hi.tolist(), self.left.tolist(), self.right.tolist(),
+                               self.axis.tolist(), self.start.tolist(), self.count.tolist()))
+        self._order = self.order.tolist()
+
+    def __len__(self):
+        return len(self.left)
+
+    @staticmethod
+    def _new_node(lo, hi, left, right, axis, start, count):
+        lo.append(None)
+        hi.append(None)
+        left.append(-1)
+        right.append(-1)
+        axis.append(0)
+        start.append(0)
+        count.append(0)
+        return len(left) - 1
+
+    @staticmethod
+    def _find_split(prims, centroids, prim_lo, prim_hi, node_lo, node_hi, bins, max_leaf_size):
+        """
+        Procura a divisão de menor custo SAH entre os planos dos bins.
+        Retorna (eixo, primitivas à esquerda, primitivas à direita) ou None
+        se for melhor transformar o nó em folha.
+        """
+        n = len(prims)
+        if n <= 1:
+            return None
+
+        cents = centroids[prims]
+        cent_lo = cents.min(axis=0)
+        extent = cents.max(axis=0) - cent_lo
+
+        # Bin de cada primitiva nos três eixos de uma vez: linha = eixo
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(extent > 0, bins / extent, 0.0)
+        bin_ids = ((cents - cent_lo) * scale).astype(np.int64).T
+        np.minimum(bin_ids, bins - 1, out=bin_ids)
+
+        # Índices planos (eixo * bins + bin) para acumular as caixas dos três eixos juntas
+        flat_ids = (bin_ids + (np.arange(3) * bins)[:, None]).ravel()
+        bin_count = np.bincount(flat_ids, minlength=3 * bins).reshape(3, bins)
+        bin_lo = np.full((3 * bins, 3), np.inf)
+        bin_hi = np.full((3 * bins, 3), -np.inf)
+        np.minimum.at(bin_lo, flat_ids, np.tile(prim_lo[prims], (3, 1)))
+        np.maximum.at(bin_hi, flat_ids, np.tile(prim_hi[prims], (3, 1)))
+        bin_lo = bin_lo.reshape(3, bins, 3)
+        bin_hi = bin_hi.reshape(3, bins, 3)
+
+        # Caixas e contagens acumuladas da esquerda e da direita para cada plano
+        left_lo = np.minimum.accumulate(bin_lo, axis=1)[:, :-1]
+        left_hi = np.maximum.accumulate(bin_hi, axis=1)[:, :-1]
+        right_lo = np.minimum.accumulate(bin_lo[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        right_hi = np.maximum.accumulate(bin_hi[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        left_count = np.cumsum(bin_count, axis=1)[:, :-1]
+        right_count = n - left_count
+
+        parent_area = max(box_area(node_lo, node_hi), TINY)
+        cost = TRAVERSAL_COST + INTERSECTION_COST * (
+            box_area(left_lo, left_hi) * left_count + box_area(right_lo, right_hi) * right_count
+        ) / parent_area
+        valid = (left_count > 0) & (right_count > 0) & (extent > 0)[:, None]
+        cost = np.where(valid, cost, np.inf)
+
+        ax, plane = np.unravel_index(np.argmin(cost), cost.shape)
+
+        if not valid[ax, plane]:
+            # Centroides coincidentes: divide ao meio se a folha ficaria grande demais
+            if n <= max_leaf_size:
+                return None
+            half = n // 2
+            return 0, prims[:half], prims[half:]
+
+        if cost[ax, plane] >= INTERSECTION_COST * n and n <= max_leaf_size:
+            return None
+
+        goes_left = bin_ids[ax] <= plane
+        return int(ax), prims[goes_left], prims[~goes_left]
+
+    def traverse(self, origin, direction, intersect_leaf, max_t=float('inf'), any_hit=False):
+        """
+        Percorre a BVH com um único raio, da frente para trás, descartando os nós
+        cuja entrada está além da interseção mais próxima já encontrada.
+        origin, direction: tuplas (x, y, z)
+        intersect_leaf: função (índices das primitivas, best_t) -> (t, primitiva) ou None
+        max_t: distância máxima considerada
+        any_hit: para na primeira interseção encontrada antes de max_t, que não é
+                 necessariamente a mais próxima (raios de sombra)
+        Retorna (t, primitiva) da interseção mais próxima, ou None.
+        """
+        ox, oy, oz = origin
+        ix, iy, iz = (1 / (d if d != 0 else TINY) for d in direction)
+        nodes = self._nodes
+        order = self._order
+
+        best_t = max_t
+        best_prim = None
+
+        stack = [0]
+        while stack:
+            lo, hi, left, right, axis, start, count = nodes[stack.pop()]
+
+            entry = self._slab(lo, hi, ox, oy, oz, ix, iy, iz)
+            if entry is None or entry >= best_t:
+                continue
+
+            if left < 0:
+                hit = intersect_leaf(order[start:start + count], best_t)
+                if hit is not None:
+                    if any_hit:
+                        return hit
+                    best_t, best_prim = hit
+                continue
+
+            # Empilha o filho mais distante primeiro para visitar o mais próximo antes
+            if (ix, iy, iz)[axis] >= 0:
+                stack.append(right)
+                stack.append(left)
+            else:
+                stack.append(left)
+                stack.append(right)
+
+        return None if best_prim is None else (best_t, best_prim)
+
+    @staticmethod
+    def _slab(lo, hi, ox, oy, oz, ix, iy, iz):
+        """
+        Teste de slab raio-caixa. Retorna a distância de entrada ou None.
+        """
+        t1 = (lo[0] - ox) * ix
+        t2 = (hi[0] - ox) * ix
+        near, far = (t1, t2) if t1 < t2 else (t2, t1)
+
+        t1 = (lo[1] - oy) * iy
+        t2 = (hi[1] - oy) * iy
+        if t1 > t2:
+            t1, t2 = t2, t1
+        near = t1 if t1 > near else near
+        far = t2 if t2 < far else far
+
+        t1 = (lo[2] - oz) * iz
+        t2 = (hi[2] - oz) * iz
+        if t1 > t2:
+            t1, t2 = t2, t1
+        near = t1 if t1 > near else near
+        far = t2 if t2 < far else far
+
+        if near > far or far < 0:
+            return None
+        return near if near > 0 else 0.0
+
+    def traverse_many(self, origins, directions, intersect_leaf, max_t=None, any_hit=False):
+        """
+        Percorre a BVH com um lote de raios (travessia em pacote). Em cada nó,
+        só seguem os raios que atingem a caixa antes da interseção mais próxima
+        já encontrada por eles; os filhos são visitados da frente para trás
+        segundo a direção média do pacote.
+        origins: array (N, 3) ou (3,)
+        directions: array (N, 3)
+        intersect_leaf: função (índices dos raios, índices das primitivas, best_t dos raios)
+                        -> (t, primitiva) por raio, com inf onde não há interseção
+        max_t: array (N,) com a distância máxima de cada raio (padrão: inf)
+        any_hit: cada raio deixa a travessia na primeira interseção encontrada antes de
+                 max_t, que não é necessariamente a mais próxima (raios de sombra)
+        Retorna (t, primitiva) por raio, com t = inf e primitiva = -1 sem interseção.
+        """
+        n = len(directions)
+        origins = np.broadcast_to(np.asarray(origins, dtype=float), (n, 3))
+        inv = inverse_directions(directions)
+
+        best_t = np.full(n, np.inf) if max_t is None else np.array(max_t, dtype=float)
+        best_prim = np.full(n, -1, dtype=np.int64)
+
+        stack = [(0, np.arange(n))]
+        while stack:
+            node, rays = stack.pop()
+
+            t1 = (self.lo[node] - origins[rays]) * inv[rays]
+            t2 = (self.hi[node] - origins[rays]) * inv[rays]
+            near = np.minimum(t1, t2).max(axis=1)
+            far = np.maximum(t1, t2).min(axis=1)
+
+            keep = (near <= far) & (far >= 0) & (near < best_t[rays])
+            if any_hit:
+                keep &= best_prim[rays] < 0
+            rays = rays[keep]
+            if len(rays) == 0:
+                continue
+
+            if self.left[node] < 0:
+                start = self.start[node]
+                prims = self.order[start:start + self.count[node]]
+                t, prim = intersect_leaf(rays, prims, best_t[rays])
+                closer = t < best_t[rays]
+                best_t[rays[closer]] = t[closer]
+                best_prim[rays[closer]] = prim[closer]
+                continue
+
+            if directions[rays, self.axis[node]].sum() >= 0:
+                stack.append((self.right[node], rays))
+                stack.append((self.left[node], rays))
+            else:
+                stack.append((self.left[node], rays))
+                stack.append((self.right[node], rays))
+
+        best_t[best_prim < 0] = np.inf
+        return best_t, best_prim
@@ -1,5 +1,14 @@
+import numpy as np
+
 from primitives import *
 from shapes import Color, Intersectable
+from scene import compile_scene
+from framebuffer import FrameBuffer
+from hitbuffer import HitBuffer
+from lighting import shade
+from wavefront import MAX_DEPTH, trace_wavefront
+from parallel import draw_parallel, tiles
+from time import perf_counter
 
 
 class Camera:
@@ -22,14 +31,26 @@ class Camera:
         self.width_resolution = width_resolution
 
         # Vetores ortonormais
-        self.w = (self.position - self.target).normalize()
-        self.u = self.vector_up.cross(self.w).normalize()
-        self.v = self.w.cross(self.u).normalize()
+        self.w = (self.position - self.target).normalize_()
+        self.u = self.vector_up.cross(self.w).normalize_()
+        self.v = self.w.cross(self.u).normalize_()
 
         # Dimensões dos pixels
         self.pixel_size_h = 1 / width_resolution
         self.pixel_size_v = 1 / height_resolution
 
+        # Tabela de direções dos raios primários, calculada sob demanda (ver direction_table)
+        self._directions = None
+        self._directions_key = None
+        self._direction_rows = None
+
+    def __getstate__(self):
+        # A tabela de direções não é copiada (por exemplo, para os processos de draw_parallel):
+        # cada cópia a recalcula se precisar
+        state = self.__dict__.copy()
+        state.update(_directions=None, _directions_key=None, _direction_rows=None)
+        return state
+
     def __str__(self):
         return (
             "Camera:\n"
@@ -48,7 +69,7 @@ class Camera:
             raise ValueError("Índices do pixel fora do intervalo da resolução da tela.")
 
         # Centro da tela no espaço do mundo
-        screen_center = self.position - self.w * self.dist_screen
+        screen_center = self.position.madd(self.w, -self.dist_screen)
 
         # Vetor para o pixel na direção horizontal e vertical
         delta_h = self.u * (j - (self.width_resolution - 1) / 2) * self.pixel_size_h
@@ -56,27 +77,527 @@ class Camera:
 
         return screen_center + delta_h + delta_v
 
-    def draw(self, objects):
+    def draw(self, objects, stats=None, dtype='float32'):
+        """
+        Renderiza os objetos, pixel a pixel.
+        stats: RenderStats opcional; quando informado, o quadro é renderizado pelo laço
+               instrumentado, que conta raios, testes e interseções e mede cada etapa
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer.
+        """
+        if stats is not None:
+            return self._draw_instrumented(objects, stats, dtype)
+
+        image = FrameBuffer(self.width_resolution, self.height_resolution, dtype)
+
+        # Direções dos raios primários, reaproveitadas entre quadros
+        rows = self.direction_rows()
+
+        # Todos os raios primários partem da posição da câmera: os termos de cada objeto que só
+        # dependem da origem são calculados uma vez por quadro
+        scene = compile_scene(objects)
+        closest = scene.prepare(self.position)
+
+        # Cor de cada objeto; o índice -1 (nenhum objeto) cai no fundo, no fim da lista
+        colors = [(obj.color.r, obj.color.g, obj.color.b) for obj in scene] + [(Color.BLACK.r, Color.BLACK.g, Color.BLACK.b)]
+
+        if not scene.face_colored:
+            for i, row in enumerate(rows):
+                image.write(i, 0, [[colors[closest(direction)] for direction in row]])
+            return image
+
+        # Com materiais por face, a cor depende da face atingida, resolvida em lote por linha
+        origin = np.array([self.position.x, self.position.y, self.position.z])
+        table = self.direction_table()
+        for i, row in enumerate(rows):
+            hit_index = np.array([closest(direction) for direction in row])
+            image.write(i, 0, scene.colors(hit_index, scene.material_faces(origin, table[i], hit_index))[None])
+
+        return image
+
+    def _draw_instrumented(self, objects, stats, dtype):
+        """
+        Laço de draw com contadores e medição de tempo por etapa. Testa todos os objetos
+        em cada pixel (sem a grade de CompiledScene), para contar os testes de cada um.
+        """
         width = self.width_resolution
         height = self.height_resolution
+        stats.begin_frame(self, objects)
 
-        image = [[(0, 0, 0) for _ in range(width)] for _ in range(height)]
+        tests = [0] * len(objects)
+        hits = [0] * len(objects)
+        visible = [0] * len(objects)
+        ray_time = intersection_time = shading_time = 0.0
 
-        for i in range(height):
-            for j in range(width):
-                pixel_pos = self.calculate_point_screen(i, j)
-                direction = (pixel_pos - self.position).normalize()
+        image = FrameBuffer(width, height, dtype)
+        pixels = [[(0, 0, 0) for _ in range(width)] for _ in range(height)]
+        hit_index = np.full((height, width), -1, dtype=np.intp)
 
-                pixel_color: Color = Color.BLACK
+        start = perf_counter()
+        rows = self.direction_rows()
+        ray_time += perf_counter() - start
+
+        start = perf_counter()
+        prepared = [obj.prepare(self.position) for obj in objects]
+        intersection_time += perf_counter() - start
+
+        for i, row in enumerate(rows):
+            for j, direction in enumerate(row):
+                t1 = perf_counter()
+
+                nearest = None
                 min_dist = float('inf')
 
-                for obj in objects:
-                    distance = obj.intersects(self.position, direction)
+                for k, intersects in enumerate(prepared):
+                    distance = intersects(direction)
+                    tests[k] += 1
+
+                    if distance is not None:
+                        hits[k] += 1
+                        if distance < min_dist:
+                            min_dist = distance
+                            nearest = k
+                t2 = perf_counter()
+
+                if nearest is None:
+                    pixel_color = Color.BLACK
+                else:
+                    visible[nearest] += 1
+                    pixel_color = objects[nearest].color
+                    hit_index[i, j] = nearest
+                pixels[i][j] = (pixel_color.r, pixel_color.g, pixel_color.b)
+                t3 = perf_counter()
+
+                intersection_time += t2 - t1
+                shading_time += t3 - t2
+
+        # Com materiais por face, a cor depende da face atingida, resolvida em lote
+        start = perf_counter()
+        if any(obj.face_material_ids is not None for obj in objects):
+            scene = compile_scene(objects)
+            origin = np.array([self.position.x, self.position.y, self.position.z])
+            pixels = scene.colors(hit_index, scene.material_faces(origin, self.direction_table(), hit_index))
+        shading_time += perf_counter() - start
+
+        stats.rays = width * height
+        for k in range(len(objects)):
+            stats.record(k, tests[k], hits[k], visible[k])
+        stats.add_time('ray_generation', ray_time)
+        stats.add_time('intersection', intersection_time)
+        stats.add_time('shading', shading_time)
+
+        with stats.stage('framebuffer'):
+            image.write(0, 0, pixels)
+        stats.end_frame()
+
+        return image
+
+    def _direction_key(self):
+        """
+        Parâmetros de que dependem as direções dos raios primários.
+        """
+        return (self.u.x, self.u.y, self.u.z, self.v.x, self.v.y, self.v.z, self.w.x, self.w.y, self.w.z,
+                self.dist_screen, self.height_resolution, self.width_resolution)
+
+    def _compute_directions(self, row_start, row_end, col_start, col_end):
+        """
+        Direções normalizadas dos raios primários do bloco [row_start, row_end) x
+        [col_start, col_end), como array (linhas, colunas, 3).
+        A direção é o deslocamento do centro do pixel em relação à posição da câmera
+        (-w * dist_screen + delta_h + delta_v), que não depende da posição.
+        """
+        width = self.width_resolution
+        height = self.height_resolution
+
+        u = np.array([self.u.x, self.u.y, self.u.z])
+        v = np.array([self.v.x, self.v.y, self.v.z])
+        w = np.array([self.w.x, self.w.y, self.w.z])
+
+        # Deslocamentos por coluna (W, 3) e por linha (H, 3)
+        delta_h = u * (np.arange(col_start, col_end) - (width - 1) / 2)[:, None] * self.pixel_size_h
+        delta_v = v * ((height - 1) / 2 - np.arange(row_start, row_end))[:, None] * self.pixel_size_v
+
+        directions = (-w * self.dist_screen + delta_h[None, :, :]) + delta_v[:, None, :]
+
+        magnitude = np.sqrt(directions[..., 0] * directions[..., 0] + directions[..., 1] * directions[..., 1] + directions[..., 2] * directions[..., 2])
+        return directions / magnitude[..., None]
+
+    def direction_table(self):
+        """
+        Tabela (H, W, 3), somente leitura, com as direções normalizadas dos raios primários.
+        É calculada uma vez e reaproveitada entre quadros enquanto a base (u, v, w), dist_screen
+        e a resolução não mudam; mudar a posição da câmera não a invalida.
+        """
+        key = self._direction_key()
+        if self._directions_key != key:
+            directions = self._compute_directions(0, self.height_resolution, 0, self.width_resolution)
+            directions.flags.writeable = False
+            self._directions = directions
+            self._directions_key = key
+            self._direction_rows = None
+        return self._directions
+
+    def direction_rows(self):
+        """
+        A tabela de direction_table como lista de linhas de Vector3, usada pelo laço escalar de
+        draw. Os vetores são compartilhados entre quadros e não devem ser modificados.
+        """
+        table = self.direction_table()
+        if self._direction_rows is None:
+            self._direction_rows = [[Vector3(x, y, z) for x, y, z in row] for row in table.tolist()]
+        return self._direction_rows
+
+    def primary_directions(self, row_start=0, row_end=None, col_start=0, col_end=None):
+        """
+        Direções normalizadas dos raios primários.
+        Por padrão cobre a tela inteira; os intervalos [row_start, row_end) e
+        [col_start, col_end) restringem o resultado a um bloco (tile) da tela.
+        A tela inteira usa (e preenche) a tabela de direction_table; um bloco é recortado da
+        tabela se ela estiver válida, ou calculado só para o bloco, sem montar a tabela inteira.
+        Retorna um array (linhas*colunas, 3), em ordem de linhas.
+        """
+        height = self.height_resolution
+        width = self.width_resolution
+        row_end = height if row_end is None else row_end
+        col_end = width if col_end is None else col_end
+
+        if (row_start, row_end, col_start, col_end) == (0, height, 0, width) or self._directions_key == self._direction_key():
+            return self.direction_table()[row_start:row_end, col_start:col_end].reshape(-1, 3)
+        return self._compute_directions(row_start, row_end, col_start, col_end).reshape(-1, 3)
 
-                    if distance is not None and distance < min_dist:
-                        min_dist = distance
-                        pixel_color = obj.color
+    def subpixel_directions(self, rows, cols, samples):
+        """
+        Direções normalizadas de samples x samples raios distribuídos uniformemente dentro de
+        cada pixel (centros das células de uma grade regular sobre o pixel).
+        rows, cols: arrays (M,) com as linhas e colunas dos pixels
+        Retorna um array (M, samples * samples, 3).
+        """
+        u = np.array([self.u.x, self.u.y, self.u.z])
+        v = np.array([self.v.x, self.v.y, self.v.z])
+        w = np.array([self.w.x, self.w.y, self.w.z])
 
-                image[i][j] = (pixel_color.r, pixel_color.g, pixel_color.b)
+        # Deslocamentos dentro do pixel, em frações de pixel, em [-0.5, 0.5]
+        offsets = (np.arange(samples) + 0.5) / samples - 0.5
+        dy, dx = np.repeat(offsets, samples), np.tile(offsets, samples)
 
-        return image
\ No newline at end of file
+        x = (cols[:, None] + dx - (self.width_resolution - 1) / 2) * self.pixel_size_h
+        y = ((self.height_resolution - 1) / 2 - (rows[:, None] + dy)) * self.pixel_size_v
+        directions = -w * self.dist_screen + x[..., None] * u + y[..., None] * v
+        return directions / np.linalg.norm(directions, axis=-1, keepdims=True)
+
+    def trace(self, directions, objects, stats=None):
+        """
+        Intersecta um lote de raios primários com a cena e escolhe, por raio, o
+        objeto mais próximo.
+        directions: array (N, 3) de direções normalizadas
+        objects: lista de objetos ou CompiledScene (compilar a cena uma vez evita
+                 refazer o empacotamento a cada chamada)
+        stats: RenderStats opcional, que recebe os contadores por objeto
+        Retorna um array (N, 3) com as cores.
+        """
+        scene = compile_scene(objects)
+        _, hit_index = scene.intersect(self.position, directions, stats)
+        origin = np.array([self.position.x, self.position.y, self.position.z])
+        return scene.colors(hit_index, scene.material_faces(origin, directions, hit_index))
+
+    def draw_vectorized(self, objects, stats=None, dtype='float32'):
+        """
+        Versão vetorizada de draw: intersecta todos os raios primários com cada
+        objeto de uma vez e escolhe, por pixel, o objeto mais próximo.
+        stats: RenderStats opcional, preenchido com os contadores e tempos do quadro
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer.
+        """
+        if stats is None:
+            colors = self.trace(self.primary_directions(), objects)
+        else:
+            stats.begin_frame(self, objects)
+            with stats.stage('ray_generation'):
+                directions = self.primary_directions()
+            with stats.stage('intersection'):
+                colors = self.trace(directions, objects, stats)
+            stats.rays = len(directions)
+            stats.end_frame()
+
+        image = FrameBuffer(self.width_resolution, self.height_resolution, dtype)
+        image.write(0, 0, colors.reshape(self.height_resolution, self.width_resolution, 3))
+        return image
+
+    def draw_shaded(self, objects, lights, ambient=Color(0.1, 0.1, 0.1), dtype='float32'):
+        """
+        Renderiza com sombreamento de Blinn-Phong, luzes pontuais e sombras (ver lighting.shade).
+        Os objetos usam o próprio material (ka, kd, ks, ns; nas malhas lidas com Mesh.from_obj,
+        o material do .mtl de cada face) ou, sem material, um material fosco com a sua cor.
+        lights: lista de PointLight
+        ambient: cor da luz ambiente
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer.
+        """
+        scene = compile_scene(objects)
+        directions = self.primary_directions()
+        t, object_ids = scene.intersect(self.position, directions)
+
+        origin = np.array([self.position.x, self.position.y, self.position.z])
+        face_ids, normals = scene.surface(origin, directions, t, object_ids)
+        colors = shade(scene, origin, directions, t, object_ids, face_ids, normals, lights, ambient)
+
+        image = FrameBuffer(self.width_resolution, self.height_resolution, dtype)
+        image.write(0, 0, colors.reshape(self.height_resolution, self.width_resolution, 3))
+        return image
+
+    def draw_traced(self, objects, lights, ambient=Color(0.1, 0.1, 0.1), max_depth=MAX_DEPTH, dtype='float32'):
+        """
+        Renderiza com sombreamento de Blinn-Phong e raios secundários de reflexão (ks) e refração
+        (ni, d), traçados em frentes de onda: cada geração de raios é intersectada em lote (ver
+        wavefront.trace_wavefront).
+        lights: lista de PointLight
+        ambient: cor da luz ambiente
+        max_depth: número máximo de reflexões/refrações seguidas
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer.
+        """
+        colors = trace_wavefront(compile_scene(objects), self.position, self.primary_directions(), lights, ambient, max_depth)
+
+        image = FrameBuffer(self.width_resolution, self.height_resolution, dtype)
+        image.write(0, 0, colors.reshape(self.height_resolution, self.width_resolution, 3))
+        return image
+
+    def trace_hits(self, objects, normals=False, path=None):
+        """
+        Traça os raios primários e guarda, por pixel, o objeto, a face e a distância da
+        interseção mais próxima (e, com normals, a normal no ponto), sem calcular cores.
+        objects: lista de objetos ou CompiledScene
+        path: arquivo .npy opcional onde o buffer fica mapeado em memória
+        Retorna um HitBuffer, que pode ser colorido com reshade.
+        """
+        scene = compile_scene(objects)
+        directions = self.primary_directions()
+        t, object_ids = scene.intersect(self.position, directions)
+
+        origin = np.array([self.position.x, self.position.y, self.position.z])
+        face_ids, hit_normals = scene.surface(origin, directions, t, object_ids, normals)
+
+        hits = HitBuffer(self.width_resolution, self.height_resolution, normals, path)
+        hits.write(object_ids, face_ids, t, hit_normals)
+        return hits
+
+    def reshade(self, hits, objects, dtype='float32'):
+        """
+        Refaz a imagem a partir de um buffer de trace_hits, sem traçar raios: cada pixel recebe a
+        cor atual do objeto que atingiu ou, nas malhas com materiais por face, o kd atual do
+        material da face (lido da MaterialTable, atualizada na compilação da cena). Vale
+        enquanto a geometria, a ordem dos objetos e a câmera forem as mesmas da chamada de
+        trace_hits; só a aparência pode mudar.
+        hits: HitBuffer
+        objects: lista de objetos ou CompiledScene
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer, igual à de draw para a mesma cena.
+        """
+        if (hits.width, hits.height) != (self.width_resolution, self.height_resolution):
+            raise ValueError("O buffer de interseções não tem a resolução da câmera.")
+
+        object_ids = hits.object_ids
+        if len(objects) <= object_ids.max(initial=-1):
+            raise ValueError("O buffer de interseções referencia objetos que não estão na cena.")
+
+        scene = compile_scene(objects)
+        image = FrameBuffer(self.width_resolution, self.height_resolution, dtype)
+        image.write(0, 0, scene.colors(object_ids, hits.face_ids))
+        return image
+
+    def draw_antialiased(self, objects, samples=4, threshold=0.1, dtype='float32'):
+        """
+        Renderiza com superamostragem adaptativa: primeiro um raio por pixel, guardando o
+        objeto e a face atingidos; depois samples x samples raios só nos pixels em que algum dos
+        8 vizinhos (incluindo as diagonais) atingiu outro objeto ou outra face, ou tem cor
+        diferente em mais de threshold em algum canal. Os demais pixels mantêm a cor do raio
+        central.
+        É uma heurística: uma borda só é detectada se os raios centrais de dois pixels vizinhos
+        a separam, e detalhes menores que um pixel (objetos finos, cantos que não atingem o
+        centro de nenhum pixel) podem ficar sem refinamento e diferir da superamostragem de
+        todos os pixels.
+        samples: raios por eixo nos pixels refinados (4 equivale a 16 amostras por pixel)
+        threshold: diferença de cor que dispara o refinamento
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer.
+        """
+        if samples < 1:
+            raise ValueError("O número de amostras por eixo deve ser positivo.")
+
+        height, width = self.height_resolution, self.width_resolution
+        scene = compile_scene(objects)
+
+        origin = np.array([self.position.x, self.position.y, self.position.z])
+        directions = self.primary_directions()
+        t, hit_index = scene.intersect(self.position, directions)
+        face_ids, _ = scene.surface(origin, directions, t, hit_index, normals=False)
+        hit_index, face_ids = hit_index.reshape(height, width), face_ids.reshape(height, width)
+        image = scene.colors(hit_index, face_ids)
+
+        # Pixels com descontinuidade em relação a um vizinho (abaixo, à direita e nas duas
+        # diagonais; as demais direções são as mesmas vistas do outro pixel). Os dois lados da
+        # borda são refinados
+        refine = np.zeros((height, width), dtype=bool)
+        for dr, dc in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            first = (slice(0, height - dr), slice(max(-dc, 0), width - max(dc, 0)))
+            second = (slice(dr, height), slice(max(dc, 0), width - max(-dc, 0)))
+            edge = hit_index[first] != hit_index[second]
+            edge |= face_ids[first] != face_ids[second]
+            edge |= np.abs(image[first] - image[second]).max(axis=2) > threshold
+            refine[first] |= edge
+            refine[second] |= edge
+
+        rows, cols = np.nonzero(refine)
+        if len(rows) and samples > 1:
+            directions = self.subpixel_directions(rows, cols, samples)
+            directions = directions.reshape(-1, 3)
+            _, sample_index = scene.intersect(self.position, directions)
+            sample_colors = scene.colors(sample_index, scene.material_faces(origin, directions, sample_index))
+            image[rows, cols] = sample_colors.reshape(len(rows), samples * samples, 3).mean(axis=1)
+
+        frame = FrameBuffer(width, height, dtype)
+        frame.write(0, 0, image)
+        return frame
+
+    def screen_rect(self, obj):
+        """
+        Retângulo conservador de pixels em que o objeto pode aparecer: projeta os cantos da
+        caixa do objeto (Intersectable.bounds) no plano da tela, usando a base u, v, w e
+        dist_screen, com um pixel de folga.
+        Retorna (row_start, row_end, col_start, col_end), vazio (row_start == row_end) se o
+        objeto estiver inteiramente atrás da câmera ou fora da tela, ou a tela inteira se o
+        objeto não for limitado ou cruzar o plano da câmera.
+        """
+        height, width = self.height_resolution, self.width_resolution
+        box = obj.bounds()
+        if box is None:
+            return 0, height, 0, width
+
+        (x0, y0, z0), (x1, y1, z1) = box
+        corners = np.array([(x, y, z) for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)], dtype=float)
+        offset = corners - np.array([self.position.x, self.position.y, self.position.z])
+
+        # Profundidade ao longo da direção de visão (-w) e coordenadas na tela
+        depth = -(offset @ np.array([self.w.x, self.w.y, self.w.z]))
+        if (depth < 0).all():
+            return 0, 0, 0, 0
+        if (depth <= 0).any():
+            return 0, height, 0, width
+
+        x = (offset @ np.array([self.u.x, self.u.y, self.u.z])) * self.dist_screen / depth
+        y = (offset @ np.array([self.v.x, self.v.y, self.v.z])) * self.dist_screen / depth
+
+        # Inverso de calculate_point_screen: coluna j e linha i do centro do pixel
+        col_start = max(int(np.floor(x.min() / self.pixel_size_h + (width - 1) / 2)) - 1, 0)
+        col_end = min(int(np.ceil(x.max() / self.pixel_size_h + (width - 1) / 2)) + 2, width)
+        row_start = max(int(np.floor((height - 1) / 2 - y.max() / self.pixel_size_v)) - 1, 0)
+        row_end = min(int(np.ceil((height - 1) / 2 - y.min() / self.pixel_size_v)) + 2, height)
+
+        if col_start >= col_end or row_start >= row_end:
+            return 0, 0, 0, 0
+        return row_start, row_end, col_start, col_end
+
+    def draw_culled(self, objects, stats=None, dtype='float32'):
+        """
+        Visibilidade primária assistida por rasterização: cada objeto só é testado com os raios
+        dos pixels do seu retângulo na tela (screen_rect), em vez de com a tela inteira.
+        O resultado é o mesmo de draw_vectorized.
+        stats: RenderStats opcional, preenchido com os contadores e tempos do quadro
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer.
+        """
+        height, width = self.height_resolution, self.width_resolution
+        scene = compile_scene(objects)
+
+        if stats is not None:
+            stats.begin_frame(self, scene)
+            stats.rays = height * width
+
+        start = perf_counter()
+        directions = self.direction_table()
+        ray_time = perf_counter() - start
+
+        min_dist = np.full((height, width), np.inf)
+        hit_index = np.full((height, width), -1, dtype=np.intp)
+
+        start = perf_counter()
+        for k, obj in enumerate(scene):
+            row_start, row_end, col_start, col_end = self.screen_rect(obj)
+            if row_start == row_end:
+                continue
+
+            block = directions[row_start:row_end, col_start:col_end]
+            distance = obj.intersects_many(self.position, block.reshape(-1, 3)).reshape(block.shape[:2])
+
+            # Objetos em ordem e comparação estrita: no empate vence o primeiro, como em draw
+            closer = distance < min_dist[row_start:row_end, col_start:col_end]
+            min_dist[row_start:row_end, col_start:col_end][closer] = distance[closer]
+            hit_index[row_start:row_end, col_start:col_end][closer] = k
+
+            if stats is not None:
+                stats.record(k, distance.size, int(np.isfinite(distance).sum()), 0)
+        intersection_time = perf_counter() - start
+
+        start = perf_counter()
+        origin = np.array([self.position.x, self.position.y, self.position.z])
+        image = FrameBuffer(width, height, dtype)
+        image.write(0, 0, scene.colors(hit_index, scene.material_faces(origin, directions, hit_index)))
+        shading_time = perf_counter() - start
+
+        if stats is not None:
+            visible = np.bincount(hit_index.ravel() + 1, minlength=len(scene) + 1)[1:]
+            for k, count in enumerate(visible.tolist()):
+                stats.record(k, 0, 0, count)
+            stats.add_time('ray_generation', ray_time)
+            stats.add_time('intersection', intersection_time)
+            stats.add_time('shading', shading_time)
+            stats.end_frame()
+
+        return image
+
+    def render_block(self, objects, row_start, row_end, col_start, col_end):
+        """
+        Renderiza apenas o bloco [row_start, row_end) x [col_start, col_end) da tela.
+        Retorna um array (linhas, colunas, 3) com as cores dos pixels.
+        """
+        directions = self.primary_directions(row_start, row_end, col_start, col_end)
+        return self.trace(directions, objects).reshape(row_end - row_start, col_end - col_start, 3)
+
+    def render_rows(self, objects, band_height=16):
+        """
+        Gerador que renderiza a imagem em faixas de linhas completas, de cima para baixo.
+        Cada faixa é entregue assim que fica pronta, de modo que um consumidor (escrita
+        incremental em arquivo, pré-visualização) pode processá-la e descartá-la: a memória
+        usada fica limitada ao tamanho de uma faixa, e não do quadro inteiro.
+        band_height: número de linhas por faixa
+        Gera tuplas (row_start, array (linhas, W, 3)).
+        """
+        if band_height <= 0:
+            raise ValueError("A altura da faixa deve ser positiva.")
+
+        objects = compile_scene(objects)
+        for row_start in range(0, self.height_resolution, band_height):
+            row_end = min(row_start + band_height, self.height_resolution)
+            yield row_start, self.render_block(objects, row_start, row_end, 0, self.width_resolution)
+
+    def render_tiles(self, objects, tile_size=64):
+        """
+        Gerador que renderiza a imagem em tiles, da esquerda para a direita e de cima para baixo.
+        Cada tile é entregue assim que fica pronto.
+        tile_size: lado, em pixels, de cada tile
+        Gera tuplas (row_start, col_start, array (linhas, colunas, 3)).
+        """
+        objects = compile_scene(objects)
+        for row_start, row_end, col_start, col_end in tiles(self.height_resolution, self.width_resolution, tile_size):
+            yield row_start, col_start, self.render_block(objects, row_start, row_end, col_start, col_end)
+
+    def draw_parallel(self, objects, workers=None, tile_size=64, dtype='float32'):
+        """
+        Renderiza a cena dividindo a tela em tiles distribuídos entre processos.
+        workers: número de processos (padrão: número de núcleos)
+        tile_size: lado, em pixels, de cada tile
+        dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+        Retorna a imagem como FrameBuffer, com o armazenamento na memória compartilhada em que
+        os processos escreveram.
+        """
+        return draw_parallel(self, compile_scene(objects), workers, tile_size, dtype)
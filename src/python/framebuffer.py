@@ -0,0 +1,146 @@
+import numpy as np
+
+from image_io import decode_gamma, quantize, save_image
+
+
+# Tipos de armazenamento aceitos e seus tamanhos por pixel: float32 (12 bytes), float16 (6 bytes)
+# e uint8 (3 bytes, já com a gama aplicada, como num arquivo de imagem)
+STORAGE = {
+    'float32': np.float32,
+    'float16': np.float16,
+    'uint8': np.uint8,
+}
+
+
+class FrameBuffer:
+    """
+    Framebuffer RGB contíguo, de H x W x 3 valores.
+
+    Nos tipos de ponto flutuante as cores ficam lineares, em [0, 1]; em uint8 ficam quantizadas
+    com a gama do framebuffer, prontas para gravar. A escrita recebe sempre cores lineares.
+
+    O conteúdo é exportado sem cópia: np.asarray(fb) e fb.array são visões do mesmo buffer
+    (também via __array_interface__), e fb.memoryview() o expõe pelo protocolo de buffer.
+
+    Atributos:
+        - width, height (int): dimensões em pixels
+        - gamma (None, 'srgb' ou float): gama usada no armazenamento uint8 e na gravação; com
+          None (padrão) as cores são gravadas sem correção, e 'srgb' aplica a curva sRGB
+        - array (array (H, W, 3)): os pixels
+    """
+    def __init__(self, width, height, dtype='float32', gamma=None):
+        if dtype not in STORAGE:
+            raise ValueError(f"Tipo de armazenamento não suportado: {dtype} (use {', '.join(STORAGE)})")
+        if width <= 0 or height <= 0:
+            raise ValueError("As dimensões do framebuffer devem ser positivas.")
+
+        self.width = width
+        self.height = height
+        self.gamma = gamma
+        self.array = np.zeros((height, width, 3), dtype=STORAGE[dtype])
+
+    @classmethod
+    def from_array(cls, image, dtype='float32', gamma=None):
+        """
+        Cria um framebuffer com as cores lineares de image (array (H, W, 3) ou lista de linhas de
+        tuplas (r, g, b)).
+        """
+        image = np.asarray(image)
+        frame = cls(image.shape[1], image.shape[0], dtype, gamma)
+        frame.write(0, 0, image)
+        return frame
+
+    @classmethod
+    def from_storage(cls, array, gamma=None):
+        """
+        Cria um framebuffer sobre um array (H, W, 3) já alocado (por exemplo, em memória
+        compartilhada), sem cópia: o array passa a ser o armazenamento do framebuffer.
+        """
+        if array.ndim != 3 or array.shape[2] != 3:
+            raise ValueError("O armazenamento do framebuffer deve ter formato (H, W, 3).")
+        dtype = next((name for name, storage in STORAGE.items() if array.dtype == storage), None)
+        if dtype is None:
+            raise ValueError(f"Tipo de armazenamento não suportado: {array.dtype} (use {', '.join(STORAGE)})")
+
+        frame = cls.__new__(cls)
+        frame.width, frame.height = array.shape[1], array.shape[0]
+        frame.gamma = gamma
+        frame.array = array
+        return frame
+
+    @property
+    def dtype(self):
+        return self.array.dtype
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+    def write(self, row_start, col_start, block):
+        """
+        Escreve um bloco de cores lineares a partir do pixel (row_start, col_start).
+        block: array (linhas, colunas, 3) ou lista de linhas de tuplas (r, g, b)
+        """
+        block = np.asarray(block)
+        target = self.array[row_start:row_start + block.shape[0], col_start:col_start + block.shape[1]]
+        if target.shape != block.shape:
+            raise ValueError("O bloco não cabe no framebuffer nessa posição.")
+
+        if self.array.dtype == np.uint8:
+            target[...] = quantize(block, self.gamma)
+        else:
+            target[...] = block
+
+    def fill(self, blocks):
+        """
+        Consome um gerador de blocos, como Camera.render_rows (tuplas (row_start, bloco)) ou
+        Camera.render_tiles (tuplas (row_start, col_start, bloco)), escrevendo cada um no
+        framebuffer. Só um bloco fica em memória além do framebuffer.
+        Retorna o próprio framebuffer.
+        """
+        for item in blocks:
+            if len(item) == 2:
+                row_start, block = item
+                self.write(row_start, 0, block)
+            else:
+                self.write(*item)
+        return self
+
+    def linear(self):
+        """
+        Cores lineares em float32. No armazenamento float32 é uma visão, sem cópia.
+        """
+        if self.array.dtype == np.uint8:
+            return decode_gamma(self.array / np.float32(255), self.gamma).astype(np.float32)
+        return self.array.astype(np.float32, copy=False)
+
+    def memoryview(self):
+        """
+        Visão do buffer pelo protocolo de buffer, sem cópia.
+        """
+        return memoryview(self.array)
+
+    @property
+    def __array_interface__(self):
+        return self.array.__array_interface__
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self.array.dtype:
+            return self.array.copy() if copy else self.array
+        return self.array.astype(dtype)
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+    def __len__(self):
+        return self.height
+
+    def save(self, path):
+        """
+        Grava o framebuffer (PNG ou PPM, pela extensão), com a gama do framebuffer.
+        """
+        save_image(path, self.array, self.gamma)
@@ -0,0 +1,225 @@
+from math import floor
+
+import numpy as np
+
+from bvh import TINY, inverse_directions
+
+
+# Células por primitiva usadas na escolha automática da resolução
+GRID_DENSITY = 2.0
+MAX_RESOLUTION = 128
+
+# Marcador de "nenhuma primitiva" nas reduções por mínimo
+NO_PRIM = np.iinfo(np.int64).max
+
+# Folga relativa da caixa da grade, para que primitivas na borda caiam dentro dela
+BOX_PADDING = 1e-9
+
+
+class UniformGrid:
+    """
+    Grade uniforme sobre primitivas com caixas alinhadas aos eixos, percorrida por 3D-DDA
+    (Amanatides & Woo): o raio visita apenas as células que atravessa, da frente para trás,
+    e para assim que a interseção mais próxima encontrada fica antes da saída da célula atual.
+    O custo por raio depende do número de células atravessadas, e não do número de primitivas.
+
+    Cada primitiva é registrada em todas as células que sua caixa toca; as células ficam em
+    formato CSR: as primitivas da célula c são items[start[c]:start[c + 1]], em ordem crescente.
+
+    Atributos:
+        - lo, hi (array (3,)): caixa da grade
+        - resolution (array (3,)): número de células em cada eixo
+        - cell_size (array (3,)): dimensões de uma célula
+        - start (array (C + 1,)), items (array): primitivas de cada célula
+    """
+    def __init__(self, prim_lo, prim_hi, density=GRID_DENSITY, max_resolution=MAX_RESOLUTION):
+        prim_lo = np.asarray(prim_lo, dtype=float).reshape(-1, 3)
+        prim_hi = np.asarray(prim_hi, dtype=float).reshape(-1, 3)
+        if len(prim_lo) == 0:
+            raise ValueError("A grade precisa de pelo menos uma primitiva.")
+
+        lo, hi = prim_lo.min(axis=0), prim_hi.max(axis=0)
+        pad = BOX_PADDING * max(float((hi - lo).max()), 1.0)
+        self.lo, self.hi = lo - pad, hi + pad
+
+        self.resolution = self.choose_resolution(self.hi - self.lo, len(prim_lo), density, max_resolution)
+        self.cell_size = (self.hi - self.lo) / self.resolution
+        self._build(prim_lo, prim_hi)
+
+        # Cópias em listas para a travessia escalar, mais rápida em Python puro
+        self._box = (self.lo.tolist(), self.hi.tolist(), self.cell_size.tolist(), self.resolution.tolist())
+        self._cells = [self.items[a:b].tolist() for a, b in zip(self.start[:-1].tolist(), self.start[1:].tolist())]
+
+    @staticmethod
+    def choose_resolution(extent, count, density, max_resolution):
+        """
+        Resolução com cerca de density * count células, de forma aproximadamente cúbica:
+        cada eixo recebe extent * (density * count / volume) ** (1/3) células.
+        """
+        # Eixos sem espessura contam como tendo o tamanho médio dos outros no cálculo do volume
+        positive = extent[extent > 0]
+        fallback = positive.mean() if len(positive) else 1.0
+        sizes = np.where(extent > 0, extent, fallback)
+
+        cells_per_unit = (density * count / np.prod(sizes)) ** (1 / 3)
+        resolution = np.floor(sizes * cells_per_unit).astype(np.int64)
+        resolution[extent <= 0] = 1
+        return np.clip(resolution, 1, max_resolution)
+
+    def cell_coords(self, points):
+        """
+        Coordenadas inteiras das células que contêm os pontos, limitadas à grade.
+        """
+        coords = np.floor((points - self.lo) / self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, self.resolution - 1)
+
+    def _build(self, prim_lo, prim_hi):
+        nx, ny, _ = self.resolution.tolist()
+
+        first = self.cell_coords(prim_lo)
+        span = self.cell_coords(prim_hi) - first + 1
+        count = span.prod(axis=1)
+
+        # Um par (primitiva, célula) para cada célula tocada pela caixa de cada primitiva
+        prims = np.repeat(np.arange(len(prim_lo)), count)
+        local = np.arange(len(prims)) - np.repeat(np.cumsum(count) - count, count)
+        sx, sy = span[prims, 0], span[prims, 1]
+        cx = first[prims, 0] + local % sx
+        cy = first[prims, 1] + (local // sx) % sy
+        cz = first[prims, 2] + local // (sx * sy)
+        cells = (cz * ny + cy) * nx + cx
+
+        # Ordenação estável: dentro de cada célula as primitivas ficam em ordem crescente
+        order = np.argsort(cells, kind='stable')
+        self.items = prims[order]
+        self.start = np.zeros(int(self.resolution.prod()) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=len(self.start) - 1), out=self.start[1:])
+
+    def traverse(self, origin, direction, intersect, max_t=float('inf')):
+        """
+        Percorre a grade com um raio (3D-DDA).
+        origin, direction: tuplas (x, y, z)
+        intersect: função primitiva -> distância ou None
+        max_t: só interseções com t <= max_t são consideradas
+        Retorna (t, primitiva) da interseção mais próxima (no empate, a de menor índice), ou None.
+        """
+        lo, hi, size, res = self._box
+
+        # Entrada e saída da caixa da grade (teste de slab)
+        t_enter, t_leave = 0.0, float('inf')
+        for a in range(3):
+            inv = 1 / (direction[a] if direction[a] != 0 else TINY)
+            t1 = (lo[a] - origin[a]) * inv
+            t2 = (hi[a] - origin[a]) * inv
+            t_enter = max(t_enter, min(t1, t2))
+            t_leave = min(t_leave, max(t1, t2))
+        if t_enter > t_leave:
+            return None
+
+        cell, step, t_next, t_delta = [0] * 3, [0] * 3, [0.0] * 3, [0.0] * 3
+        for a in range(3):
+            p = origin[a] + direction[a] * t_enter
+            cell[a] = min(max(floor((p - lo[a]) / size[a]), 0), res[a] - 1)
+            if direction[a] > 0:
+                step[a] = 1
+                t_next[a] = (lo[a] + (cell[a] + 1) * size[a] - origin[a]) / direction[a]
+                t_delta[a] = size[a] / direction[a]
+            elif direction[a] < 0:
+                step[a] = -1
+                t_next[a] = (lo[a] + cell[a] * size[a] - origin[a]) / direction[a]
+                t_delta[a] = -size[a] / direction[a]
+            else:
+                t_next[a] = t_delta[a] = float('inf')
+
+        cells, nx, ny = self._cells, res[0], res[1]
+        best_t, best = max_t, None
+
+        while True:
+            for prim in cells[(cell[2] * ny + cell[1]) * nx + cell[0]]:
+                t = intersect(prim)
+                if t is not None and (t < best_t or (t == best_t and (best is None or prim < best[1]))):
+                    best_t, best = t, (t, prim)
+
+            # Eixo da próxima fronteira atravessada
+            a = 0 if t_next[0] <= t_next[1] and t_next[0] <= t_next[2] else (1 if t_next[1] <= t_next[2] else 2)
+            if best is not None and best_t < t_next[a]:
+                return best
+
+            cell[a] += step[a]
+            if not 0 <= cell[a] < res[a]:
+                return best
+            t_next[a] += t_delta[a]
+
+    def traverse_many(self, origins, directions, intersect_pairs, max_t=None, any_hit=False):
+        """
+        Percorre a grade com um lote de raios, em passos simultâneos: a cada passo, cada raio
+        ativo testa as primitivas da sua célula atual e avança para a próxima.
+        origins: array (N, 3) ou (3,)
+        directions: array (N, 3)
+        intersect_pairs: função (índices dos raios, índices das primitivas) -> array de
+                         distâncias por par, com inf onde não há interseção
+        max_t: array (N,) com a distância máxima de cada raio (padrão: inf)
+        any_hit: cada raio para na primeira célula em que encontra uma interseção antes de
+                 max_t, mesmo que haja outra mais próxima numa célula seguinte (raios de sombra)
+        Retorna (t, primitiva) por raio, com t = inf e primitiva = -1 sem interseção; no
+        empate, vence a primitiva de menor índice.
+        """
+        n = len(directions)
+        origins = np.broadcast_to(np.asarray(origins, dtype=float), (n, 3))
+        best_t = np.full(n, np.inf) if max_t is None else np.array(max_t, dtype=float)
+        best_prim = np.full(n, -1, dtype=np.int64)
+
+        inv = inverse_directions(directions)
+        t1 = (self.lo - origins) * inv
+        t2 = (self.hi - origins) * inv
+        t_enter = np.maximum(np.minimum(t1, t2).max(axis=1), 0.0)
+        t_leave = np.maximum(t1, t2).min(axis=1)
+
+        rays = np.flatnonzero(t_enter <= t_leave)
+        o, d = origins[rays], directions[rays]
+
+        cell = self.cell_coords(o + d * t_enter[rays, None])
+        step = np.sign(d).astype(np.int64)
+        boundary = self.lo + (cell + (step > 0)) * self.cell_size
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_next = np.where(step != 0, (boundary - o) / d, np.inf)
+            t_delta = np.where(step != 0, self.cell_size / np.abs(d), np.inf)
+
+        nx, ny, _ = self.resolution.tolist()
+
+        while len(rays):
+            # Pares (raio, primitiva) das células atuais
+            c = (cell[:, 2] * ny + cell[:, 1]) * nx + cell[:, 0]
+            first, count = self.start[c], self.start[c + 1] - self.start[c]
+            owner = np.repeat(np.arange(len(rays)), count)
+            if len(owner):
+                prims = self.items[np.repeat(first - np.cumsum(count) + count, count) + np.arange(len(owner))]
+                t = intersect_pairs(rays[owner], prims)
+
+                # Menor t por raio e, entre os empatados (incluindo a melhor anterior), a menor primitiva
+                old_t, old_prim = best_t[rays], best_prim[rays]
+                new_t = old_t.copy()
+                np.minimum.at(new_t, owner, t)
+
+                winner = np.where((new_t == old_t) & (old_prim >= 0), old_prim, NO_PRIM)
+                tied = (t == new_t[owner]) & (t < np.inf)
+                np.minimum.at(winner, owner[tied], prims[tied])
+
+                found = winner != NO_PRIM
+                best_t[rays] = new_t
+                best_prim[rays[found]] = winner[found]
+
+            axis = t_next.argmin(axis=1)
+            local = np.arange(len(rays))
+            exit_t = t_next[local, axis]
+
+            cell[local, axis] += step[local, axis]
+            inside = (cell[local, axis] >= 0) & (cell[local, axis] < self.resolution[axis])
+            hit = best_prim[rays] >= 0
+            keep = inside & ~(hit if any_hit else hit & (best_t[rays] < exit_t))
+            t_next[local, axis] += t_delta[local, axis]
+
+            rays, cell, step, t_next, t_delta = rays[keep], cell[keep], step[keep], t_next[keep], t_delta[keep]
+
+        best_t[best_prim < 0] = np.inf
+        return best_t, best_prim
@@ -0,0 +1,96 @@
+import numpy as np
+
+
+def hit_dtype(normals=False):
+    """
+    Registro de cada pixel: objeto atingido (-1 no fundo), face atingida (-1 em objetos sem
+    faces), distância t e, opcionalmente, a normal em float16. São 12 bytes por pixel, ou 18
+    com a normal.
+    """
+    fields = [('object', np.int32), ('face', np.int32), ('t', np.float32)]
+    if normals:
+        fields.append(('normal', np.float16, (3,)))
+    return np.dtype(fields)
+
+
+class HitBuffer:
+    """
+    Buffer de interseções dos raios primários (G-buffer): o que cada pixel atingiu, sem as cores.
+    Enquanto a geometria e a câmera não mudam, a imagem pode ser refeita a partir dele
+    (Camera.reshade) sem traçar nenhum raio, por exemplo depois de trocar as cores dos objetos
+    ou o kd dos materiais do .mtl de uma malha (a face guardada escolhe o material).
+
+    Com path, os registros ficam num arquivo .npy mapeado em memória, que pode ser reaberto
+    depois com HitBuffer.open.
+
+    Atributos:
+        - width, height (int): dimensões em pixels
+        - records (array estruturado (H, W)): registros dos pixels (ver hit_dtype)
+    """
+    def __init__(self, width, height, normals=False, path=None):
+        if width <= 0 or height <= 0:
+            raise ValueError("As dimensões do buffer devem ser positivas.")
+
+        dtype = hit_dtype(normals)
+        if path is None:
+            self.records = np.zeros((height, width), dtype=dtype)
+        else:
+            self.records = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(height, width))
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """
+        Reabre, mapeado em memória, um buffer gravado com path.
+        """
+        records = np.load(path, mmap_mode=mode)
+        if records.ndim != 2 or records.dtype not in (hit_dtype(False), hit_dtype(True)):
+            raise ValueError(f"O arquivo não contém um buffer de interseções: {path}")
+
+        hits = cls.__new__(cls)
+        hits.records = records
+        hits.height, hits.width = records.shape
+        return hits
+
+    @property
+    def object_ids(self):
+        return self.records['object']
+
+    @property
+    def face_ids(self):
+        return self.records['face']
+
+    @property
+    def t(self):
+        return self.records['t']
+
+    @property
+    def normals(self):
+        """
+        Normais (H, W, 3), ou None se o buffer foi criado sem elas.
+        """
+        return self.records['normal'] if 'normal' in self.records.dtype.names else None
+
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+
+    def write(self, object_ids, face_ids, t, normals=None):
+        """
+        Preenche o buffer com os dados de todos os pixels, em arrays (H * W,) ou (H * W, 3) na
+        ordem das linhas.
+        """
+        records = self.records.reshape(-1)
+        records['object'] = object_ids
+        records['face'] = face_ids
+        records['t'] = t
+        if normals is not None and self.normals is not None:
+            records['normal'] = normals
+
+    def flush(self):
+        """
+        Grava no disco as alterações de um buffer mapeado em memória.
+        """
+        if isinstance(self.records, np.memmap):
+            self.records.flush()
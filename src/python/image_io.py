@@ -0,0 +1,207 @@
+import os
+import struct
+import zlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Intenção de renderização "perceptual" do chunk sRGB
+SRGB_INTENT = 0
+
+# Linhas convertidas por vez ao gravar uma imagem inteira, para limitar a memória temporária
+SAVE_BAND_HEIGHT = 64
+
+
+def encode_gamma(block, gamma=None):
+    """
+    Converte cores lineares em [0, 1] para o espaço da tela.
+    gamma: None (padrão) para gravar os valores como estão, 'srgb' para a curva sRGB ou um
+           número para a curva c ** (1 / gamma)
+    """
+    block = np.clip(np.asarray(block, dtype=np.float64), 0, 1)
+    if gamma is None:
+        return block
+    if gamma == 'srgb':
+        return np.where(block <= 0.0031308, block * 12.92, 1.055 * block ** (1 / 2.4) - 0.055)
+    return block ** (1 / gamma)
+
+
+def decode_gamma(block, gamma=None):
+    """
+    Inverso de encode_gamma: converte cores do espaço da tela em [0, 1] para cores lineares.
+    """
+    block = np.clip(block, 0, 1)
+    if gamma is None:
+        return block
+    if gamma == 'srgb':
+        return np.where(block <= 0.04045, block / 12.92, ((block + 0.055) / 1.055) ** 2.4)
+    return block ** gamma
+
+
+def quantize(block, gamma=None):
+    """
+    Aplica a gama e quantiza um bloco de cores em [0, 1] para 8 bits por canal
+    (arredondando para o valor mais próximo).
+    Retorna um array uint8 com a forma do bloco.
+    """
+    return (encode_gamma(block, gamma) * 255 + 0.5).astype(np.uint8)
+
+
+def to_bytes(block, gamma=None):
+    """
+    Bytes RGB, linha a linha, de um bloco (linhas, colunas, 3).
+    Blocos de floats são cores lineares em [0, 1], quantizadas com quantize; blocos uint8 já
+    estão no espaço da tela (como o armazenamento uint8 de FrameBuffer) e são usados sem cópia
+    quando contíguos.
+    """
+    if block.dtype == np.uint8:
+        return memoryview(np.ascontiguousarray(block)).cast('B')
+    return quantize(block, gamma).tobytes()
+
+
+class ImageWriter(ABC):
+    """
+    Base dos escritores incrementais: as linhas são gravadas à medida que chegam, sem manter a
+    imagem inteira em memória.
+
+    Uso:
+        with PNGWriter("imagem.png", largura, altura) as writer:
+            for row_start, faixa in camera.render_rows(objetos):
+                writer.write(faixa)
+    """
+    def __init__(self, path, width, height, gamma=None):
+        self.width = width
+        self.height = height
+        self.gamma = gamma
+        self.rows_written = 0
+        self.file = open(path, 'wb')
+        self.write_header()
+
+    @abstractmethod
+    def write_header(self):
+        """
+        Grava o cabeçalho do formato, chamado ao abrir o arquivo.
+        """
+
+    def write_footer(self):
+        pass
+
+    @abstractmethod
+    def write_bytes(self, data, rows):
+        """
+        Grava rows linhas já convertidas em bytes RGB (ver to_bytes).
+        """
+
+    def write(self, block):
+        """
+        Grava as próximas linhas da imagem.
+        block: array (linhas, largura, 3) com cores lineares em [0, 1], ou uint8 já no espaço
+               da tela
+        """
+        block = np.asarray(block)
+        if block.shape[1:] != (self.width, 3):
+            raise ValueError("O bloco deve ter a largura da imagem e 3 canais.")
+        if self.rows_written + block.shape[0] > self.height:
+            raise ValueError("Mais linhas do que a altura da imagem.")
+
+        self.write_bytes(to_bytes(block, self.gamma), block.shape[0])
+        self.rows_written += block.shape[0]
+
+    def close(self):
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Imagem incompleta: {self.rows_written} de {self.height} linhas gravadas.")
+            self.write_footer()
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+
+class PPMWriter(ImageWriter):
+    """
+    Escrita incremental de imagens PPM binárias (P6).
+    """
+    def write_header(self):
+        self.file.write(b'P6\n%d %d\n255\n' % (self.width, self.height))
+
+    def write_bytes(self, data, rows):
+        self.file.write(data)
+
+
+class PNGWriter(ImageWriter):
+    """
+    Escrita incremental de imagens PNG RGB de 8 bits, comprimidas com zlib à medida que as
+    linhas chegam. A gama usada na codificação é registrada no arquivo (chunk sRGB ou gAMA).
+    """
+    def __init__(self, path, width, height, gamma=None, level=6):
+        self.compressor = zlib.compressobj(level)
+        super().__init__(path, width, height, gamma)
+
+    def write_chunk(self, kind, data):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(kind)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(kind + data)))
+
+    def write_header(self):
+        self.file.write(PNG_SIGNATURE)
+        # Profundidade 8, cor RGB (2), compressão, filtro e entrelaçamento padrão
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0))
+        if self.gamma == 'srgb':
+            self.write_chunk(b'sRGB', bytes([SRGB_INTENT]))
+        elif self.gamma is not None:
+            self.write_chunk(b'gAMA', struct.pack('>I', round(100000 / self.gamma)))
+
+    def write_bytes(self, data, rows):
+        # Cada linha começa com o tipo de filtro (0: nenhum)
+        stride = self.width * 3
+        filtered = b''.join(b'\x00' + data[k * stride:(k + 1) * stride] for k in range(rows))
+        compressed = self.compressor.compress(filtered)
+        if compressed:
+            self.write_chunk(b'IDAT', compressed)
+
+    def write_footer(self):
+        self.write_chunk(b'IDAT', self.compressor.flush())
+        self.write_chunk(b'IEND', b'')
+
+
+WRITERS = {
+    '.ppm': PPMWriter,
+    '.png': PNGWriter,
+}
+
+
+def save_image(path, image, gamma=None):
+    """
+    Grava a imagem inteira, escolhendo o formato (PNG ou PPM) pela extensão. A conversão é
+    feita em faixas de SAVE_BAND_HEIGHT linhas, sem copiar a imagem inteira.
+    image: array (H, W, 3), FrameBuffer ou lista de linhas de tuplas (r, g, b), com cores
+           lineares em [0, 1] (ou uint8 já no espaço da tela)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Formato de imagem não suportado: {extension}")
+
+    image = np.asarray(image)
+    with WRITERS[extension](path, image.shape[1], image.shape[0], gamma) as writer:
+        for row_start in range(0, image.shape[0], SAVE_BAND_HEIGHT):
+            writer.write(image[row_start:row_start + SAVE_BAND_HEIGHT])
+
+
+def write_rows(writer, rows):
+    """
+    Consome um gerador de faixas (como Camera.render_rows), gravando cada uma no writer.
+    """
+    for _, block in rows:
+        writer.write(block)
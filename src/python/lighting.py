@@ -0,0 +1,172 @@
+import numpy as np
+
+from primitives import *
+from shapes import Color
+
+
+# Deslocamento da origem dos raios de sombra ao longo da normal, para que o raio não atinja a
+# própria superfície de onde parte
+SHADOW_BIAS = 1e-6
+
+
+class PhongMaterial:
+    """
+    Material de Blinn-Phong, usado pelo sombreamento (shade e wavefront.trace_wavefront).
+    Não confundir com color_map.Material, o material lido do .mtl, convertido por from_mtl.
+
+    Atributos:
+        - ka (Color): reflexão da luz ambiente
+        - kd (Color): reflexão difusa
+        - ks (Color): reflexão especular (também a fração refletida nos raios secundários)
+        - ns (float): expoente especular (brilho)
+        - ni (float): índice de refração
+        - d (float): opacidade; 1 - d é a fração transmitida (refratada)
+    """
+    def __init__(self, ka: Color, kd: Color, ks: Color, ns: float, ni: float = 1.0, d: float = 1.0):
+        if ns < 0:
+            raise ValueError("O expoente especular (ns) não pode ser negativo.")
+        if ni <= 0:
+            raise ValueError("O índice de refração (ni) deve ser positivo.")
+        if not 0 <= d <= 1:
+            raise ValueError("A opacidade (d) deve estar em [0, 1].")
+        self.ka = ka
+        self.kd = kd
+        self.ks = ks
+        self.ns = ns
+        self.ni = ni
+        self.d = d
+
+    @classmethod
+    def from_color(cls, color: Color):
+        """
+        Material fosco com a cor do objeto nas componentes ambiente e difusa, usado pelos objetos
+        sem material.
+        """
+        return cls(color, color, Color.BLACK, 1.0)
+
+    @classmethod
+    def from_mtl(cls, material):
+        """
+        Material a partir de um material lido do .mtl (Colormap), com ka, kd e ks em Vector3.
+        Sem Ni no arquivo (índice 0 no Colormap), o índice de refração é 1.
+        """
+        as_color = lambda v: Color(v.x, v.y, v.z)
+        return cls(as_color(material.ka), as_color(material.kd), as_color(material.ks), material.ns,
+                   material.ni if material.ni > 0 else 1.0, material.d)
+
+
+class PointLight:
+    """
+    Luz pontual, sem atenuação com a distância
+
+    Atributos:
+        - position (Point3): posição da luz
+        - color (Color): cor (intensidade por canal) da luz
+    """
+    def __init__(self, position: Point3, color: Color = Color.WHITE):
+        self.position = position
+        self.color = color
+
+
+def shading_table(objects):
+    """
+    Empacota os materiais em arrays: uma linha por objeto, com o seu material (ou o derivado da
+    cor), seguida das linhas das tabelas de materiais por face (MaterialTable) dos objetos, uma
+    vez por tabela.
+    Retorna um dicionário com ka, kd e ks (M, 3), ns, ni e d (M,) e faces, a lista de
+    (índice do objeto, primeira linha da sua tabela, face_material_ids) usada por shading_rows.
+    """
+    materials = [obj.material or PhongMaterial.from_color(obj.color) for obj in objects]
+    rgb = lambda colors: np.array([(c.r, c.g, c.b) for c in colors], dtype=float).reshape(-1, 3)
+    scalar = lambda values: np.array(list(values), dtype=float)
+    table = {
+        'ka': rgb(m.ka for m in materials),
+        'kd': rgb(m.kd for m in materials),
+        'ks': rgb(m.ks for m in materials),
+        'ns': scalar(m.ns for m in materials),
+        'ni': scalar(m.ni for m in materials),
+        'd': scalar(m.d for m in materials),
+        'faces': [],
+    }
+
+    # Tabelas do .mtl, com os arrays já empacotados; sem Ni no arquivo, o índice é 1 (ver PhongMaterial.from_mtl)
+    first_rows = {}
+    for k, obj in enumerate(objects):
+        if obj.face_material_ids is None:
+            continue
+        face_table = obj.material_table
+        if id(face_table) not in first_rows:
+            first_rows[id(face_table)] = len(table['ns'])
+            for key in ('ka', 'kd', 'ks', 'ns', 'd'):
+                table[key] = np.concatenate([table[key], getattr(face_table, key)])
+            table['ni'] = np.concatenate([table['ni'], np.where(face_table.ni > 0, face_table.ni, 1.0)])
+        table['faces'].append((k, first_rows[id(face_table)], obj.face_material_ids))
+    return table
+
+
+def shading_rows(materials, object_ids, face_ids):
+    """
+    Linha de shading_table de cada ponto atingido: a do material da face nos objetos com
+    materiais por face, ou a do objeto.
+    object_ids, face_ids: arrays (N,) com o objeto e a face atingidos (ver CompiledScene.surface)
+    Retorna um array (N,) de índices (-1 sem interseção).
+    """
+    rows = np.array(object_ids, dtype=np.intp)
+    for k, first, face_material_ids in materials['faces']:
+        rays = np.flatnonzero(object_ids == k)
+        rays = rays[face_ids[rays] >= 0]
+        ids = face_material_ids[face_ids[rays]]
+        rows[rays[ids >= 0]] = first + ids[ids >= 0]
+    return rows
+
+
+def shade(scene, origin, directions, t, object_ids, face_ids, normals, lights, ambient: Color, materials=None):
+    """
+    Sombreamento de Blinn-Phong dos pontos atingidos por um lote de raios:
+        ka * ambiente + soma, nas luzes visíveis, de luz * (kd * (N.L) + ks * (N.H) ** ns)
+    A visibilidade de cada luz é testada com raios de sombra (CompiledScene.occluded), só nos
+    pontos voltados para ela.
+    scene: CompiledScene
+    origin: array (3,) com a origem dos raios, ou (N, 3) com uma origem por raio
+    directions: array (N, 3) com as direções dos raios
+    t, object_ids: resultado de CompiledScene.intersect ou intersect_rays
+    face_ids, normals: resultado de CompiledScene.surface (faces atingidas, que escolhem o
+                       material nos objetos com materiais por face, e normais)
+    materials: resultado de shading_table(scene), para reaproveitar entre chamadas
+    Retorna um array (N, 3) com as cores em [0, 1] (preto sem interseção).
+    """
+    colors = np.zeros((len(directions), 3))
+    hit = np.flatnonzero(object_ids >= 0)
+    if len(hit) == 0:
+        return colors
+
+    materials = shading_table(scene) if materials is None else materials
+    rows = shading_rows(materials, object_ids[hit], face_ids[hit])
+    ka, kd, ks, ns = (materials[key][rows] for key in ('ka', 'kd', 'ks', 'ns'))
+    d = directions[hit]
+    points = (origin[hit] if origin.ndim == 2 else origin) + d * t[hit, None]
+
+    # Superfícies vistas pelo lado de dentro (planos, malhas) usam a normal do lado do observador
+    n = normals[hit]
+    n = np.where(((n * d).sum(axis=1) > 0)[:, None], -n, n)
+    origins = points + n * SHADOW_BIAS
+
+    result = ka * [ambient.r, ambient.g, ambient.b]
+    for light in lights:
+        to_light = np.array([light.position.x, light.position.y, light.position.z]) - points
+        distance = np.linalg.norm(to_light, axis=1)
+        l = to_light / distance[:, None]
+        n_dot_l = (n * l).sum(axis=1)
+
+        lit = np.flatnonzero(n_dot_l > 0)
+        lit = lit[~scene.occluded(origins[lit], l[lit], distance[lit])]
+
+        h = l[lit] - d[lit]
+        h /= np.linalg.norm(h, axis=1, keepdims=True)
+        n_dot_h = np.maximum((n[lit] * h).sum(axis=1), 0.0)
+
+        intensity = kd[lit] * n_dot_l[lit, None] + ks[lit] * (n_dot_h ** ns[lit])[:, None]
+        result[lit] += intensity * [light.color.r, light.color.g, light.color.b]
+
+    colors[hit] = np.clip(result, 0.0, 1.0)
+    return colors
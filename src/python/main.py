@@ -1,10 +1,21 @@
+import argparse
+
 from primitives import *
 from camera import Camera
+from scenes import SCENES
 from shapes import *
-import matplotlib.pyplot as plt
+from stats import RenderStats
+import shapes
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Renderiza uma das cenas de scenes.py")
+    parser.add_argument('cena', nargs='?', default='plano_inclinado', choices=list(SCENES))
+    parser.add_argument('--output', default='image.png', help="arquivo de saída (.png ou .ppm)")
+    parser.add_argument('--stats', action='store_true', help="imprime as estatísticas do quadro em JSON")
+    parser.add_argument('--show', action='store_true', help="mostra a imagem com o matplotlib")
+    args = parser.parse_args()
+
     # Configuração da câmera
     camera_pos = Point3(0, 0, 0)
     camera_mira = Point3(0, 0, -1)
@@ -15,61 +26,27 @@ def main():
 
     camera = Camera(camera_pos, camera_mira, camera_up, distancia_tela, altura_resolucao, largura_resolucao)
 
-    # Cena inicial
-    esfera1 = Sphere(Point3(0, 0, -3), 1, Color.RED) 
-    esfera2 = Sphere(Point3(2, 0, -4), 1, Color.GREEN)  
-    plano = Plane(Point3(0, -1, 0), Vector3(0, 1, 0), Color(0.5, 0.5, 0.5)) 
-
-    objetos = [esfera1, esfera2, plano]
-
-    # Esfera vermelha na frente da esfera verde
-    esfera1 = Sphere(Point3(0, 0, -3), 1, Color.RED)  
-    esfera2 = Sphere(Point3(0, 0, -6), 1, Color.GREEN)  
-    plano = Plane(Point3(0, -1, 0), Vector3(0, 1, 0), Color(0.5, 0.5, 0.5))  
-
-    objetos = [esfera1, esfera2, plano]
-
-    # Esferas lado a lado
-    esfera1 = Sphere(Point3(-1.5, 0, -3), 1, Color.RED)  
-    esfera2 = Sphere(Point3(1.5, 0, -3), 1, Color.GREEN)  
-    plano = Plane(Point3(0, -1, 0), Vector3(0, 1, 0), Color(0.5, 0.5, 0.5))  
-
-    objetos = [esfera1, esfera2, plano]
-
-    # Esferas parcialmente sobrepostas
-    esfera1 = Sphere(Point3(0, 0, -3), 1, Color.RED)  
-    esfera2 = Sphere(Point3(0.5, 0, -3.5), 1, Color.GREEN)  
-    plano = Plane(Point3(0, -1, 0), Vector3(0, 1, 0), Color(0.5, 0.5, 0.5))
-
-    objetos = [esfera1, esfera2, plano]
-
-    # Esfera flutuante acima do plano
-    esfera1 = Sphere(Point3(0, 1, -3), 1, Color.RED)  
-    plano = Plane(Point3(0, -1, 0), Vector3(0, 1, 0), Color(0.5, 0.5, 0.5))  
-
-    objetos = [esfera1, plano]
-
-    # Plano vertical como parede
-    plano = Plane(Point3(0, 0, -5), Vector3(0, 0, 1), Color(0.8, 0.8, 0.2)) 
-    objetos = [plano]
-
-    # Plano horizontal e plano vertical (chão e parede)
-    plano_chao = Plane(Point3(0, -1, 0), Vector3(0, 1, 0), Color(0.5, 0.5, 0.5)) 
-    plano_parede = Plane(Point3(0, 0, -5), Vector3(0, 0, 1), Color(0.8, 0.8, 0.2)) 
-    objetos = [plano_chao, plano_parede]
-
-    # Plano inclinado
-    plano = Plane(Point3(0, -1, 0), Vector3(1, 1, 0).normalize(), Color(0.2, 0.6, 0.8)) 
-    objetos = [plano]
+    # Cena escolhida pela linha de comando (padrão: plano inclinado); ver scenes.py
+    objetos = SCENES[args.cena](shapes)
+    stats = RenderStats() if args.stats else None
 
     # Renderizar a cena
-    imagem = camera.draw(objetos)
+    imagem = camera.draw(objetos, stats)
 
     # Salvar a imagem
-    plt.imshow(imagem)
-    plt.axis('off')
-    plt.savefig("image.png", bbox_inches='tight')
-    plt.show()
+    if stats is None:
+        imagem.save(args.output)
+    else:
+        with stats.stage('output'):
+            imagem.save(args.output)
+        print(stats.to_json(indent=2))
+
+    # O matplotlib só é importado quando a imagem vai ser mostrada, pois a importação é lenta
+    if args.show:
+        import matplotlib.pyplot as plt
+        plt.imshow(imagem.array)
+        plt.axis('off')
+        plt.show()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
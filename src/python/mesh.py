@@ -0,0 +1,560 @@
+import numpy as np
+
+from primitives import *
+from shapes import Color, Intersectable
+from bvh import BVH
+from transform import transform_points, transform_vectors
+from lighting import PhongMaterial
+
+
+# Tolerância do teste de Möller–Trumbore para raios paralelos ao triângulo
+EPSILON = 1e-9
+
+
+# Meshes com até esse número de faces dispensam a BVH e são testadas com todas as faces de uma vez
+BRUTE_FORCE_FACES = 16
+
+# Número máximo de pares (raio, triângulo) avaliados de uma vez no teste em lote
+TRIANGLE_BATCH = 1 << 16
+
+
+def moller_trumbore(origins, directions, v0, e1, e2):
+    """
+    Teste de Möller–Trumbore sobre arrays (..., 3) com formatos compatíveis por broadcasting:
+    pares (raio, triângulo) alinhados ou, com eixos extras, todos contra todos.
+    Retorna (t, u, v), com t = inf onde não há interseção e (u, v) as coordenadas baricêntricas
+    do ponto em relação a v1 e v2.
+    """
+    pvec = np.cross(directions, e2)
+    det = (e1 * pvec).sum(axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_det = 1 / det
+
+        tvec = origins - v0
+        u = (tvec * pvec).sum(axis=-1) * inv_det
+
+        qvec = np.cross(tvec, e1)
+        v = (directions * qvec).sum(axis=-1) * inv_det
+        t = (e2 * qvec).sum(axis=-1) * inv_det
+
+    hit = (np.abs(det) > EPSILON) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf), u, v
+
+
+def intersect_triangles(origins, directions, v0, e1, e2):
+    """
+    Teste de Möller–Trumbore vetorizado de cada raio contra cada triângulo.
+    origins: array (R, 3) ou (3,) com as origens dos raios
+    directions: array (R, 3) com as direções dos raios
+    v0: array (T, 3) com o primeiro vértice de cada triângulo
+    e1, e2: arrays (T, 3) com as arestas v1 - v0 e v2 - v0
+    Retorna um array (R, T) com as distâncias, inf onde não há interseção.
+    """
+    origins = np.asarray(origins, dtype=float)
+    t, _, _ = moller_trumbore(origins[:, None, :] if origins.ndim == 2 else origins, directions[:, None, :],
+                              v0[None, :, :], e1[None, :, :], e2[None, :, :])
+    return t
+
+
+def nearest_triangles(origins, directions, v0, e1, e2):
+    """
+    Interseção mais próxima de cada raio entre todos os triângulos, testados em lotes de no
+    máximo TRIANGLE_BATCH pares (raio, triângulo).
+    origins: array (R, 3) ou (3,); directions: array (R, 3)
+    v0, e1, e2: arrays (T, 3), como em intersect_triangles
+    Retorna (t, face, u, v) por raio, com t = inf, face = -1 e u = v = 0 sem interseção; no
+    empate, vence a face de menor índice.
+    """
+    origins = np.asarray(origins, dtype=float)
+    n = len(directions)
+    best_t, best_face = np.full(n, np.inf), np.full(n, -1, dtype=np.int64)
+    best_u, best_v = np.zeros(n), np.zeros(n)
+
+    rows = np.arange(n)
+    o = origins[:, None, :] if origins.ndim == 2 else origins
+    d = directions[:, None, :]
+    step = max(1, TRIANGLE_BATCH // max(n, 1))
+
+    for start in range(0, len(v0), step):
+        batch = slice(start, start + step)
+        t, u, v = moller_trumbore(o, d, v0[None, batch], e1[None, batch], e2[None, batch])
+
+        nearest = t.argmin(axis=1)
+        t = t[rows, nearest]
+        better = t < best_t
+        best_t[better] = t[better]
+        best_face[better] = nearest[better] + start
+        best_u[better] = u[rows, nearest][better]
+        best_v[better] = v[rows, nearest][better]
+
+    return best_t, best_face, best_u, best_v
+
+
+class Triangle(Intersectable):
+    """
+    Triângulo
+
+    Atributos:
+        - p0, p1, p2 (Point3): vértices do triângulo
+        - color (Color): cor do triângulo
+    """
+    def __init__(self, p0: Point3, p1: Point3, p2: Point3, color: Color):
+        self.p0 = p0
+        self.p1 = p1
+        self.p2 = p2
+        self.color = color
+
+        # Arestas a partir de p0, usadas pelo teste de Möller–Trumbore
+        self.e1 = p1 - p0
+        self.e2 = p2 - p0
+
+        if self.e1.cross(self.e2).magnitude() == 0:
+            raise ValueError("Os vértices do triângulo não podem ser colineares.")
+
+    def intersects(self, origin: Point3, direction: Vector3):
+        """
+        Calcula a interseção do raio com o triângulo (Möller–Trumbore).
+        origin: Ponto de origem do raio
+        direction: Vetor direção do raio (normalizado)
+        Retorna a distância positiva ou None se não houver interseção.
+        """
+        pvec = direction.cross(self.e2)
+        det = self.e1.dot(pvec)
+
+        # Raio paralelo ao plano do triângulo
+        if abs(det) < EPSILON:
+            return None
+
+        inv_det = 1 / det
+        tvec = origin - self.p0
+
+        # Coordenadas baricêntricas do ponto de interseção
+        u = tvec.dot(pvec) * inv_det
+        if u < 0 or u > 1:
+            return None
+
+        qvec = tvec.cross(self.e1)
+        v = direction.dot(qvec) * inv_det
+        if v < 0 or u + v > 1:
+            return None
+
+        t = self.e2.dot(qvec) * inv_det
+        return t if t >= 0 else None
+
+    def intersects_rays(self, origins, directions):
+        as_array = lambda p: np.array([[p.x, p.y, p.z]])
+        t, _, _ = moller_trumbore(origins, directions, as_array(self.p0), as_array(self.e1), as_array(self.e2))
+        return t
+
+    def normals_many(self, points, faces=None):
+        n = self.e1.cross(self.e2).normalize_()
+        return np.tile([n.x, n.y, n.z], (len(points), 1))
+
+    def bounds(self):
+        points = (self.p0, self.p1, self.p2)
+        return (tuple(min(getattr(p, a) for p in points) for a in 'xyz'),
+                tuple(max(getattr(p, a) for p in points) for a in 'xyz'))
+
+    def prepare(self, origin: Point3):
+        """
+        Versão de intersects com a origem fixa: tvec, qvec e o numerador de t só dependem da
+        origem e são calculados uma vez.
+        """
+        e1, e2 = self.e1, self.e2
+        tvec = origin - self.p0
+        qvec = tvec.cross(e1)
+        t_numerator = e2.dot(qvec)
+
+        def intersects(direction):
+            pvec = direction.cross(e2)
+            det = e1.dot(pvec)
+            if abs(det) < EPSILON:
+                return None
+
+            inv_det = 1 / det
+            u = tvec.dot(pvec) * inv_det
+            if u < 0 or u > 1:
+                return None
+
+            v = direction.dot(qvec) * inv_det
+            if v < 0 or u + v > 1:
+                return None
+
+            t = t_numerator * inv_det
+            return t if t >= 0 else None
+
+        return intersects
+
+    def intersects_many(self, origin: Point3, directions):
+        """
+        Versão vetorizada de intersects.
+        origin: Ponto de origem dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna um array (N,) com as distâncias, inf onde não há interseção.
+        """
+        as_array = lambda p: np.array([[p.x, p.y, p.z]])
+        return intersect_triangles(as_array(origin)[0], directions,
+                                   as_array(self.p0), as_array(self.e1), as_array(self.e2))[:, 0]
+
+
+class Mesh(Intersectable):
+    """
+    Malha de triângulos acelerada por uma BVH sobre as faces.
+
+    O primeiro vértice, as arestas e a normal de cada face são calculados uma vez, na criação, e
+    guardados em arrays empacotados. Malhas pequenas (até BRUTE_FORCE_FACES faces) não constroem
+    a BVH: cada lote de raios é testado contra todas as faces de uma vez (nearest_triangles).
+
+    Atributos:
+        - vertices (array (V, 3)): coordenadas dos vértices
+        - faces (array (F, 3)): índices dos vértices de cada face
+        - color (Color): cor da malha
+        - material_table, face_material_ids: materiais por face, nas malhas lidas com from_obj
+          (ver Intersectable)
+        - v0, e1, e2 (array (F, 3)): primeiro vértice e arestas v1 - v0 e v2 - v0 de cada face
+        - normals (array (F, 3)): normal unitária de cada face (nula em faces degeneradas)
+        - bvh (BVH ou None): hierarquia de volumes envolventes das faces
+    """
+    def __init__(self, vertices, faces, color: Color, accelerate=None):
+        """
+        accelerate: constrói a BVH (True), testa todas as faces em lote (False) ou decide pelo
+                    número de faces (None)
+        """
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        self.faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        self.color = color
+
+        if len(self.faces) == 0:
+            raise ValueError("A malha precisa ter pelo menos uma face.")
+
+        triangles = self.vertices[self.faces]
+        self.v0 = triangles[:, 0]
+        self.e1 = triangles[:, 1] - self.v0
+        self.e2 = triangles[:, 2] - self.v0
+
+        normals = np.cross(self.e1, self.e2)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        self.normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+        if accelerate is None:
+            accelerate = len(self.faces) > BRUTE_FORCE_FACES
+        self.bvh = BVH(triangles.min(axis=1), triangles.max(axis=1)) if accelerate else None
+
+        # Dados por face em listas Python para a travessia escalar
+        self._triangles = list(zip(self.v0.tolist(), self.e1.tolist(), self.e2.tolist()))
+
+    @classmethod
+    def from_obj(cls, reader, color: Color = None):
+        """
+        Cria a malha a partir de um ObjReader já carregado.
+        reader: ObjReader com os vértices e faces do objeto
+        color: cor da malha (padrão: em cada face, o material do .mtl indicado por usemtl, com a
+               cor difusa nos modos planos e o material completo em Camera.draw_shaded; as
+               faces sem material usam o último material do arquivo)
+        """
+        vertices = reader.get_vertex_array()
+        faces = reader.get_face_indices()
+
+        # Com a cor do material, a malha também usa os materiais das faces no sombreamento
+        material = None
+        if color is None:
+            if reader.cur_material is None:
+                color = Color.WHITE
+            else:
+                kd = reader.get_kd()
+                color = Color(kd.x, kd.y, kd.z)
+                material = PhongMaterial.from_mtl(reader.cur_material)
+
+        mesh = cls(vertices, faces, color)
+        mesh.material = material
+        if material is not None and reader.get_material_table() is not None:
+            mesh.material_table = reader.get_material_table()
+            mesh.face_material_ids = np.asarray(reader.face_material_ids, dtype=np.int32)
+        return mesh
+
+    def __len__(self):
+        return len(self.faces)
+
+    def normals_many(self, points, faces=None):
+        return self.normals[faces]
+
+    def bounds(self):
+        used = self.vertices[self.faces.ravel()]
+        return tuple(used.min(axis=0).tolist()), tuple(used.max(axis=0).tolist())
+
+    def _intersect_leaf(self, origin, direction, faces, best_t):
+        """
+        Testa o raio contra as faces de uma folha da BVH (Möller–Trumbore escalar).
+        Retorna (t, face) da interseção mais próxima que best_t, ou None.
+        """
+        ox, oy, oz = origin
+        dx, dy, dz = direction
+        hit = None
+
+        for face in faces:
+            (px, py, pz), (ax, ay, az), (bx, by, bz) = self._triangles[face]
+
+            # pvec = direction x e2
+            qx = dy * bz - dz * by
+            qy = dz * bx - dx * bz
+            qz = dx * by - dy * bx
+            det = ax * qx + ay * qy + az * qz
+            if -EPSILON < det < EPSILON:
+                continue
+
+            inv_det = 1 / det
+            tx, ty, tz = ox - px, oy - py, oz - pz
+            u = (tx * qx + ty * qy + tz * qz) * inv_det
+            if u < 0 or u > 1:
+                continue
+
+            # qvec = tvec x e1
+            qx = ty * az - tz * ay
+            qy = tz * ax - tx * az
+            qz = tx * ay - ty * ax
+            v = (dx * qx + dy * qy + dz * qz) * inv_det
+            if v < 0 or u + v > 1:
+                continue
+
+            t = (bx * qx + by * qy + bz * qz) * inv_det
+            if 0 <= t < best_t:
+                best_t = t
+                hit = (t, face)
+
+        return hit
+
+    def intersect_faces(self, origins, directions):
+        """
+        Intersecta um lote de raios com a malha, percorrendo a BVH em pacote.
+        origins: array (N, 3) ou (3,) com as origens dos raios
+        directions: array (N, 3) com as direções dos raios
+        Retorna (t, face) por raio, com t = inf e face = -1 sem interseção.
+        """
+        origins = np.asarray(origins, dtype=float)
+        if self.bvh is None:
+            t, face, _, _ = nearest_triangles(origins, directions, self.v0, self.e1, self.e2)
+            return t, face
+
+        def intersect_leaf(rays, faces, best_t):
+            ray_origins = origins[rays] if origins.ndim == 2 else origins
+            t = intersect_triangles(ray_origins, directions[rays], self.v0[faces], self.e1[faces], self.e2[faces])
+            nearest = t.argmin(axis=1)
+            return t[np.arange(len(rays)), nearest], faces[nearest]
+
+        return self.bvh.traverse_many(origins, directions, intersect_leaf)
+
+    def intersect_hits(self, origins, directions):
+        """
+        Como intersect_faces, incluindo as coordenadas baricêntricas do ponto atingido.
+        Retorna (t, face, u, v) por raio, com t = inf, face = -1 e u = v = 0 sem interseção; o
+        ponto é v0 + u * e1 + v * e2 da face.
+        """
+        origins = np.asarray(origins, dtype=float)
+        if self.bvh is None:
+            return nearest_triangles(origins, directions, self.v0, self.e1, self.e2)
+
+        t, face = self.intersect_faces(origins, directions)
+        u, v = np.zeros(len(t)), np.zeros(len(t))
+
+        # Baricêntricas só das faces vencedoras, um par (raio, face) por raio atingido
+        hit = np.flatnonzero(face >= 0)
+        if len(hit):
+            f = face[hit]
+            _, u[hit], v[hit] = moller_trumbore(origins[hit] if origins.ndim == 2 else origins, directions[hit],
+                                                self.v0[f], self.e1[f], self.e2[f])
+        return t, face, u, v
+
+    def intersects(self, origin: Point3, direction: Vector3):
+        """
+        Calcula a interseção do raio com a malha.
+        origin: Ponto de origem do raio
+        direction: Vetor direção do raio (normalizado)
+        Retorna a menor distância positiva ou None se não houver interseção.
+        """
+        hit = self.intersect_ray((origin.x, origin.y, origin.z), (direction.x, direction.y, direction.z))
+        return None if hit is None else hit[0]
+
+    def intersect_ray(self, origin, direction):
+        """
+        Intersecta um raio com a malha, percorrendo a BVH.
+        origin, direction: tuplas (x, y, z); a direção não precisa ser normalizada, e t é medido
+                           em múltiplos dela
+        Retorna (t, face) da interseção mais próxima, ou None.
+        """
+        if self.bvh is None:
+            return self._intersect_leaf(origin, direction, range(len(self.faces)), float('inf'))
+        return self.bvh.traverse(origin, direction, lambda faces, best_t: self._intersect_leaf(origin, direction, faces, best_t))
+
+    def intersects_rays(self, origins, directions):
+        t, _ = self.intersect_faces(origins, directions)
+        return t
+
+    def occluded_ray(self, origin, direction, max_t):
+        """
+        Se o raio atinge alguma face antes de max_t; a travessia para na primeira encontrada.
+        origin, direction: tuplas (x, y, z), como em intersect_ray
+        """
+        if self.bvh is None:
+            return self._intersect_leaf(origin, direction, range(len(self.faces)), max_t) is not None
+        leaf = lambda faces, best_t: self._intersect_leaf(origin, direction, faces, best_t)
+        return self.bvh.traverse(origin, direction, leaf, max_t, any_hit=True) is not None
+
+    def occluded(self, origin: Point3, direction: Vector3, max_t):
+        return self.occluded_ray((origin.x, origin.y, origin.z), (direction.x, direction.y, direction.z), max_t)
+
+    def occluded_many(self, origins, directions, max_t):
+        max_t = np.broadcast_to(np.asarray(max_t, dtype=float), (len(directions),))
+        if self.bvh is None:
+            t, _, _, _ = nearest_triangles(origins, directions, self.v0, self.e1, self.e2)
+            return t < max_t
+
+        def intersect_leaf(rays, faces, best_t):
+            t = intersect_triangles(origins[rays], directions[rays], self.v0[faces], self.e1[faces], self.e2[faces])
+            nearest = t.argmin(axis=1)
+            return t[np.arange(len(rays)), nearest], faces[nearest]
+
+        _, face = self.bvh.traverse_many(origins, directions, intersect_leaf, max_t, any_hit=True)
+        return face >= 0
+
+    def prepare(self, origin: Point3):
+        """
+        Versão de intersects com a origem fixa.
+        """
+        o = (origin.x, origin.y, origin.z)
+        intersect_ray = self.intersect_ray
+
+        def intersects(direction):
+            hit = intersect_ray(o, (direction.x, direction.y, direction.z))
+            return None if hit is None else hit[0]
+
+        return intersects
+
+    def intersects_many(self, origin: Point3, directions):
+        """
+        Versão vetorizada de intersects.
+        origin: Ponto de origem dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna um array (N,) com as distâncias, inf onde não há interseção.
+        """
+        t, _ = self.intersect_faces((origin.x, origin.y, origin.z), directions)
+        return t
+
+
+class Instance(Intersectable):
+    """
+    Instância de uma malha: a geometria e a BVH da malha são compartilhadas por todas as
+    instâncias, e cada uma guarda só a transformação (do espaço do objeto para o do mundo) e a
+    cor. A memória de cada instância não depende do tamanho da malha.
+
+    Os raios são levados para o espaço do objeto pela inversa da transformação; a direção
+    transformada não é normalizada, de modo que a distância t encontrada no espaço do objeto é a
+    mesma do espaço do mundo.
+
+    Atributos:
+        - mesh (Mesh): malha compartilhada
+        - transform (array (4, 4)): transformação afim do objeto para o mundo (ver transform.py)
+        - inverse (array (4, 4)): transformação do mundo para o objeto
+        - color (Color): cor da instância (padrão: a cor e os materiais por face da malha)
+    """
+    def __init__(self, mesh: Mesh, transform=None, color: Color = None):
+        self.mesh = mesh
+        self.transform = np.eye(4) if transform is None else np.array(transform, dtype=float)
+        if self.transform.shape != (4, 4):
+            raise ValueError("A transformação deve ser uma matriz 4x4.")
+        if np.linalg.det(self.transform[:3, :3]) == 0:
+            raise ValueError("A transformação da instância deve ser inversível.")
+
+        self.inverse = np.linalg.inv(self.transform)
+        self.color = mesh.color if color is None else color
+        self.material = mesh.material if color is None else None
+
+        # Sem cor própria, a instância usa os materiais por face da malha
+        if color is None:
+            self.material_table = mesh.material_table
+            self.face_material_ids = mesh.face_material_ids
+
+        # Linhas da inversa em listas Python para o caminho escalar
+        self._inverse_rows = self.inverse[:3].tolist()
+
+    def _to_object(self, point, w):
+        """
+        Leva um ponto (w = 1) ou vetor (w = 0) do mundo para o espaço do objeto, como tupla.
+        """
+        x, y, z = point.x, point.y, point.z
+        return tuple(a * x + b * y + c * z + d * w for a, b, c, d in self._inverse_rows)
+
+    def intersects(self, origin: Point3, direction: Vector3):
+        """
+        Calcula a interseção do raio com a instância.
+        origin: Ponto de origem do raio
+        direction: Vetor direção do raio (normalizado)
+        Retorna a menor distância positiva ou None se não houver interseção.
+        """
+        hit = self.mesh.intersect_ray(self._to_object(origin, 1), self._to_object(direction, 0))
+        return None if hit is None else hit[0]
+
+    def prepare(self, origin: Point3):
+        """
+        Versão de intersects com a origem fixa: a origem é levada ao espaço do objeto uma vez.
+        """
+        o = self._to_object(origin, 1)
+        intersect_ray, to_object = self.mesh.intersect_ray, self._to_object
+
+        def intersects(direction):
+            hit = intersect_ray(o, to_object(direction, 0))
+            return None if hit is None else hit[0]
+
+        return intersects
+
+    def intersects_rays(self, origins, directions):
+        t, _ = self.intersect_faces(origins, directions)
+        return t
+
+    def occluded(self, origin: Point3, direction: Vector3, max_t):
+        return self.mesh.occluded_ray(self._to_object(origin, 1), self._to_object(direction, 0), max_t)
+
+    def occluded_many(self, origins, directions, max_t):
+        return self.mesh.occluded_many(transform_points(self.inverse, origins),
+                                       transform_vectors(self.inverse, directions), max_t)
+
+    def intersects_many(self, origin: Point3, directions):
+        """
+        Versão vetorizada de intersects.
+        origin: Ponto de origem dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna um array (N,) com as distâncias, inf onde não há interseção.
+        """
+        t, _ = self.intersect_faces(np.array([origin.x, origin.y, origin.z]), directions)
+        return t
+
+    def intersect_faces(self, origins, directions):
+        """
+        Intersecta um lote de raios (no espaço do mundo) com a instância.
+        Retorna (t, face) por raio, com t = inf e face = -1 sem interseção.
+        """
+        return self.mesh.intersect_faces(transform_points(self.inverse, np.asarray(origins, dtype=float)),
+                                         transform_vectors(self.inverse, directions))
+
+    def intersect_hits(self, origins, directions):
+        """
+        Como intersect_faces, incluindo as coordenadas baricêntricas (que não mudam com a
+        transformação afim).
+        Retorna (t, face, u, v) por raio.
+        """
+        return self.mesh.intersect_hits(transform_points(self.inverse, np.asarray(origins, dtype=float)),
+                                        transform_vectors(self.inverse, directions))
+
+    def normals_many(self, points, faces=None):
+        """
+        Normais das faces levadas ao espaço do mundo pela transposta da inversa.
+        """
+        normals = self.mesh.normals[faces] @ self.inverse[:3, :3]
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    def bounds(self):
+        (x0, y0, z0), (x1, y1, z1) = self.mesh.bounds()
+        corners = np.array([(x, y, z) for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)], dtype=float)
+        corners = transform_points(self.transform, corners)
+        return tuple(corners.min(axis=0).tolist()), tuple(corners.max(axis=0).tolist())
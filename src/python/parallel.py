@@ -0,0 +1,92 @@
+import ctypes
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from framebuffer import STORAGE, FrameBuffer
+
+
+# Estado de cada processo trabalhador, preenchido por _init_worker
+_worker = {}
+
+
+def tiles(height, width, tile_size):
+    """
+    Divide a tela em blocos (tiles) de no máximo tile_size x tile_size pixels.
+    Retorna uma lista de tuplas (row_start, row_end, col_start, col_end).
+    """
+    if tile_size <= 0:
+        raise ValueError("O tamanho do tile deve ser positivo.")
+
+    return [(i, min(i + tile_size, height), j, min(j + tile_size, width))
+            for i in range(0, height, tile_size)
+            for j in range(0, width, tile_size)]
+
+
+class _SharedStorage:
+    """
+    Expõe um bloco de memória compartilhada como array (via __array_interface__) e a mantém
+    aberta enquanto houver arrays sobre ela: o array criado tem este objeto como base, e o
+    bloco é liberado quando o último array deixa de existir.
+    """
+    def __init__(self, shm, shape, dtype):
+        self.shm = shm
+        # O objeto ctypes só é usado para obter o endereço; ele é descartado em seguida
+        address = ctypes.addressof(ctypes.c_char.from_buffer(shm.buf))
+        self.__array_interface__ = {'version': 3, 'shape': shape, 'typestr': np.dtype(dtype).str, 'data': (address, False)}
+
+
+def _init_worker(camera, objects, shm_name, shape, dtype, gamma):
+    """
+    Inicializa um processo trabalhador: guarda a cena e mapeia o framebuffer compartilhado.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker['camera'] = camera
+    _worker['objects'] = objects
+    _worker['image'] = FrameBuffer.from_storage(np.asarray(_SharedStorage(shm, shape, STORAGE[dtype])), gamma)
+
+
+def _render_tile(tile):
+    """
+    Renderiza um tile e escreve o resultado direto no framebuffer compartilhado.
+    """
+    row_start, row_end, col_start, col_end = tile
+    block = _worker['camera'].render_block(_worker['objects'], row_start, row_end, col_start, col_end)
+    _worker['image'].write(row_start, col_start, block)
+
+
+def draw_parallel(camera, objects, workers=None, tile_size=64, dtype='float32', gamma=None):
+    """
+    Renderiza a cena em paralelo: os tiles são distribuídos entre um pool de
+    processos, que escrevem num framebuffer em memória compartilhada, de modo
+    que nenhum resultado parcial precisa ser serializado de volta.
+    camera: câmera usada para gerar os raios primários
+    objects: lista de Intersectable
+    workers: número de processos (padrão: número de núcleos)
+    tile_size: lado, em pixels, de cada tile
+    dtype: armazenamento do framebuffer ('float32', 'float16' ou 'uint8')
+    gamma: gama do framebuffer (ver FrameBuffer); None grava as cores sem correção
+    Retorna a imagem como FrameBuffer, cujo armazenamento é a própria memória compartilhada
+    (sem cópia); o bloco é liberado quando o framebuffer deixa de ser usado.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("O número de processos deve ser positivo.")
+    if dtype not in STORAGE:
+        raise ValueError(f"Tipo de armazenamento não suportado: {dtype} (use {', '.join(STORAGE)})")
+
+    shape = (camera.height_resolution, camera.width_resolution, 3)
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(STORAGE[dtype]).itemsize)
+
+    try:
+        image = FrameBuffer.from_storage(np.asarray(_SharedStorage(shm, shape, STORAGE[dtype])), gamma)
+        initargs = (camera, objects, shm.name, shape, dtype, gamma)
+        with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            for _ in pool.imap_unordered(_render_tile, tiles(shape[0], shape[1], tile_size)):
+                pass
+    finally:
+        # Só o nome é removido; o mapeamento continua válido enquanto o framebuffer existir
+        shm.unlink()
+
+    return image
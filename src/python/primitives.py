@@ -10,6 +10,8 @@ class Point3:
         y (float): Coordenada Y do ponto
         z (float): Coordenada Z do ponto
     """
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
@@ -39,6 +41,27 @@ class Point3:
             return (dx**2 + dy**2 + dz**2)**(1/2)
         else:
             raise TypeError("Cálculo da distância requer um Point3")
+
+    def dist_squared(self, other):
+        """
+        Quadrado da distância até other, sem criar o vetor intermediário.
+        """
+        dx = self.x - other.x
+        dy = self.y - other.y
+        dz = self.z - other.z
+        return dx * dx + dy * dy + dz * dz
+
+    def madd(self, v, escalar):
+        """
+        Operação fundida self + v * escalar, com uma única alocação.
+        """
+        return Point3(self.x + v.x * escalar, self.y + v.y * escalar, self.z + v.z * escalar)
+
+    def add_sub(self, v, p):
+        """
+        Operação fundida (self + v) - p, que retorna o Vector3 com uma única alocação.
+        """
+        return Vector3(self.x + v.x - p.x, self.y + v.y - p.y, self.z + v.z - p.z)
     
 class Vector3:
     """
@@ -49,6 +72,8 @@ class Vector3:
         - y (float): Componente Y do vetor
         - z (float): Componente Z do vetor
     """
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
@@ -88,6 +113,12 @@ class Vector3:
         if isinstance(other, Vector3):
             return self.x * other.x + self.y * other.y + self.z * other.z
         raise TypeError("Produto escalar requer um Vector3")
+
+    def dot_sub(self, a, b):
+        """
+        Operação fundida (a - b).dot(self), sem criar o vetor a - b.
+        """
+        return (a.x - b.x) * self.x + (a.y - b.y) * self.y + (a.z - b.z) * self.z
     
     def cross(self, other):
         if isinstance(other, Vector3):
@@ -105,4 +136,16 @@ class Vector3:
         mag = self.magnitude()
         if mag == 0:
             raise ValueError("Não é possível normalizar um vetor nulo")
-        return self / mag
\ No newline at end of file
+        return self / mag
+
+    def normalize_(self):
+        """
+        Normaliza o vetor no próprio objeto, sem alocação. Retorna o próprio vetor.
+        """
+        mag = self.magnitude()
+        if mag == 0:
+            raise ValueError("Não é possível normalizar um vetor nulo")
+        self.x = self.x / mag
+        self.y = self.y / mag
+        self.z = self.z / mag
+        return self
\ No newline at end of file
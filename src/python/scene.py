@@ -0,0 +1,461 @@
+import numpy as np
+
+from primitives import *
+from shapes import Color, Plane, Sphere, sphere_distances
+from grid import UniformGrid
+
+
+# Raios por bloco e limite de elementos das matrizes (objetos x raios) de cada lote
+RAY_BLOCK = 8192
+BATCH_ELEMENTS = 1 << 16
+
+# A partir de quantas esferas a cena usa uma grade uniforme em vez de testar todas
+GRID_MIN_SPHERES = 32
+
+
+class CompiledScene:
+    """
+    Cena compilada: os objetos são agrupados por tipo em arrays contíguos, e a interseção roda
+    por tipo sobre esses arrays (um lote de raios contra todas as esferas, depois contra todos os
+    planos), sem despacho dinâmico por objeto. A mesma cena compilada pode ser reutilizada em
+    vários quadros.
+
+    Com muitas esferas (GRID_MIN_SPHERES ou mais), elas são indexadas por uma grade uniforme
+    (UniformGrid) e cada raio só testa as esferas das células que atravessa; os planos, que não
+    são limitados, continuam numa lista à parte testada por todos os raios.
+
+    Objetos de outros tipos (malhas, triângulos, ...) ficam numa lista à parte e usam o próprio
+    intersects_many (as malhas já têm a própria BVH).
+
+    Atributos:
+        - objects (list): objetos originais, na ordem da lista
+        - palette (array (C, 3)): cores distintas da cena; o índice 0 é o fundo (preto)
+        - object_colors (array (N + 1,)): índice na paleta da cor de cada objeto, deslocado de 1
+          (a posição 0 corresponde a "nenhum objeto")
+        - sphere_centers (array (S, 3)), sphere_radii (array (S,)), sphere_ids (array (S,))
+        - plane_points (array (P, 3)), plane_normals (array (P, 3)), plane_ids (array (P,))
+        - others (list[(int, Intersectable)]): demais objetos com seus índices
+        - face_colored (list[(int, Intersectable)]): objetos com materiais por face, cuja cor
+          depende da face atingida; as tabelas de materiais são atualizadas (refresh) na
+          compilação
+        - grid (UniformGrid ou None): grade sobre as esferas; as primitivas da grade são as
+          posições nos arrays sphere_*
+    """
+    def __init__(self, objects):
+        self.objects = list(objects)
+
+        colors = {(Color.BLACK.r, Color.BLACK.g, Color.BLACK.b): 0}
+        object_colors = [0]
+        spheres, planes, self.others = [], [], []
+
+        for k, obj in enumerate(self.objects):
+            rgb = (obj.color.r, obj.color.g, obj.color.b)
+            object_colors.append(colors.setdefault(rgb, len(colors)))
+
+            if type(obj) is Sphere:
+                spheres.append((k, obj))
+            elif type(obj) is Plane:
+                planes.append((k, obj))
+            else:
+                self.others.append((k, obj))
+
+        self.palette = np.array(list(colors), dtype=float)
+        self.object_colors = np.array(object_colors, dtype=np.intp)
+
+        self.face_colored = [(k, obj) for k, obj in enumerate(self.objects) if obj.face_material_ids is not None]
+        for table in {id(obj.material_table): obj.material_table for _, obj in self.face_colored}.values():
+            table.refresh()
+
+        self.sphere_ids = np.array([k for k, _ in spheres], dtype=np.intp)
+        self.sphere_centers = np.array([(s.center.x, s.center.y, s.center.z) for _, s in spheres], dtype=float).reshape(-1, 3)
+        self.sphere_radii = np.array([s.radius for _, s in spheres], dtype=float)
+
+        self.plane_ids = np.array([k for k, _ in planes], dtype=np.intp)
+        self.plane_points = np.array([(p.point.x, p.point.y, p.point.z) for _, p in planes], dtype=float).reshape(-1, 3)
+        self.plane_normals = np.array([(p.normal.x, p.normal.y, p.normal.z) for _, p in planes], dtype=float).reshape(-1, 3)
+
+        self.grid = None
+        if len(spheres) >= GRID_MIN_SPHERES:
+            radii = self.sphere_radii[:, None]
+            self.grid = UniformGrid(self.sphere_centers - radii, self.sphere_centers + radii)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __getitem__(self, index):
+        return self.objects[index]
+
+    def intersect(self, origin: Point3, directions, stats=None):
+        """
+        Intersecta um lote de raios com a mesma origem com toda a cena.
+        origin: ponto de origem dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        stats: RenderStats opcional, que recebe os contadores por objeto
+        Retorna (t, índice do objeto) por raio, com t = inf e índice = -1 sem interseção.
+        Em caso de empate, vence o objeto que vem antes na lista, como em Camera.draw.
+        """
+        n = len(directions)
+        best_t = np.full(n, np.inf)
+        best_id = np.full(n, -1, dtype=np.intp)
+        o = np.array([origin.x, origin.y, origin.z])
+
+        kernels = (self._sphere_batches, self._plane_batches)
+        if self.grid is not None:
+            t, spheres = self._intersect_grid(o, directions, stats)
+            hit = spheres >= 0
+            best_t[hit] = t[hit]
+            best_id[hit] = self.sphere_ids[spheres[hit]]
+            kernels = (self._plane_batches,)
+
+        # Os raios são processados em blocos, e os objetos de cada tipo em lotes, de modo que as
+        # matrizes intermediárias (objetos x raios) caibam no cache
+        for start in range(0, n, RAY_BLOCK):
+            rays = slice(start, min(start + RAY_BLOCK, n))
+            # Componentes das direções contíguas (estrutura de arrays)
+            block = np.ascontiguousarray(directions[rays].T)
+            for kernel in kernels:
+                for distances, ids in kernel(o, block):
+                    self._merge(best_t[rays], best_id[rays], distances, ids, stats)
+
+        for k, obj in self.others:
+            self._merge(best_t, best_id, obj.intersects_many(origin, directions)[None, :], np.array([k]), stats)
+
+        if stats is not None:
+            visible = np.bincount(best_id + 1, minlength=len(self.objects) + 1)[1:]
+            for k, count in enumerate(visible.tolist()):
+                stats.record(k, 0, 0, count)
+
+        return best_t, best_id
+
+    def intersect_rays(self, origins, directions):
+        """
+        Versão de intersect com uma origem por raio, para os raios secundários (refletidos e
+        refratados), que partem cada um de um ponto da cena.
+        origins: array (N, 3) com as origens dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna (t, índice do objeto) por raio, com t = inf e índice = -1 sem interseção; no
+        empate, vence o objeto que vem antes na lista.
+        """
+        n = len(directions)
+        best_t = np.full(n, np.inf)
+        best_id = np.full(n, -1, dtype=np.intp)
+
+        spheres = np.arange(len(self.sphere_ids))
+        if self.grid is not None:
+            def intersect_pairs(rays, spheres):
+                return sphere_distances(origins[rays], directions[rays], self.sphere_centers[spheres], self.sphere_radii[spheres])
+
+            t, found = self.grid.traverse_many(origins, directions, intersect_pairs)
+            hit = found >= 0
+            best_t[hit] = t[hit]
+            best_id[hit] = self.sphere_ids[found[hit]]
+            spheres = spheres[:0]
+
+        for batch in self._batches(len(spheres), n):
+            s = spheres[batch]
+            distances = sphere_distances(origins[None], directions[None], self.sphere_centers[s, None], self.sphere_radii[s, None])
+            self._merge(best_t, best_id, distances, self.sphere_ids[s], None)
+
+        for batch in self._batches(len(self.plane_ids), n):
+            normals = self.plane_normals[batch]
+            numerator = ((self.plane_points[batch, None] - origins[None]) * normals[:, None]).sum(axis=2)
+            denominator = normals @ directions.T
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = numerator / denominator
+            t[(np.abs(denominator) < 1e-6) | ~(t >= 0)] = np.inf
+            self._merge(best_t, best_id, t, self.plane_ids[batch], None)
+
+        for k, obj in self.others:
+            self._merge(best_t, best_id, obj.intersects_rays(origins, directions)[None, :], np.array([k]), None)
+
+        return best_t, best_id
+
+    def occluded(self, origins, directions, max_t):
+        """
+        Consulta de visibilidade para raios de sombra: se cada raio atinge algum objeto antes
+        de max_t. Diferente de intersect, não procura a interseção mais próxima: cada raio sai
+        dos testes na primeira interseção encontrada, e os objetos seguintes só são testados
+        com os raios ainda livres.
+        origins: array (N, 3) ou (3,) com as origens dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        max_t: array (N,) ou número com a distância máxima (por exemplo, até a luz)
+        Retorna um array booleano (N,).
+        """
+        n = len(directions)
+        origins = np.broadcast_to(np.asarray(origins, dtype=float), (n, 3))
+        max_t = np.broadcast_to(np.asarray(max_t, dtype=float), (n,))
+        blocked = np.zeros(n, dtype=bool)
+
+        candidates = [(k, self.objects[k]) for k in self.plane_ids.tolist()] + self.others
+        if self.grid is None:
+            candidates = [(k, self.objects[k]) for k in self.sphere_ids.tolist()] + candidates
+        else:
+            def intersect_pairs(rays, spheres):
+                return sphere_distances(origins[rays], directions[rays], self.sphere_centers[spheres], self.sphere_radii[spheres])
+
+            _, spheres = self.grid.traverse_many(origins, directions, intersect_pairs, max_t, any_hit=True)
+            blocked = spheres >= 0
+
+        active = np.flatnonzero(~blocked)
+        for _, obj in candidates:
+            if len(active) == 0:
+                break
+            hit = obj.occluded_many(origins[active], directions[active], max_t[active])
+            blocked[active[hit]] = True
+            active = active[~hit]
+
+        return blocked
+
+    def surface(self, origin, directions, t, object_ids, normals=True):
+        """
+        Face atingida e normal da superfície nos pontos de interseção de intersect.
+        origin: array (3,) com a origem dos raios, ou (N, 3) com uma origem por raio
+        directions: array (N, 3); t, object_ids: resultado de intersect ou intersect_rays
+        Retorna (faces (N,), normais (N, 3) ou None), com face = -1 em objetos sem faces e
+        normal nula sem interseção.
+        """
+        n = len(directions)
+        face_ids = np.full(n, -1, dtype=np.int32)
+        hit_normals = np.zeros((n, 3)) if normals else None
+
+        # Raios agrupados por objeto atingido: a face e a normal são calculadas por objeto
+        order = np.argsort(object_ids, kind='stable')
+        ids, starts = np.unique(object_ids[order], return_index=True)
+        for k, rays in zip(ids.tolist(), np.split(order, starts[1:])):
+            if k < 0:
+                continue
+            obj = self.objects[k]
+            o = origin[rays] if origin.ndim == 2 else origin
+            if hasattr(obj, 'intersect_faces'):
+                _, face_ids[rays] = obj.intersect_faces(o, directions[rays])
+            if normals:
+                points = o + directions[rays] * t[rays, None]
+                hit_normals[rays] = obj.normals_many(points, face_ids[rays])
+
+        return face_ids, hit_normals
+
+    def prepare(self, origin: Point3):
+        """
+        Versão escalar de intersect para raios com a mesma origem (ver Intersectable.prepare).
+        Retorna uma função direction -> índice do objeto mais próximo (-1 sem interseção).
+        """
+        grid = self.grid
+        in_grid = set(self.sphere_ids.tolist()) if grid is not None else set()
+        linear = [(k, obj.prepare(origin)) for k, obj in enumerate(self.objects) if k not in in_grid]
+
+        if grid is None:
+            def closest(direction):
+                best_t, best = float('inf'), -1
+                for k, intersects in linear:
+                    t = intersects(direction)
+                    if t is not None and t < best_t:
+                        best_t, best = t, k
+                return best
+            return closest
+
+        spheres = [self.objects[k].prepare(origin) for k in self.sphere_ids.tolist()]
+        sphere_ids = self.sphere_ids.tolist()
+        traverse = grid.traverse
+        o = (origin.x, origin.y, origin.z)
+
+        def closest(direction):
+            best_t, best = float('inf'), -1
+            for k, intersects in linear:
+                t = intersects(direction)
+                if t is not None and t < best_t:
+                    best_t, best = t, k
+
+            hit = traverse(o, (direction.x, direction.y, direction.z), lambda s: spheres[s](direction), best_t)
+            if hit is not None and (hit[0] < best_t or sphere_ids[hit[1]] < best):
+                best = sphere_ids[hit[1]]
+            return best
+
+        return closest
+
+    def colors(self, object_ids, face_ids=None):
+        """
+        Cores dos objetos de índices object_ids (-1 é o fundo). Com face_ids (de surface ou
+        material_faces, no formato de object_ids), os pontos dos objetos com materiais por face
+        recebem a cor difusa do material da face atingida.
+        """
+        colors = self.palette[self.object_colors[object_ids + 1]]
+        if face_ids is None or not self.face_colored:
+            return colors
+
+        flat, ids, faces = colors.reshape(-1, 3), np.ravel(object_ids), np.ravel(face_ids)
+        for k, obj in self.face_colored:
+            rays = np.flatnonzero(ids == k)
+            rays = rays[faces[rays] >= 0]
+            materials = obj.face_material_ids[faces[rays]]
+            flat[rays[materials >= 0]] = obj.material_table.kd[materials[materials >= 0]]
+        return colors
+
+    def material_faces(self, origin, directions, object_ids):
+        """
+        Faces atingidas pelos raios, calculadas só nos objetos com materiais por face (os únicos
+        em que colors usa a face); None se a cena não tem esses objetos.
+        origin: array (3,) com a origem dos raios
+        directions: array (..., 3) com as direções dos raios; object_ids: array (...) com o
+                    objeto atingido por cada raio
+        Retorna um array no formato de object_ids, com -1 nos demais raios.
+        """
+        if not self.face_colored:
+            return None
+
+        ids, directions = np.ravel(object_ids), directions.reshape(-1, 3)
+        face_ids = np.full(len(ids), -1, dtype=np.int32)
+        for k, obj in self.face_colored:
+            rays = np.flatnonzero(ids == k)
+            if len(rays):
+                _, face_ids[rays] = obj.intersect_faces(origin, directions[rays])
+        return face_ids.reshape(np.shape(object_ids))
+
+    @staticmethod
+    def _batches(count, rays):
+        step = max(1, BATCH_ELEMENTS // max(rays, 1))
+        for start in range(0, count, step):
+            yield slice(start, min(start + step, count))
+
+    def _sphere_batches(self, o, directions):
+        """
+        Distâncias (lote, raios) dos raios a cada lote de esferas, com as mesmas operações de
+        Sphere.intersects_many.
+        """
+        dx, dy, dz = directions
+
+        for batch in self._batches(len(self.sphere_ids), len(dx)):
+            distance = self.sphere_centers[batch] - o
+            ex, ey, ez = distance[:, 0, None], distance[:, 1, None], distance[:, 2, None]
+            square_distance = ex * ex + ey * ey + ez * ez
+            square_radius = (self.sphere_radii[batch] * self.sphere_radii[batch])[:, None]
+
+            proj_length = dx * ex
+            proj_length += dy * ey
+            proj_length += dz * ez
+
+            # square_radius - square_d, com square_d = square_distance - proj_length ** 2
+            discriminant = proj_length * proj_length
+            np.subtract(square_distance, discriminant, out=discriminant)
+            np.subtract(square_radius, discriminant, out=discriminant)
+
+            # Raios no sentido oposto ao centro só atingem a esfera se partem de dentro dela
+            miss = discriminant < 0
+            miss |= (proj_length < 0) & (square_distance >= square_radius)
+
+            thc = np.sqrt(np.maximum(discriminant, 0.0, out=discriminant), out=discriminant)
+            t = proj_length - thc
+            np.add(proj_length, thc, out=proj_length, where=t <= 0)
+            np.copyto(t, proj_length, where=t <= 0)
+            t[miss] = np.inf
+
+            yield t, self.sphere_ids[batch]
+
+    def _intersect_grid(self, o, directions, stats):
+        """
+        Intersecta os raios com as esferas percorrendo a grade, com as mesmas operações de
+        _sphere_batches para cada par (raio, esfera) testado.
+        Retorna (t, posição da esfera nos arrays sphere_*) por raio, -1 sem interseção.
+        """
+        # Termos que só dependem da origem, calculados uma vez para todas as esferas
+        distance = self.sphere_centers - o
+        ex, ey, ez = distance[:, 0], distance[:, 1], distance[:, 2]
+        square_distance = ex * ex + ey * ey + ez * ez
+        square_radius = self.sphere_radii * self.sphere_radii
+
+        count = len(self.sphere_ids)
+        tests = np.zeros(count, dtype=np.int64)
+        hits = np.zeros(count, dtype=np.int64)
+
+        def intersect_pairs(rays, spheres):
+            d = directions[rays]
+            proj_length = d[:, 0] * ex[spheres]
+            proj_length += d[:, 1] * ey[spheres]
+            proj_length += d[:, 2] * ez[spheres]
+
+            discriminant = proj_length * proj_length
+            np.subtract(square_distance[spheres], discriminant, out=discriminant)
+            np.subtract(square_radius[spheres], discriminant, out=discriminant)
+
+            miss = discriminant < 0
+            miss |= (proj_length < 0) & (square_distance[spheres] >= square_radius[spheres])
+
+            thc = np.sqrt(np.maximum(discriminant, 0.0, out=discriminant), out=discriminant)
+            t = proj_length - thc
+            np.add(proj_length, thc, out=proj_length, where=t <= 0)
+            np.copyto(t, proj_length, where=t <= 0)
+            t[miss] = np.inf
+
+            if stats is not None:
+                tests[:] += np.bincount(spheres, minlength=count)
+                hits[:] += np.bincount(spheres[~miss], minlength=count)
+            return t
+
+        t, spheres = self.grid.traverse_many(o, directions, intersect_pairs)
+
+        if stats is not None:
+            for s, k in enumerate(self.sphere_ids.tolist()):
+                stats.record(k, int(tests[s]), int(hits[s]), 0)
+        return t, spheres
+
+    def _plane_batches(self, o, directions):
+        """
+        Distâncias (lote, raios) dos raios a cada lote de planos, com as mesmas operações de
+        Plane.intersects_many.
+        """
+        dx, dy, dz = directions
+
+        for batch in self._batches(len(self.plane_ids), len(dx)):
+            normals = self.plane_normals[batch]
+            offset = self.plane_points[batch] - o
+            nx, ny, nz = normals[:, 0, None], normals[:, 1, None], normals[:, 2, None]
+            numerator = offset[:, 0, None] * nx + offset[:, 1, None] * ny + offset[:, 2, None] * nz
+
+            denominator = dx * nx
+            denominator += dy * ny
+            denominator += dz * nz
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = numerator / denominator
+
+            miss = np.abs(denominator) < 1e-6
+            miss |= ~(t >= 0)
+            t[miss] = np.inf
+
+            yield t, self.plane_ids[batch]
+
+    @staticmethod
+    def _merge(best_t, best_id, distances, ids, stats):
+        """
+        Combina as distâncias (lote, raios) de um lote de objetos com a melhor interseção de
+        cada raio. best_t e best_id são atualizados no lugar.
+        """
+        if len(distances) == 1:
+            t, k = distances[0], ids[0]
+            closer = t < best_t
+            closer |= (t == best_t) & (k < best_id) & (t < np.inf)
+            best_t[closer] = t[closer]
+            best_id[closer] = k
+        else:
+            nearest = distances.argmin(axis=0)
+            t = np.take_along_axis(distances, nearest[None, :], axis=0)[0]
+            k = ids[nearest]
+            closer = t < best_t
+            closer |= (t == best_t) & (k < best_id) & (t < np.inf)
+            best_t[closer] = t[closer]
+            best_id[closer] = k[closer]
+
+        if stats is not None:
+            hits = np.isfinite(distances).sum(axis=1)
+            for obj, count in zip(ids.tolist(), hits.tolist()):
+                stats.record(obj, distances.shape[1], count, 0)
+
+
+def compile_scene(objects):
+    """
+    Compila a lista de objetos, se ainda não for uma cena compilada.
+    """
+    return objects if isinstance(objects, CompiledScene) else CompiledScene(objects)
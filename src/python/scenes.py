@@ -0,0 +1,77 @@
+"""
+Cenas de teste, usadas pelo main.py e pelos benchmarks.
+
+Cada cena é uma função que recebe o módulo de formas do backend (python/shapes.py ou
+cython_classes/shapes.py, que também expõem Point3 e Vector3) e retorna a lista de objetos,
+de modo que a mesma cena possa ser renderizada por qualquer backend.
+Todas são vistas pela câmera na origem, olhando para (0, 0, -1).
+"""
+
+CINZA = (0.5, 0.5, 0.5)
+
+
+def cena_inicial(b):
+    esfera1 = b.Sphere(b.Point3(0, 0, -3), 1, b.Color(1, 0, 0))
+    esfera2 = b.Sphere(b.Point3(2, 0, -4), 1, b.Color(0, 1, 0))
+    plano = b.Plane(b.Point3(0, -1, 0), b.Vector3(0, 1, 0), b.Color(*CINZA))
+    return [esfera1, esfera2, plano]
+
+
+def esfera_na_frente(b):
+    # Esfera vermelha na frente da esfera verde
+    esfera1 = b.Sphere(b.Point3(0, 0, -3), 1, b.Color(1, 0, 0))
+    esfera2 = b.Sphere(b.Point3(0, 0, -6), 1, b.Color(0, 1, 0))
+    plano = b.Plane(b.Point3(0, -1, 0), b.Vector3(0, 1, 0), b.Color(*CINZA))
+    return [esfera1, esfera2, plano]
+
+
+def esferas_lado_a_lado(b):
+    esfera1 = b.Sphere(b.Point3(-1.5, 0, -3), 1, b.Color(1, 0, 0))
+    esfera2 = b.Sphere(b.Point3(1.5, 0, -3), 1, b.Color(0, 1, 0))
+    plano = b.Plane(b.Point3(0, -1, 0), b.Vector3(0, 1, 0), b.Color(*CINZA))
+    return [esfera1, esfera2, plano]
+
+
+def esferas_sobrepostas(b):
+    # Esferas parcialmente sobrepostas
+    esfera1 = b.Sphere(b.Point3(0, 0, -3), 1, b.Color(1, 0, 0))
+    esfera2 = b.Sphere(b.Point3(0.5, 0, -3.5), 1, b.Color(0, 1, 0))
+    plano = b.Plane(b.Point3(0, -1, 0), b.Vector3(0, 1, 0), b.Color(*CINZA))
+    return [esfera1, esfera2, plano]
+
+
+def esfera_flutuante(b):
+    # Esfera flutuante acima do plano
+    esfera1 = b.Sphere(b.Point3(0, 1, -3), 1, b.Color(1, 0, 0))
+    plano = b.Plane(b.Point3(0, -1, 0), b.Vector3(0, 1, 0), b.Color(*CINZA))
+    return [esfera1, plano]
+
+
+def parede(b):
+    # Plano vertical como parede
+    plano = b.Plane(b.Point3(0, 0, -5), b.Vector3(0, 0, 1), b.Color(0.8, 0.8, 0.2))
+    return [plano]
+
+
+def chao_e_parede(b):
+    # Plano horizontal e plano vertical (chão e parede)
+    plano_chao = b.Plane(b.Point3(0, -1, 0), b.Vector3(0, 1, 0), b.Color(*CINZA))
+    plano_parede = b.Plane(b.Point3(0, 0, -5), b.Vector3(0, 0, 1), b.Color(0.8, 0.8, 0.2))
+    return [plano_chao, plano_parede]
+
+
+def plano_inclinado(b):
+    plano = b.Plane(b.Point3(0, -1, 0), b.Vector3(1, 1, 0), b.Color(0.2, 0.6, 0.8))
+    return [plano]
+
+
+SCENES = {
+    'cena_inicial': cena_inicial,
+    'esfera_na_frente': esfera_na_frente,
+    'esferas_lado_a_lado': esferas_lado_a_lado,
+    'esferas_sobrepostas': esferas_sobrepostas,
+    'esfera_flutuante': esfera_flutuante,
+    'parede': parede,
+    'chao_e_parede': chao_e_parede,
+    'plano_inclinado': plano_inclinado,
+}
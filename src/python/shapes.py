@@ -1,16 +1,143 @@
+import numpy as np
+
 from primitives import *
 
 
+def sphere_distances(origins, directions, centers, radii):
+    """
+    Interseção de raios com esferas, par a par, com as mesmas operações de Sphere.intersects
+    (arrays (..., 3) e (...,) com formatos compatíveis por broadcasting). Raios que partem de
+    dentro da esfera (como os refratados) atingem a saída, mesmo se apontam para longe do centro.
+    Retorna as menores distâncias positivas, inf onde não há interseção.
+    """
+    distance = centers - origins
+    proj_length = (directions * distance).sum(axis=-1)
+    square_distance = (distance * distance).sum(axis=-1)
+    square_d = square_distance - proj_length * proj_length
+    square_radius = radii * radii
+
+    hit = ((proj_length >= 0) | (square_distance < square_radius)) & (square_d <= square_radius)
+
+    thc = np.sqrt(np.where(hit, square_radius - square_d, 0.0))
+    inter_1 = proj_length - thc
+    inter_2 = proj_length + thc
+    return np.where(hit, np.where(inter_1 > 0, inter_1, inter_2), np.inf)
+
+
 class Intersectable:
     """
     Classe abstrata para superfícies que podem ter interseções com raios da câmera.
+
+    O atributo opcional material (lighting.PhongMaterial) é usado pelo sombreamento de
+    Camera.draw_shaded; sem ele, o material é derivado da cor do objeto.
+
+    Objetos com materiais por face (malhas lidas com Mesh.from_obj) têm também material_table
+    (MaterialTable do .mtl) e face_material_ids (índice do material de cada face, -1 se ausente);
+    nas faces com material, a cor e o sombreamento vêm do material da face.
     """
+    material = None
+    material_table = None
+    face_material_ids = None
+
     def __init__(self):
         raise Exception("Esta classe não é instanciável")
     
     def intersects():
         pass
 
+    def prepare(self, origin):
+        """
+        Prepara o teste de interseção para vários raios com a mesma origem (os raios primários
+        de um quadro, que partem de Camera.position, ou os raios de sombra que partem de um
+        mesmo ponto de interseção).
+        origin: ponto de origem comum dos raios
+        Retorna uma função direction -> distância (ou None), equivalente a
+        intersects(origin, direction), que só faz as contas que dependem da direção.
+
+        Implementação genérica que apenas fixa a origem; as subclasses sobrescrevem
+        pré-calculando os termos que dependem só da origem.
+        """
+        intersects = self.intersects
+        return lambda direction: intersects(origin, direction)
+
+    def bounds(self):
+        """
+        Caixa alinhada aos eixos que contém o objeto, como tuplas ((x, y, z) mínimo, (x, y, z)
+        máximo), ou None se o objeto não for limitado (como um plano).
+        """
+        return None
+
+    def intersects_many(self, origin, directions):
+        """
+        Calcula a interseção de um lote de raios com a mesma origem.
+        origin: ponto de origem dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna um array (N,) com as distâncias, inf onde não há interseção.
+
+        Implementação genérica que chama intersects raio a raio; as subclasses
+        sobrescrevem com a versão vetorizada.
+        """
+        distances = np.full(len(directions), np.inf)
+        for k, (x, y, z) in enumerate(directions.tolist()):
+            t = self.intersects(origin, Vector3(x, y, z))
+            if t is not None:
+                distances[k] = t
+        return distances
+
+    def intersects_rays(self, origins, directions):
+        """
+        Versão vetorizada de intersects com uma origem por raio (raios secundários).
+        origins: array (N, 3) com as origens dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna um array (N,) com as distâncias, inf onde não há interseção.
+
+        Implementação genérica que chama intersects raio a raio; as subclasses
+        sobrescrevem com a versão vetorizada.
+        """
+        distances = np.full(len(directions), np.inf)
+        for k, (o, d) in enumerate(zip(origins.tolist(), directions.tolist())):
+            t = self.intersects(Point3(*o), Vector3(*d))
+            if t is not None:
+                distances[k] = t
+        return distances
+
+    def occluded(self, origin, direction, max_t):
+        """
+        Consulta de visibilidade (raio de sombra): se o raio atinge o objeto antes de max_t.
+        origin: ponto de origem do raio
+        direction: vetor direção do raio (normalizado)
+        Retorna True ou False. As subclasses com várias primitivas sobrescrevem para parar na
+        primeira interseção encontrada, sem procurar a mais próxima.
+        """
+        t = self.intersects(origin, direction)
+        return t is not None and t < max_t
+
+    def occluded_many(self, origins, directions, max_t):
+        """
+        Versão vetorizada de occluded, com uma origem por raio.
+        origins: array (N, 3) com as origens dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        max_t: array (N,) com a distância máxima de cada raio
+        Retorna um array booleano (N,).
+
+        Implementação genérica que chama occluded raio a raio; as subclasses
+        sobrescrevem com a versão vetorizada.
+        """
+        blocked = np.zeros(len(directions), dtype=bool)
+        for k, (o, d, t) in enumerate(zip(origins.tolist(), directions.tolist(), np.asarray(max_t).tolist())):
+            blocked[k] = self.occluded(Point3(*o), Vector3(*d), t)
+        return blocked
+
+    def normals_many(self, points, faces=None):
+        """
+        Normais unitárias da superfície nos pontos de interseção.
+        points: array (N, 3) com pontos sobre o objeto
+        faces: array (N,) com a face atingida em cada ponto, para objetos com faces (ou None)
+        Retorna um array (N, 3). Implementação genérica, para objetos sem normal conhecida,
+        que devolve vetores nulos.
+        """
+        return np.zeros((len(points), 3))
+
 class Color:
     def __init__(self, r: float, g: float, b: float):
         self.r: float = r
@@ -55,11 +182,61 @@ class Plane(Intersectable):
             return None
         
         # Hipotenusa (distância da interseção) = cateto oposto / seno
-        t = (self.point - origin).dot(self.normal) / denominator
+        t = self.normal.dot_sub(self.point, origin) / denominator
 
         # Hipotenusa "negativa": raio está se afastando do plano
         return t if t >= 0 else None
 
+    def prepare(self, origin):
+        """
+        Versão de intersects com a origem fixa: o numerador (distância da origem ao plano ao
+        longo da normal) é calculado uma vez.
+        """
+        nx, ny, nz = self.normal.x, self.normal.y, self.normal.z
+        numerator = self.normal.dot_sub(self.point, origin)
+
+        def intersects(direction):
+            denominator = nx * direction.x + ny * direction.y + nz * direction.z
+            if abs(denominator) < 1e-6:
+                return None
+            t = numerator / denominator
+            return t if t >= 0 else None
+
+        return intersects
+
+    def intersects_many(self, origin, directions):
+        """
+        Versão vetorizada de intersects.
+        origin: ponto de origem dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna um array (N,) com as distâncias, inf onde não há interseção.
+        """
+        normal = self.normal
+        denominator = directions[:, 0] * normal.x + directions[:, 1] * normal.y + directions[:, 2] * normal.z
+
+        # O numerador só depende da origem, comum a todos os raios
+        numerator = (self.point - origin).dot(normal)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = numerator / denominator
+
+        return np.where((np.abs(denominator) >= 1e-6) & (t >= 0), t, np.inf)
+
+    def intersects_rays(self, origins, directions):
+        normal = np.array([self.normal.x, self.normal.y, self.normal.z])
+        denominator = directions @ normal
+        numerator = (np.array([self.point.x, self.point.y, self.point.z]) - origins) @ normal
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = numerator / denominator
+        return np.where((np.abs(denominator) >= 1e-6) & (t >= 0), t, np.inf)
+
+    def occluded_many(self, origins, directions, max_t):
+        return self.intersects_rays(origins, directions) < max_t
+
+    def normals_many(self, points, faces=None):
+        return np.tile([self.normal.x, self.normal.y, self.normal.z], (len(points), 1))
+
 class Sphere(Intersectable):
     """
     Esfera
@@ -81,24 +258,24 @@ class Sphere(Intersectable):
         Calcula a interseção do raio com a esfera.
         origin: Ponto de origem do raio
         direction: Vetor direção do raio (normalizado)
-        Retorna a menor distância positiva ou None se não houver interseção.
+        Retorna a menor distância positiva ou None se não houver interseção. Um raio que parte
+        de dentro da esfera atinge a saída.
         """
-        # Vetor distância da origem para o centro da esfera
-        distance = self.center - origin
+        # Projeção do vetor distância (da origem para o centro da esfera) sobre o raio
+        proj_length = direction.dot_sub(self.center, origin)
 
-        # Projeção de distance sobre o raio
-        proj_length = distance.dot(direction)
-
-        # Distância do ponto mais próximo ao quadrado
-        square_d = distance.dot(distance) - proj_length**2
+        square_distance = self.center.dist_squared(origin)
 
         # Raio da esfera ao quadrado
         square_radius = self.radius**2 
 
-        # Caso o sentido seja oposto, não há interseção
-        if proj_length < 0:
+        # Caso o sentido seja oposto, só há interseção se a origem estiver dentro da esfera
+        if proj_length < 0 and square_distance >= square_radius:
             return None
 
+        # Distância do ponto mais próximo ao quadrado
+        square_d = square_distance - proj_length**2
+
         # Caso a distância do ponto mais próximo seja maior que o raio, não há interseção
         if square_d > square_radius:
             return None
@@ -107,4 +284,69 @@ class Sphere(Intersectable):
         inter_1 = proj_length - thc
         inter_2 = proj_length + thc
 
-        return inter_1 if inter_1 > 0 else inter_2
\ No newline at end of file
+        return inter_1 if inter_1 > 0 else inter_2
+
+    def bounds(self):
+        c, r = self.center, self.radius
+        return (c.x - r, c.y - r, c.z - r), (c.x + r, c.y + r, c.z + r)
+
+    def intersects_rays(self, origins, directions):
+        center = np.array([self.center.x, self.center.y, self.center.z])
+        return sphere_distances(origins, directions, center, self.radius)
+
+    def occluded_many(self, origins, directions, max_t):
+        return self.intersects_rays(origins, directions) < max_t
+
+    def normals_many(self, points, faces=None):
+        return (points - [self.center.x, self.center.y, self.center.z]) / self.radius
+
+    def prepare(self, origin):
+        """
+        Versão de intersects com a origem fixa: o vetor da origem ao centro, o quadrado da
+        distância ao centro e o quadrado do raio são calculados uma vez.
+        """
+        ex = self.center.x - origin.x
+        ey = self.center.y - origin.y
+        ez = self.center.z - origin.z
+        square_distance = self.center.dist_squared(origin)
+        square_radius = self.radius**2
+
+        # Com a origem dentro da esfera, raios em qualquer sentido atingem a saída
+        inside = square_distance < square_radius
+
+        def intersects(direction):
+            proj_length = ex * direction.x + ey * direction.y + ez * direction.z
+            if proj_length < 0 and not inside:
+                return None
+
+            square_d = square_distance - proj_length**2
+            if square_d > square_radius:
+                return None
+
+            thc = (square_radius - square_d) ** (1/2)
+            inter_1 = proj_length - thc
+            return inter_1 if inter_1 > 0 else proj_length + thc
+
+        return intersects
+
+    def intersects_many(self, origin: Point3, directions):
+        """
+        Versão vetorizada de intersects.
+        origin: Ponto de origem dos raios
+        directions: array (N, 3) com as direções dos raios (normalizadas)
+        Retorna um array (N,) com as menores distâncias positivas, inf onde não há interseção.
+        """
+        distance = self.center - origin
+
+        proj_length = directions[:, 0] * distance.x + directions[:, 1] * distance.y + directions[:, 2] * distance.z
+        square_distance = distance.dot(distance)
+        square_d = square_distance - proj_length * proj_length
+        square_radius = self.radius * self.radius
+
+        hit = ((proj_length >= 0) | (square_distance < square_radius)) & (square_d <= square_radius)
+
+        thc = np.sqrt(np.where(hit, square_radius - square_d, 0.0))
+        inter_1 = proj_length - thc
+        inter_2 = proj_length + thc
+
+        return np.where(hit, np.where(inter_1 > 0, inter_1, inter_2), np.inf)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class RenderStats:
+    """
+    Estatísticas de um quadro renderizado: contadores do laço principal e tempo de cada etapa.
+
+    É opcional: Camera.draw e Camera.draw_vectorized só coletam estatísticas quando recebem um
+    RenderStats (parâmetro stats); sem ele, o laço sem instrumentação é usado e não há custo extra.
+
+    Atributos:
+        - resolution ((int, int)): altura e largura do quadro
+        - rays (int): raios primários lançados
+        - objects (list[dict]): por objeto, o tipo, os testes de interseção, as interseções
+          encontradas (hits) e os pixels em que o objeto é o mais próximo (visible)
+        - stage_times (dict[str, float]): segundos gastos em cada etapa (ray_generation,
+          intersection, shading, output, ...)
+    """
+    def __init__(self):
+        self.begin_frame(None, [])
+
+    def begin_frame(self, camera, objects):
+        """
+        Zera as estatísticas para um novo quadro.
+        """
+        self.resolution = None if camera is None else (camera.height_resolution, camera.width_resolution)
+        self.rays = 0
+        self.objects = [{'type': type(obj).__name__, 'tests': 0, 'hits': 0, 'visible': 0} for obj in objects]
+        self.stage_times = {}
+        self._frame_start = time.perf_counter()
+
+    def add_time(self, stage, seconds):
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Mede o tempo do bloco e o soma à etapa name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def record(self, index, tests, hits, visible):
+        """
+        Soma os contadores do objeto de índice index.
+        """
+        counters = self.objects[index]
+        counters['tests'] += tests
+        counters['hits'] += hits
+        counters['visible'] += visible
+
+    def end_frame(self):
+        self.add_time('total', time.perf_counter() - self._frame_start)
+
+    def to_dict(self):
+        total = self.stage_times.get('total', 0.0)
+        return {
+            'resolution': self.resolution,
+            'rays': self.rays,
+            'intersection_tests': sum(counters['tests'] for counters in self.objects),
+            'rays_per_sec': self.rays / total if total > 0 else None,
+            'stage_times': dict(self.stage_times),
+            'objects': [dict(index=k, **counters) for k, counters in enumerate(self.objects)],
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+
+# Os testes importam os módulos como os scripts de src/python: o diretório da implementação em
+# Python primeiro, e src (obj_reader, color_map) no fim, para que os módulos compilados de src
+# não substituam os de src/python
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.dirname(PYTHON_DIR)
+INPUTS_DIR = os.path.join(os.path.dirname(SRC_DIR), 'inputs')
+
+sys.path.insert(0, PYTHON_DIR)
+sys.path.append(SRC_DIR)
+
+
+@pytest.fixture
+def icosahedron_path():
+    """
+    Caminho do icosaedro de inputs/, com faces de três materiais (Purple, Red e Green).
+    """
+    return os.path.join(INPUTS_DIR, 'icosahedron.obj')
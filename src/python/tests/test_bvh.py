@@ -0,0 +1,45 @@
+import numpy as np
+
+from shapes import Color
+from mesh import Mesh
+
+
+def random_directions(rng, n):
+    directions = rng.normal(size=(n, 3))
+    return directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+
+def test_mesh_bvh_matches_brute_force():
+    rng = np.random.default_rng(2)
+    centers = rng.uniform(-3, 3, (400, 3)) + [0, 0, -8]
+    vertices = (centers[:, None] + rng.normal(scale=0.4, size=(400, 3, 3))).reshape(-1, 3)
+    faces = np.arange(len(vertices)).reshape(-1, 3)
+
+    accelerated = Mesh(vertices, faces, Color.WHITE, accelerate=True)
+    linear = Mesh(vertices, faces, Color.WHITE, accelerate=False)
+    assert accelerated.bvh is not None and linear.bvh is None
+
+    # Metade dos raios apontada para os centros dos triângulos, metade em direções aleatórias
+    origins = rng.uniform(-1, 1, (600, 3))
+    directions = np.concatenate([centers[rng.integers(0, 400, 300)] - origins[:300], random_directions(rng, 300)])
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+
+    t, face = accelerated.intersect_faces(origins, directions)
+    expected_t, expected_face = linear.intersect_faces(origins, directions)
+    np.testing.assert_array_equal(t, expected_t)
+    np.testing.assert_array_equal(face, expected_face)
+    assert np.isfinite(t).sum() > 250
+
+    _, _, u, v = accelerated.intersect_hits(origins, directions)
+    _, _, expected_u, expected_v = linear.intersect_hits(origins, directions)
+    np.testing.assert_allclose(u, expected_u, atol=1e-12)
+    np.testing.assert_allclose(v, expected_v, atol=1e-12)
+
+    # Travessia escalar da BVH
+    for k in range(0, 600, 7):
+        hit = accelerated.intersect_ray(tuple(origins[k]), tuple(directions[k]))
+        if hit is None:
+            assert face[k] == -1
+        else:
+            assert hit[1] == face[k]
+            assert np.isclose(hit[0], t[k])
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+import shapes
+from primitives import *
+from camera import Camera
+from hitbuffer import HitBuffer
+from mesh import Mesh, Triangle
+from scenes import SCENES
+
+
+@pytest.fixture
+def camera():
+    # Como em main.py, na origem e olhando para (0, 0, -1), numa resolução menor
+    return Camera(Point3(0, 0, 0), Point3(0, 0, -1), Vector3(0, 1, 0), 1.0, 48, 64)
+
+
+def scene_and_image(camera, name):
+    """
+    Objetos da cena de scenes.py e a imagem do laço escalar de Camera.draw, a referência dos
+    demais caminhos de renderização.
+    """
+    objects = SCENES[name](shapes)
+    return objects, np.asarray(camera.draw(objects))
+
+
+@pytest.mark.parametrize('name', SCENES)
+def test_vectorized_matches_draw(camera, name):
+    objects, image = scene_and_image(camera, name)
+    np.testing.assert_array_equal(np.asarray(camera.draw_vectorized(objects)), image)
+
+
+@pytest.mark.parametrize('name', SCENES)
+def test_streaming_matches_draw(camera, name):
+    objects, image = scene_and_image(camera, name)
+
+    # Faixas e tiles que não dividem a tela, para cobrir os blocos incompletos da borda
+    rows = np.zeros_like(image)
+    for row_start, block in camera.render_rows(objects, band_height=10):
+        rows[row_start:row_start + len(block)] = block
+    np.testing.assert_array_equal(rows, image)
+
+    tiles = np.zeros_like(image)
+    for row_start, col_start, block in camera.render_tiles(objects, tile_size=20):
+        tiles[row_start:row_start + block.shape[0], col_start:col_start + block.shape[1]] = block
+    np.testing.assert_array_equal(tiles, image)
+
+
+@pytest.mark.parametrize('name', SCENES)
+def test_culled_matches_draw(camera, name):
+    objects, image = scene_and_image(camera, name)
+    np.testing.assert_array_equal(np.asarray(camera.draw_culled(objects)), image)
+
+
+def test_culling_keeps_partially_visible_objects(camera):
+    rng = np.random.default_rng(0)
+    # Esferas na frente, atrás e nas bordas da tela, mais uma que envolve a câmera
+    objects = [shapes.Sphere(Point3(*rng.uniform(-4, 4, 2), rng.uniform(-8, 3)), rng.uniform(0.2, 1.0),
+                             shapes.Color(*rng.uniform(0, 1, 3))) for _ in range(40)]
+    rects = [camera.screen_rect(obj) for obj in objects]
+    assert any(r[0] == r[1] for r in rects) and any(0 < r[1] - r[0] < camera.height_resolution for r in rects)
+    image = np.asarray(camera.draw(objects))
+    np.testing.assert_array_equal(np.asarray(camera.draw_culled(objects)), image)
+
+    objects.append(shapes.Sphere(Point3(0.3, 0, 0.5), 12, shapes.Color(0.2, 0.2, 0.2)))
+    np.testing.assert_array_equal(np.asarray(camera.draw_culled(objects)), np.asarray(camera.draw(objects)))
+    assert not np.array_equal(np.asarray(camera.draw(objects)), image)
+
+
+@pytest.mark.parametrize('name', SCENES)
+def test_reshade_matches_draw(camera, name, tmp_path):
+    objects, image = scene_and_image(camera, name)
+    hits = camera.trace_hits(objects, path=str(tmp_path / 'hits.npy'))
+    np.testing.assert_array_equal(np.asarray(camera.reshade(hits, objects)), image)
+
+    # Com outras cores, o buffer reaberto do arquivo reproduz o novo quadro sem traçar raios
+    for obj in objects:
+        obj.color = shapes.Color(1 - obj.color.r, obj.color.b, obj.color.g)
+    reshaded = np.asarray(camera.reshade(HitBuffer.open(str(tmp_path / 'hits.npy')), objects))
+    np.testing.assert_array_equal(reshaded, np.asarray(camera.draw(objects)))
+
+
+def refined_pixels(camera, objects, samples=2):
+    """
+    Pixels que draw_antialiased refina (os passados a subpixel_directions), com threshold 1 para
+    que só mudanças de objeto ou de face disparem o refinamento.
+    """
+    refined = set()
+    subpixel_directions = camera.subpixel_directions
+
+    def record(rows, cols, samples):
+        refined.update(zip(rows.tolist(), cols.tolist()))
+        return subpixel_directions(rows, cols, samples)
+
+    camera.subpixel_directions = record
+    camera.draw_antialiased(objects, samples, threshold=1.0)
+    del camera.subpixel_directions
+    return refined
+
+
+@pytest.mark.parametrize('name', SCENES)
+def test_antialiased_with_one_sample_matches_draw(camera, name):
+    objects, image = scene_and_image(camera, name)
+    np.testing.assert_array_equal(np.asarray(camera.draw_antialiased(objects, samples=1)), image)
+
+
+def test_antialiasing_refines_diagonal_neighbours(camera):
+    # Triângulo em z = -2 com o ângulo reto exatamente entre os pixels (19, 39) e (20, 40): o
+    # pixel (19, 39) só difere do vizinho da diagonal
+    row, col = 20, 40
+    corner = Point3(2 * (col - 32) / 64, 2 * (24 - row) / 48, -2)
+    triangle = Triangle(corner, Point3(corner.x + 10, corner.y, -2), Point3(corner.x, corner.y - 10, -2), shapes.Color.WHITE)
+
+    ids = camera.trace_hits([triangle]).object_ids
+    assert ids[row, col] == 0 and ids[row - 1, col] == ids[row, col - 1] == ids[row - 1, col - 1] == -1
+    assert (row - 1, col - 1) in refined_pixels(camera, [triangle])
+
+
+def test_antialiasing_refines_face_edges(camera):
+    # Quadrado de uma cor só, com duas faces separadas pela diagonal
+    vertices = np.array([(-1, -1, -3), (1, -1, -3), (1, 1, -3), (-1, 1, -3)], dtype=float)
+    square = Mesh(vertices, np.array([(0, 1, 2), (0, 2, 3)]), shapes.Color(0.5, 0.5, 0.5))
+
+    hits = camera.trace_hits([square])
+    ids, faces = hits.object_ids, hits.face_ids
+    refined = refined_pixels(camera, [square])
+    inside = [(i, j) for i, j in refined if (ids[max(i - 1, 0):i + 2, max(j - 1, 0):j + 2] == 0).all()]
+    assert inside
+    for i, j in inside:
+        assert len(np.unique(faces[i - 1:i + 2, j - 1:j + 2])) == 2
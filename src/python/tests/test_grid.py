@@ -0,0 +1,52 @@
+import numpy as np
+
+from primitives import *
+from shapes import Color, Plane, Sphere
+from scene import CompiledScene, GRID_MIN_SPHERES
+
+
+def random_directions(rng, n):
+    directions = rng.normal(size=(n, 3))
+    return directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+
+def random_spheres(rng, n):
+    return [Sphere(Point3(*rng.uniform(-3, 3, 2), rng.uniform(-12, -4)), rng.uniform(0.2, 0.8), Color(*rng.uniform(0, 1, 3)))
+            for _ in range(n)]
+
+
+def brute_force(objects, origin, directions):
+    """
+    Interseção mais próxima testando todos os objetos, com o empate para o que vem antes.
+    """
+    distances = np.stack([obj.intersects_many(origin, directions) for obj in objects])
+    nearest = distances.argmin(axis=0)
+    t = distances[nearest, np.arange(len(directions))]
+    return t, np.where(np.isfinite(t), nearest, -1)
+
+
+def test_grid_matches_brute_force():
+    rng = np.random.default_rng(3)
+    objects = random_spheres(rng, 2 * GRID_MIN_SPHERES)
+    objects.append(Plane(Point3(0, -3, 0), Vector3(0, 1, 0), Color(0.2, 0.3, 0.4)))
+    scene = CompiledScene(objects)
+    assert scene.grid is not None
+
+    directions = random_directions(rng, 3000)
+    directions[:, 2] = -np.abs(directions[:, 2])
+    origin = Point3(0, 0, 0)
+
+    expected_t, expected_ids = brute_force(objects, origin, directions)
+    t, ids = scene.intersect(origin, directions)
+    np.testing.assert_array_equal(ids, expected_ids)
+    np.testing.assert_allclose(t, expected_t)
+
+    t, ids = scene.intersect_rays(np.zeros((3000, 3)), directions)
+    np.testing.assert_array_equal(ids, expected_ids)
+
+    # Escalar: a travessia da grade em CompiledScene.prepare
+    closest = scene.prepare(origin)
+    assert [closest(Vector3(*d)) for d in directions[:500].tolist()] == expected_ids[:500].tolist()
+
+    blocked = scene.occluded(np.zeros(3), directions, np.full(3000, 9.0))
+    np.testing.assert_array_equal(blocked, expected_t < 9.0)
@@ -0,0 +1,51 @@
+import numpy as np
+
+from mesh import moller_trumbore, intersect_triangles, nearest_triangles
+
+
+def random_directions(rng, n):
+    directions = rng.normal(size=(n, 3))
+    return directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+
+def test_moller_trumbore_barycentrics():
+    rng = np.random.default_rng(0)
+    v0, e1, e2 = rng.normal(size=(3, 500, 3))
+    u, v = rng.uniform(0.05, 0.45, (2, 500))
+    points = v0 + u[:, None] * e1 + v[:, None] * e2
+
+    origins = points + rng.normal(size=(500, 3)) * 3
+    directions = points - origins
+    distance = np.linalg.norm(directions, axis=1)
+    directions /= distance[:, None]
+
+    t, hit_u, hit_v = moller_trumbore(origins, directions, v0, e1, e2)
+    np.testing.assert_allclose(t, distance, rtol=1e-9)
+    np.testing.assert_allclose(hit_u, u, atol=1e-9)
+    np.testing.assert_allclose(hit_v, v, atol=1e-9)
+
+    # Fora do triângulo (u + v > 1) e atrás da origem não há interseção
+    outside = v0 + 0.7 * e1 + 0.7 * e2
+    t, _, _ = moller_trumbore(origins, (outside - origins) / np.linalg.norm(outside - origins, axis=1, keepdims=True), v0, e1, e2)
+    assert np.isinf(t).all()
+    t, _, _ = moller_trumbore(origins, -directions, v0, e1, e2)
+    assert np.isinf(t).all()
+
+
+def test_nearest_triangles_matches_all_pairs():
+    rng = np.random.default_rng(1)
+    v0 = rng.uniform(-2, 2, (300, 3)) + [0, 0, -6]
+    e1, e2 = rng.normal(size=(2, 300, 3))
+    directions = random_directions(rng, 400)
+    directions[:, 2] = -np.abs(directions[:, 2])
+    origin = np.zeros(3)
+
+    distances = intersect_triangles(origin, directions, v0, e1, e2)
+    t, face, u, v = nearest_triangles(origin, directions, v0, e1, e2)
+
+    np.testing.assert_array_equal(t, distances.min(axis=1))
+    hit = np.isfinite(t)
+    np.testing.assert_array_equal(face[hit], distances.argmin(axis=1)[hit])
+    np.testing.assert_array_equal(face[~hit], -1)
+    np.testing.assert_allclose(v0[face[hit]] + u[hit, None] * e1[face[hit]] + v[hit, None] * e2[face[hit]],
+                               origin + directions[hit] * t[hit, None], atol=1e-9)
@@ -0,0 +1,81 @@
+import mmap
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import obj_cache
+from obj_reader import ObjReader
+
+
+ARRAYS = obj_cache.ARRAYS
+
+
+def is_mapped(array):
+    """
+    Se o array é uma visão sobre o arquivo de cache mapeado em memória.
+    """
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return isinstance(array, memoryview) and isinstance(array.obj, mmap.mmap)
+
+
+def assert_same_reader(reader, expected):
+    for name in ARRAYS:
+        np.testing.assert_array_equal(getattr(reader, name), getattr(expected, name), err_msg=name)
+    assert reader.cur_material_name == expected.cur_material_name
+    assert reader.material_table.names == expected.material_table.names
+    np.testing.assert_array_equal(reader.material_table.kd, expected.material_table.kd)
+    assert [face.vertice_indices for face in reader.get_faces()] == [face.vertice_indices for face in expected.get_faces()]
+
+
+@pytest.fixture
+def obj_copy(icosahedron_path, tmp_path):
+    """
+    Cópia do icosaedro e do seu .mtl num diretório temporário, onde o cache pode ser gravado.
+    """
+    directory = os.path.dirname(icosahedron_path)
+    shutil.copy(icosahedron_path, tmp_path)
+    shutil.copy(os.path.join(directory, 'model.mtl'), tmp_path)
+    return str(tmp_path / os.path.basename(icosahedron_path))
+
+
+def test_cache_is_memory_mapped_and_identical(obj_copy):
+    expected = ObjReader(obj_copy)
+    ObjReader(obj_copy, cache=True)
+    assert os.path.exists(obj_cache.cache_path(obj_copy))
+
+    cached = ObjReader(obj_copy, compact=True, cache=True)
+    assert_same_reader(cached, expected)
+    assert is_mapped(cached.vertex_array)
+
+
+def test_cache_is_invalidated_by_changes(obj_copy):
+    ObjReader(obj_copy, cache=True)
+
+    # Um vértice a mais no fim do .obj
+    with open(obj_copy, 'a') as file:
+        file.write('v 1.0 2.0 3.0\n')
+    reader = ObjReader(obj_copy, cache=True)
+    assert not is_mapped(reader.vertex_array)
+    assert_same_reader(reader, ObjReader(obj_copy))
+    np.testing.assert_array_equal(reader.vertex_array[-1], [1.0, 2.0, 3.0])
+
+    # Outra cor difusa no .mtl, com o mesmo tamanho: só o mtime (adiantado para não depender da
+    # resolução do relógio do sistema de arquivos) invalida o cache
+    mtl_path = os.path.join(os.path.dirname(obj_copy), 'model.mtl')
+    with open(mtl_path) as file:
+        text = file.read()
+    with open(mtl_path, 'w') as file:
+        file.write(text.replace('Kd 0.8 0.2 0.2', 'Kd 0.1 0.2 0.3'))
+    stat = os.stat(mtl_path)
+    os.utime(mtl_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    reader = ObjReader(obj_copy, cache=True)
+    red = reader.material_table.get_id('Red')
+    np.testing.assert_array_equal(reader.material_table.kd[red], [0.1, 0.2, 0.3])
+
+    # E o cache regravado volta a ser usado
+    cached = ObjReader(obj_copy, cache=True)
+    assert is_mapped(cached.vertex_array)
+    assert_same_reader(cached, reader)
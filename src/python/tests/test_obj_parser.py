@@ -0,0 +1,28 @@
+import numpy as np
+
+import obj_parser
+from obj_cache import ARRAYS
+from obj_reader import ObjReader
+
+
+def test_parallel_reader_matches_line_reader(icosahedron_path):
+    expected = ObjReader(icosahedron_path)
+    reader = ObjReader(icosahedron_path, workers=2)
+
+    for name in ARRAYS:
+        np.testing.assert_array_equal(getattr(reader, name), getattr(expected, name), err_msg=name)
+    assert reader.cur_material_name == expected.cur_material_name
+    assert reader.material_table.names == expected.material_table.names
+
+
+def test_parallel_chunks_match_line_reader(icosahedron_path):
+    expected = ObjReader(icosahedron_path)
+
+    # Pedaços pequenos: as linhas v, vn, f e usemtl ficam espalhadas por vários processos
+    assert len(obj_parser.chunk_bounds(icosahedron_path, 128)) > 4
+    vertices, normals, face_vertices, face_normals, events = obj_parser.parse(icosahedron_path, workers=2, chunk_size=128)
+    np.testing.assert_array_equal(vertices, expected.vertex_array)
+    np.testing.assert_array_equal(normals, expected.normal_array)
+    np.testing.assert_array_equal(face_vertices, expected.face_vertex_indices)
+    np.testing.assert_array_equal(face_normals, expected.face_normal_indices)
+    assert [name for _, kind, name in events if kind == 'usemtl'] == ['Purple', 'Red', 'Green']
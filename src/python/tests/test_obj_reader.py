@@ -0,0 +1,32 @@
+import numpy as np
+
+import obj_cache
+from obj_reader import ObjReader
+
+
+ARRAYS = obj_cache.ARRAYS
+
+
+def assert_same_reader(reader, expected):
+    for name in ARRAYS:
+        np.testing.assert_array_equal(getattr(reader, name), getattr(expected, name), err_msg=name)
+    assert reader.cur_material_name == expected.cur_material_name
+    assert reader.material_table.names == expected.material_table.names
+    np.testing.assert_array_equal(reader.material_table.kd, expected.material_table.kd)
+    assert [face.vertice_indices for face in reader.get_faces()] == [face.vertice_indices for face in expected.get_faces()]
+
+
+def test_compact_matches_line_reader(icosahedron_path):
+    expected = ObjReader(icosahedron_path)
+    np.testing.assert_array_equal(np.bincount(expected.face_material_ids + 1), [0, 7, 7, 0, 0, 6])
+
+    compact = ObjReader(icosahedron_path, compact=True)
+    assert_same_reader(compact, expected)
+    assert not isinstance(compact.get_faces(), list)
+    assert [[(p.x, p.y, p.z) for p in face] for face in compact.get_faces_point3s()] == \
+        [[(p.x, p.y, p.z) for p in face] for face in expected.get_faces_point3s()]
+
+    # Com dtype, só a precisão das coordenadas muda
+    single = ObjReader(icosahedron_path, compact=True, dtype=np.float32)
+    assert single.vertex_array.dtype == np.float32 and single.face_vertex_indices.dtype == np.int32
+    np.testing.assert_array_equal(single.vertex_array, expected.vertex_array.astype(np.float32))
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from primitives import *
+from shapes import Color, Plane, Sphere
+from mesh import Instance, Mesh, Triangle
+from transform import translation
+from camera import Camera
+from scene import CompiledScene
+from lighting import PhongMaterial, PointLight, shading_rows, shading_table
+from stats import RenderStats
+from obj_reader import ObjReader
+from color_map import Vector3 as MtlVector3
+
+
+@pytest.fixture
+def icosahedron(icosahedron_path):
+    return Mesh.from_obj(ObjReader(icosahedron_path, compact=True))
+
+
+@pytest.fixture
+def camera():
+    # Atrás do icosaedro (centrado em (6, 1.5, 0)), de onde as faces dos três materiais aparecem
+    return Camera(Point3(6, 1.5, -6), Point3(6, 1.5, 0), Vector3(0, 1, 0), 1.0, 48, 64)
+
+
+def mixed_scene(mesh):
+    return [mesh, Instance(mesh, translation(0.8, 0.3, 1.5)), Instance(mesh, translation(-1.2, 0, 1), Color(0.1, 0.9, 0.9)),
+            Sphere(Point3(6.5, 2.2, -1.5), 0.3, Color(1, 1, 0)),
+            Triangle(Point3(4, 0, -1), Point3(5, 0, -1), Point3(4.5, 1, -1), Color(0, 0, 1)),
+            Plane(Point3(0, 0.2, 0), Vector3(0, 1, 0), Color(0.3, 0.3, 0.3))]
+
+
+def test_occluded_matches_nearest_hit(icosahedron):
+    rng = np.random.default_rng(0)
+    objects = mixed_scene(icosahedron)
+    scene = CompiledScene(objects)
+
+    origins = rng.uniform([3, 0.5, -4], [9, 3, 3], (2000, 3))
+    directions = rng.normal(size=(2000, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    max_t = rng.uniform(0.1, 6, 2000)
+
+    nearest = np.stack([obj.intersects_rays(origins, directions) for obj in objects]).min(axis=0)
+    blocked = scene.occluded(origins, directions, max_t)
+    np.testing.assert_array_equal(blocked, nearest < max_t)
+    assert 0 < blocked.sum() < len(blocked)
+
+    for obj in objects:
+        np.testing.assert_array_equal(obj.occluded_many(origins, directions, max_t), obj.intersects_rays(origins, directions) < max_t)
+
+
+def test_mesh_from_obj_keeps_face_materials(icosahedron):
+    assert icosahedron.material_table.names == ['Red', 'Green', 'Blue', 'Orange', 'Purple']
+    np.testing.assert_array_equal(icosahedron.face_material_ids, [4] * 6 + [0] * 7 + [1] * 7)
+
+    assert Instance(icosahedron).face_material_ids is icosahedron.face_material_ids
+    assert Instance(icosahedron, color=Color.WHITE).face_material_ids is None
+
+
+def test_flat_paths_color_each_face(icosahedron, camera):
+    objects = mixed_scene(icosahedron)
+    image = np.asarray(camera.draw(objects))
+
+    scene = CompiledScene(objects)
+    origin = np.array([6, 1.5, -6.0])
+    directions = camera.primary_directions()
+    t, ids = scene.intersect(camera.position, directions)
+    faces, _ = scene.surface(origin, directions, t, ids, normals=False)
+
+    on_mesh = ids == 0
+    materials = icosahedron.face_material_ids[faces[on_mesh]]
+    assert set(materials.tolist()) == {0, 1, 4}
+    np.testing.assert_allclose(image.reshape(-1, 3)[on_mesh], icosahedron.material_table.kd[materials], atol=1e-6)
+
+    for other in (camera.draw_vectorized(objects), camera.draw_culled(objects), camera.draw(objects, stats=RenderStats()),
+                  camera.draw_antialiased(objects, samples=1), camera.reshade(camera.trace_hits(objects), objects)):
+        np.testing.assert_array_equal(np.asarray(other), image)
+
+
+def test_reshade_follows_material_changes(icosahedron, camera):
+    objects = mixed_scene(icosahedron)
+    hits = camera.trace_hits(objects)
+
+    green = icosahedron.material_table.materials[1]
+    original = green.kd
+    try:
+        green.kd = MtlVector3(1, 0, 1)
+        reshaded = np.asarray(camera.reshade(hits, objects))
+        np.testing.assert_array_equal(reshaded, np.asarray(camera.draw(objects)))
+        assert (np.abs(reshaded.reshape(-1, 3) - [1, 0, 1]).max(axis=1) < 1e-6).any()
+    finally:
+        green.kd = original
+        icosahedron.material_table.refresh()
+
+
+def test_shading_uses_face_materials(icosahedron, camera):
+    objects = mixed_scene(icosahedron)
+    lights = [PointLight(Point3(6, 6, -6))]
+    scene = CompiledScene(objects)
+    materials = shading_table(scene)
+
+    # Uma linha por objeto e uma por material da tabela compartilhada pelas instâncias
+    assert len(materials['kd']) == len(objects) + len(icosahedron.material_table)
+    rows = shading_rows(materials, np.array([0, 1, 2, 0, -1]), np.array([0, 10, 10, -1, -1]))
+    np.testing.assert_array_equal(rows, [len(objects) + 4, len(objects) + 0, 2, 0, -1])
+
+    before = np.asarray(camera.draw_shaded(objects, lights)).reshape(-1, 3)
+    green = icosahedron.material_table.materials[1]
+    original = green.kd
+    try:
+        green.kd = MtlVector3(0, 0, 1)
+        after = np.asarray(camera.draw_shaded(objects, lights)).reshape(-1, 3)
+    finally:
+        green.kd = original
+        icosahedron.material_table.refresh()
+
+    t, ids = scene.intersect(camera.position, camera.primary_directions())
+    faces, _ = scene.surface(np.array([6, 1.5, -6.0]), camera.primary_directions(), t, ids, normals=False)
+    changed = (after != before).any(axis=1)
+    on_green = np.isin(ids, (0, 1)) & (icosahedron.face_material_ids[np.maximum(faces, 0)] == 1) & (faces >= 0)
+    assert changed[on_green].any()
+    assert not changed[~on_green].any()
+
+
+def test_matte_shading_without_lights_is_ambient():
+    objects = [Sphere(Point3(0, 0, -5), 1, Color(0.8, 0.4, 0.2))]
+    camera = Camera(Point3(0, 0, 0), Point3(0, 0, -1), Vector3(0, 1, 0), 1.0, 20, 20)
+    ambient = Color(0.5, 0.5, 0.5)
+
+    image = np.asarray(camera.draw_shaded(objects, [], ambient)).reshape(-1, 3)
+    flat = np.asarray(camera.draw(objects)).reshape(-1, 3)
+    np.testing.assert_allclose(image, flat * 0.5, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        PhongMaterial(Color.WHITE, Color.WHITE, Color.BLACK, 1.0, d=2.0)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from primitives import *
+from shapes import Color, Sphere
+from scene import CompiledScene, GRID_MIN_SPHERES
+
+
+def random_directions(rng, n):
+    directions = rng.normal(size=(n, 3))
+    return directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+
+def random_spheres(rng, n):
+    return [Sphere(Point3(*rng.uniform(-3, 3, 2), rng.uniform(-12, -4)), rng.uniform(0.2, 0.8), Color(*rng.uniform(0, 1, 3)))
+            for _ in range(n)]
+
+
+def brute_force(objects, origin, directions):
+    """
+    Interseção mais próxima testando todos os objetos, com o empate para o que vem antes.
+    """
+    distances = np.stack([obj.intersects_many(origin, directions) for obj in objects])
+    nearest = distances.argmin(axis=0)
+    t = distances[nearest, np.arange(len(directions))]
+    return t, np.where(np.isfinite(t), nearest, -1)
+
+
+def test_sphere_paths_agree_for_origins_inside():
+    rng = np.random.default_rng(4)
+    objects = [Sphere(Point3(0, 0, 0), 3.0, Color(0.5, 0.2, 0.1))] + random_spheres(rng, GRID_MIN_SPHERES)
+    origin = Point3(0.1, 0.2, 0.3)
+    directions = random_directions(rng, 1000)
+
+    sphere = objects[0]
+    intersects = sphere.prepare(origin)
+    scalar = [sphere.intersects(origin, Vector3(*d)) for d in directions.tolist()]
+    prepared = [intersects(Vector3(*d)) for d in directions.tolist()]
+    assert None not in scalar and scalar == prepared
+    np.testing.assert_allclose(sphere.intersects_many(origin, directions), scalar)
+    np.testing.assert_allclose(sphere.intersects_rays(np.tile([0.1, 0.2, 0.3], (1000, 1)), directions), scalar)
+
+    # Com e sem a grade, o raio que parte de dentro atinge a saída da esfera
+    for scene in (CompiledScene(objects), CompiledScene(objects[:GRID_MIN_SPHERES - 1])):
+        expected_t, expected_ids = brute_force(scene.objects, origin, directions)
+        t, ids = scene.intersect(origin, directions)
+        np.testing.assert_array_equal(ids, expected_ids)
+        np.testing.assert_allclose(t, expected_t)
+        assert (ids >= 0).all()
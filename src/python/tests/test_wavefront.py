@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from primitives import *
+from shapes import Color, Plane, Sphere
+from camera import Camera
+from lighting import PhongMaterial, PointLight
+from wavefront import refraction, trace_wavefront
+from scene import CompiledScene
+
+
+LIGHTS = [PointLight(Point3(3, 5, 0))]
+
+
+def random_rays(rng, n):
+    directions = rng.normal(size=(n, 3))
+    normals = rng.normal(size=(n, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return directions, normals
+
+
+def sines(directions, normals):
+    return np.linalg.norm(np.cross(directions, normals), axis=1)
+
+
+@pytest.fixture
+def camera():
+    return Camera(Point3(0, 0, 0), Point3(0, 0, -1), Vector3(0, 1, 0), 1.0, 40, 50)
+
+
+def glass_scene(ni, d, ks=Color.BLACK):
+    glass = Sphere(Point3(0, 0, -4), 1.2, Color(0.9, 0.9, 0.9))
+    glass.material = PhongMaterial(glass.color, glass.color, ks, 10.0, ni, d)
+    return [glass, Sphere(Point3(0.5, 0.3, -9), 1.5, Color(0.8, 0.2, 0.1)),
+            Plane(Point3(0, -2, 0), Vector3(0, 1, 0), Color(0.4, 0.5, 0.4))]
+
+
+def test_refraction_follows_snell():
+    rng = np.random.default_rng(0)
+    directions, normals = random_rays(rng, 5000)
+    ni = rng.uniform(1.0, 2.5, 5000)
+    refracted, total_reflection = refraction(directions, normals, ni)
+
+    # Raios que entram (contra a normal) vão do índice 1 para ni; os que saem, de ni para 1
+    entering = (directions * normals).sum(axis=1) < 0
+    n1, n2 = np.where(entering, 1.0, ni), np.where(entering, ni, 1.0)
+    incident_sine = sines(directions, normals)
+    np.testing.assert_array_equal(total_reflection, n1 * incident_sine > n2)
+    assert total_reflection.any() and not total_reflection[entering].any()
+
+    ok = ~total_reflection
+    np.testing.assert_allclose(np.linalg.norm(refracted[ok], axis=1), 1.0, rtol=1e-9)
+    np.testing.assert_allclose(n2[ok] * sines(refracted[ok], normals[ok]), n1[ok] * incident_sine[ok], atol=1e-9)
+    # No plano de incidência, sem voltar para o lado de onde o raio veio
+    np.testing.assert_allclose((np.cross(directions, normals)[ok] * refracted[ok]).sum(axis=1), 0.0, atol=1e-9)
+    assert ((refracted[ok] * normals[ok]).sum(axis=1) * (directions[ok] * normals[ok]).sum(axis=1) > 0).all()
+    assert not refracted[total_reflection].any()
+
+
+def test_refraction_keeps_normal_incidence_and_unit_index():
+    rng = np.random.default_rng(1)
+    directions, normals = random_rays(rng, 100)
+
+    refracted, total_reflection = refraction(-normals, normals, np.full(100, 1.5))
+    np.testing.assert_allclose(refracted, -normals, atol=1e-12)
+    assert not total_reflection.any()
+
+    refracted, total_reflection = refraction(directions, normals, np.ones(100))
+    np.testing.assert_allclose(refracted, directions, atol=1e-12)
+    assert not total_reflection.any()
+
+
+def test_opaque_max_depth_zero_matches_draw_shaded(camera):
+    objects = glass_scene(ni=1.5, d=1.0, ks=Color(0.3, 0.3, 0.3))
+    np.testing.assert_array_equal(np.asarray(camera.draw_traced(objects, LIGHTS, max_depth=0)),
+                                  np.asarray(camera.draw_shaded(objects, LIGHTS)))
+
+    # Com d < 1 a cor local é ponderada pela opacidade, e só os raios refratados completam a cor
+    objects = glass_scene(ni=1.5, d=0.1)
+    assert not np.array_equal(np.asarray(camera.draw_traced(objects, LIGHTS, max_depth=0)),
+                              np.asarray(camera.draw_shaded(objects, LIGHTS)))
+
+
+def test_transparent_sphere_with_unit_index_is_invisible(camera):
+    # ni = 1 e d = 0: o raio atravessa a esfera sem desvio e sem perder peso. Só com a luz
+    # ambiente, já que os raios de sombra tratam todos os objetos como opacos
+    objects = glass_scene(ni=1.0, d=0.0)
+    with_glass = np.asarray(camera.draw_traced(objects, [], Color(0.5, 0.5, 0.5), max_depth=4))
+    without = np.asarray(camera.draw_traced(objects[1:], [], Color(0.5, 0.5, 0.5), max_depth=4))
+    np.testing.assert_allclose(with_glass, without, atol=2e-6)
+    assert with_glass.any()
+
+    sizes = []
+    scene = CompiledScene(objects)
+    trace_wavefront(scene, camera.position, camera.primary_directions(), LIGHTS, Color(0.1, 0.1, 0.1), 4, queue_sizes=sizes)
+    assert sizes[0] == 40 * 50 and sizes[1] > 0
+
@@ -0,0 +1,57 @@
+"""
+Transformações afins como matrizes 4x4 (coordenadas homogêneas), compostas com @:
+    translation(2, 0, -5) @ rotation((0, 1, 0), np.pi / 4) @ scaling(0.5)
+aplica primeiro a escala, depois a rotação e por último a translação.
+"""
+import numpy as np
+
+
+def identity():
+    return np.eye(4)
+
+
+def translation(x, y, z):
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+
+def scaling(x, y=None, z=None):
+    """
+    Escala por eixo; com um só fator, a escala é uniforme.
+    """
+    y = x if y is None else y
+    z = x if z is None else z
+    if x == 0 or y == 0 or z == 0:
+        raise ValueError("Os fatores de escala não podem ser nulos.")
+    return np.diag([x, y, z, 1.0])
+
+
+def rotation(axis, angle):
+    """
+    Rotação de angle radianos em torno do eixo axis (tupla ou Vector3), pela fórmula de Rodrigues.
+    """
+    axis = np.array([axis.x, axis.y, axis.z] if hasattr(axis, 'x') else axis, dtype=float)
+    norm = np.linalg.norm(axis)
+    if norm == 0:
+        raise ValueError("O eixo de rotação não pode ser nulo.")
+    x, y, z = axis / norm
+
+    cross = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    matrix = np.eye(4)
+    matrix[:3, :3] = np.eye(3) + np.sin(angle) * cross + (1 - np.cos(angle)) * (cross @ cross)
+    return matrix
+
+
+def transform_points(matrix, points):
+    """
+    Aplica a transformação a pontos (array (..., 3)).
+    """
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def transform_vectors(matrix, vectors):
+    """
+    Aplica a parte linear da transformação a vetores (array (..., 3)), sem a translação.
+    """
+    return vectors @ matrix[:3, :3].T
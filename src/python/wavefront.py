@@ -0,0 +1,157 @@
+import numpy as np
+
+from primitives import *
+from lighting import shade, shading_rows, shading_table
+
+
+'''
+    Traçado de raios secundários (reflexão e refração) em frentes de onda.
+
+    Em vez de seguir cada pixel recursivamente, os raios de uma mesma geração ficam numa fila
+    empacotada (RayQueue: arrays contíguos com pixel, origem, direção e peso de cada raio) e são
+    intersectados com a cena de uma vez, como os raios primários. A cada geração os raios que
+    terminaram (sem interseção, ou com peso desprezível) são removidos da fila, e os refletidos e
+    refratados nos pontos atingidos formam a fila da geração seguinte, até max_depth.
+
+    O peso de um raio é a fração (por canal) com que a cor que ele encontra chega ao pixel: a
+    reflexão usa ks do material e a refração 1 - d (a parte transmitida), com direção dada pela
+    lei de Snell e o índice ni. Na reflexão interna total, a parte transmitida é refletida.
+    A cor local (lighting.shade) de cada ponto atingido entra com a fração opaca d do material.
+'''
+
+# Número padrão de gerações de raios secundários
+MAX_DEPTH = 4
+
+# Raios com peso menor que isso em todos os canais são descartados da fila
+MIN_WEIGHT = 1e-3
+
+# Deslocamento da origem dos raios secundários ao longo da normal, para que não atinjam a
+# própria superfície de onde partem
+RAY_BIAS = 1e-6
+
+
+class RayQueue:
+    """
+    Fila empacotada de raios de uma geração.
+
+    Atributos:
+        - pixels (array (N,)): pixel (índice na imagem achatada) a que cada raio contribui
+        - origins (array (N, 3)): origens dos raios
+        - directions (array (N, 3)): direções normalizadas
+        - weights (array (N, 3)): peso de cada raio por canal
+    """
+    def __init__(self, pixels, origins, directions, weights):
+        self.pixels = pixels
+        self.origins = origins
+        self.directions = directions
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.pixels)
+
+    def compact(self, keep):
+        """
+        Nova fila só com os raios selecionados por keep (máscara ou índices), em arrays contíguos.
+        """
+        return RayQueue(self.pixels[keep], self.origins[keep], self.directions[keep], self.weights[keep])
+
+    @staticmethod
+    def concatenate(queues):
+        return RayQueue(*(np.concatenate([getattr(q, name) for q in queues])
+                          for name in ('pixels', 'origins', 'directions', 'weights')))
+
+
+def refraction(directions, normals, ni):
+    """
+    Direções dos raios refratados pela lei de Snell (sen θt = eta * sen θi), com o meio externo
+    de índice 1.
+    directions: array (N, 3) com as direções normalizadas dos raios incidentes
+    normals: array (N, 3) com as normais unitárias das superfícies atingidas; o lado da normal
+             para o qual o raio aponta indica se ele sai do objeto
+    ni: array (N,) com o índice de refração de cada objeto
+    Retorna (direções (N, 3), máscara (N,) de reflexão interna total), com direção nula onde
+    há reflexão interna total.
+    """
+    cos_i = -(normals * directions).sum(axis=1)
+    entering = cos_i >= 0
+    facing = np.where(entering[:, None], normals, -normals)
+    cos_i = np.abs(cos_i)
+
+    eta = np.where(entering, 1 / ni, ni)
+    k = 1 - eta * eta * (1 - cos_i * cos_i)
+    total_reflection = k < 0
+    refracted = eta[:, None] * directions + (eta * cos_i - np.sqrt(np.maximum(k, 0.0)))[:, None] * facing
+    refracted[total_reflection] = 0.0
+    return refracted, total_reflection
+
+
+def trace_wavefront(scene, position: Point3, directions, lights, ambient, max_depth=MAX_DEPTH,
+                    min_weight=MIN_WEIGHT, queue_sizes=None):
+    """
+    Traça os raios primários e max_depth gerações de raios refletidos e refratados.
+    scene: CompiledScene
+    position: origem dos raios primários
+    directions: array (N, 3) com as direções dos raios primários
+    lights, ambient: luzes e luz ambiente do sombreamento (ver lighting.shade)
+    max_depth: número de gerações de raios secundários. Com 0, a cor é a de Camera.draw_shaded
+        ponderada pela opacidade d do objeto atingido: só é igual para materiais opacos (d = 1)
+    min_weight: peso abaixo do qual um raio secundário é descartado
+    queue_sizes: lista opcional que recebe o tamanho da fila de cada geração
+    Retorna um array (N, 3) com as cores em [0, 1].
+    """
+    if max_depth < 0:
+        raise ValueError("A profundidade máxima não pode ser negativa.")
+
+    n = len(directions)
+    image = np.zeros((n, 3))
+    materials = shading_table(scene)
+
+    origin = np.array([position.x, position.y, position.z])
+    queue = RayQueue(np.arange(n), np.broadcast_to(origin, (n, 3)), directions, np.ones((n, 3)))
+
+    for depth in range(max_depth + 1):
+        if queue_sizes is not None:
+            queue_sizes.append(len(queue))
+
+        # Toda a geração é intersectada de uma vez; os raios primários têm a mesma origem
+        if depth == 0:
+            t, object_ids = scene.intersect(position, queue.directions)
+        else:
+            t, object_ids = scene.intersect_rays(queue.origins, queue.directions)
+
+        # Compactação: os raios sem interseção terminam no fundo (preto)
+        hit = np.flatnonzero(object_ids >= 0)
+        queue, t, object_ids = queue.compact(hit), t[hit], object_ids[hit]
+        if len(queue) == 0:
+            break
+
+        d = queue.directions
+        face_ids, normals = scene.surface(queue.origins, d, t, object_ids)
+        local = shade(scene, queue.origins, d, t, object_ids, face_ids, normals, lights, ambient, materials)
+
+        # Material de cada ponto atingido (o da face, nas malhas com materiais por face)
+        rows = shading_rows(materials, object_ids, face_ids)
+        opacity = materials['d'][rows]
+        np.add.at(image, queue.pixels, queue.weights * opacity[:, None] * local)
+
+        if depth == max_depth:
+            break
+
+        # Normal do lado de onde vem o raio
+        cos_i = -(normals * d).sum(axis=1)
+        facing = np.where((cos_i >= 0)[:, None], normals, -normals)
+        cos_i = np.abs(cos_i)
+        points = queue.origins + d * t[:, None]
+
+        directions, total_reflection = refraction(d, normals, materials['ni'][rows])
+        transmitted = np.where(total_reflection, 0.0, 1 - opacity)
+
+        reflected = RayQueue(queue.pixels, points + facing * RAY_BIAS, d + 2 * cos_i[:, None] * facing,
+                             queue.weights * (materials['ks'][rows] + (1 - opacity - transmitted)[:, None]))
+        refracted = RayQueue(queue.pixels, points - facing * RAY_BIAS, directions, queue.weights * transmitted[:, None])
+
+        queue = RayQueue.concatenate([q.compact(q.weights.max(axis=1) >= min_weight) for q in (reflected, refracted)])
+        if len(queue) == 0:
+            break
+
+    return np.clip(image, 0.0, 1.0)